@@ -0,0 +1,108 @@
+"""Микро-бенчмарк накладных расходов `allure_attach_request` на один HTTP-запрос.
+
+Сравнивает прежнюю реализацию (новый `Environment` Jinja2 и eager curl на каждый вызов)
+с текущей (шаблоны скомпилированы один раз на процесс, curl ленивый) в режимах
+`full` и `lazy`. Сеть не используется: декорируется функция, возвращающая готовый ответ.
+Вне pytest `allure.attach` ничего не пишет, поэтому измеряется только рендеринг.
+
+Запуск из каталога `niffler_e_2_e_tests_python`:
+    python -m benchmarks.bench_allure_attach --requests 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import timedelta
+
+import curlify
+from jinja2 import Environment, PackageLoader, select_autoescape
+from requests import Request, Response
+from requests.structures import CaseInsensitiveDict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from niffler_e_2_e_tests_python.utils import http_capture
+from niffler_e_2_e_tests_python.utils.allure_helpers import allure_attach_request
+
+
+def _legacy_allure_attach_request(function):
+    """Копия прежнего декоратора: окружение и шаблоны создаются на каждый вызов."""
+
+    def wrapper(*args, **kwargs):
+        env = Environment(
+            loader=PackageLoader("schemas"), autoescape=select_autoescape()
+        )
+        request_template = env.get_template("http-colored-request.ftl")
+        response_template = env.get_template("http-colored-response.ftl")
+        response = function(*args, **kwargs)
+        curl = curlify.to_curl(response.request)
+        request_template.render({"request": response.request, "curl": curl})
+        response_template.render({"response": response})
+        json.dumps(response.json(), indent=4).encode("utf8")
+        return response
+
+    return wrapper
+
+
+def _make_response() -> Response:
+    """Собирает ответ requests с типичным JSON-телом gateway без сетевого вызова."""
+    prepared = Request(
+        "POST",
+        "http://auth.niffler.dc:9000/login",
+        data={"username": "duck", "password": "secret", "_csrf": "token"},
+        cookies={"JSESSIONID": "abc", "XSRF-TOKEN": "token"},
+    ).prepare()
+    response = Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    response._content = json.dumps(
+        [{"id": str(i), "name": f"category-{i}", "archived": False} for i in range(50)]
+    ).encode("utf-8")
+    response.encoding = "utf-8"
+    response.request = prepared
+    response.url = prepared.url
+    response.elapsed = timedelta(milliseconds=5)
+    return response
+
+
+class _FakeSession:
+    def __init__(self, response: Response) -> None:
+        self.response = response
+
+    def request(self, method: str, url: str) -> Response:
+        return self.response
+
+
+def _measure(decorator, requests_count: int) -> float:
+    """Возвращает среднее время обработки одного запроса декоратором, в микросекундах."""
+    send = decorator(_FakeSession.request)
+    session = _FakeSession(_make_response())
+    started = time.perf_counter()
+    for _ in range(requests_count):
+        send(session, "POST", "/login")
+        http_capture.discard()
+    return (time.perf_counter() - started) / requests_count * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    http_capture.configure(http_capture.CaptureLevel.FULL)
+    legacy = _measure(_legacy_allure_attach_request, args.requests)
+    cached = _measure(allure_attach_request, args.requests)
+    http_capture.configure(http_capture.CaptureLevel.LAZY)
+    lazy = _measure(allure_attach_request, args.requests)
+
+    print(f"requests: {args.requests}")
+    print(f"legacy (new Environment per call): {legacy:9.1f} us/request")
+    print(f"cached templates, full capture:    {cached:9.1f} us/request")
+    print(f"cached templates, lazy capture:    {lazy:9.1f} us/request")
+    print(f"speedup full/lazy: x{legacy / cached:.1f} / x{legacy / lazy:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Бенчмарк клиентской стороны API-тестов против фейкового gateway в том же процессе.
+
+Сервер не добавляет сетевых задержек и работы Spring-сервисов, поэтому разница
+между режимами показывает накладные расходы самих клиентов: отдельный клиент
+на каждый запрос против общего пула соединений и последовательное создание трат
+против конкурентного `SpendSeeder`.
+
+Запуск из каталога `niffler_e_2_e_tests_python`:
+    python -m benchmarks.bench_gateway_client --requests 200
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import UTC, datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from niffler_e_2_e_tests_python.models.spend import SpendAdd
+from niffler_e_2_e_tests_python.utils.api_clients import (
+    CategoriesApiClient,
+    SpendApiClient,
+)
+from niffler_e_2_e_tests_python.utils.base_session import BaseSession, HttpPool
+from niffler_e_2_e_tests_python.utils.fake_gateway import FakeGateway, fake_token
+from niffler_e_2_e_tests_python.utils.spend_seeder import SpendSeeder
+
+USERNAME = "bench"
+
+
+def _per_request_ms(started: float, requests_count: int) -> float:
+    return (time.perf_counter() - started) / requests_count * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    token = fake_token(USERNAME)
+
+    with FakeGateway() as gateway:
+        pool = HttpPool(gateway.url)
+        categories_api = CategoriesApiClient(BaseSession(gateway.url, pool=pool), token)
+        category = categories_api.add_category("Bench")
+        spends = [
+            SpendAdd(
+                spendDate=datetime.now(UTC),
+                category=category,
+                currency="RUB",
+                amount=float(i),
+                description=f"bench {i}",
+            )
+            for i in range(args.requests)
+        ]
+
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            session = BaseSession(gateway.url)
+            SpendApiClient(session, token).get_all_spends()
+            session.close()
+        fresh_client = _per_request_ms(started, args.requests)
+
+        pooled_api = SpendApiClient(BaseSession(gateway.url, pool=pool), token)
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            pooled_api.get_all_spends()
+        pooled = _per_request_ms(started, args.requests)
+
+        started = time.perf_counter()
+        for spend in spends:
+            pooled_api.add_spending(spend, category, USERNAME)
+        sequential_add = _per_request_ms(started, args.requests)
+
+        report = SpendSeeder(gateway.url, token, USERNAME).seed(spends)
+        pool.close()
+
+    print(f"requests: {args.requests}")
+    print(f"GET, new client per request: {fresh_client:7.2f} ms/request")
+    print(f"GET, shared HttpPool:        {pooled:7.2f} ms/request")
+    print(f"POST, sequential:            {sequential_add:7.2f} ms/request")
+    print(
+        f"POST, SpendSeeder:           {report.elapsed / args.requests * 1000:7.2f} ms/request"
+    )
+    print(f"seeder: {report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Бенчмарк Kafka-кода тестов против фейкового брокера в памяти процесса.
+
+Брокер не добавляет сетевых задержек, поэтому цифры показывают накладные расходы
+самого `KafkaClient`: публикацию по одному сообщению с flush против пакетной
+`sending_messages` и чтение пачками через `iter_messages`.
+
+Запуск из каталога `niffler_e_2_e_tests_python`:
+    python -m benchmarks.bench_kafka_client --messages 10000
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from niffler_e_2_e_tests_python.utils.fake_kafka import FakeKafkaBroker
+from niffler_e_2_e_tests_python.utils.kafka_client import KafkaClient
+
+TOPIC = "users"
+
+
+def _per_message_us(started: float, count: int) -> float:
+    return (time.perf_counter() - started) / count * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000)
+    args = parser.parse_args()
+    envs = SimpleNamespace(
+        kafka_address_producer="fake-kafka:9092",
+        kafka_address_consumer="fake-kafka:9092",
+    )
+    broker = FakeKafkaBroker([TOPIC])
+    usernames = [f"bench-{i}" for i in range(args.messages)]
+
+    with KafkaClient(envs, connections=broker.connections()) as kafka:
+        partitions = kafka.subscribe_listen_new_offsets(TOPIC)
+
+        started = time.perf_counter()
+        for username in usernames:
+            kafka.sending_message(TOPIC, username)
+        one_by_one = _per_message_us(started, args.messages)
+
+        started = time.perf_counter()
+        stats = kafka.sending_messages(TOPIC, usernames)
+        batched = _per_message_us(started, args.messages)
+
+        kafka.consumer.assign(partitions)
+        started = time.perf_counter()
+        consumed = 0
+        for _ in kafka.iter_messages(timeout=0.5):
+            consumed += 1
+            if consumed == 2 * args.messages:
+                break
+        consume = _per_message_us(started, consumed)
+
+    print(f"messages: {args.messages}")
+    print(f"produce, sending_message:  {one_by_one:8.2f} us/message")
+    print(f"produce, sending_messages: {batched:8.2f} us/message")
+    print(f"consume, iter_messages:    {consume:8.2f} us/message ({consumed} read)")
+    print(f"delivery: {stats.to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Бенчмарк пропускной способности консюмера niffler-userdata: топик users → БД userdata.
+
+Для каждого темпа из `--rates` публикует `--messages` событий с заголовками
+`X-Correlation-Id`/`X-Sent-At` и ждёт соответствующие строки в БД. Печатает
+p50/p95/p99 задержки «публикация → строка в БД» и фактическую пропускную способность;
+созданные пользователи удаляются после каждого прогона.
+
+Нужны запущенные Kafka, niffler-userdata и переменные KAFKA_ADDRESS_PRODUCER,
+KAFKA_ADDRESS_CONSUMER, USER_DB_URL (как для тестов, из `.env`).
+
+Запуск из каталога `niffler_e_2_e_tests_python`:
+    python -m benchmarks.bench_userdata_propagation --messages 200 --rates 10,50,200
+"""
+
+import argparse
+import os
+import sys
+from types import SimpleNamespace
+
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from niffler_e_2_e_tests_python.databases.used_db import UsersDb
+from niffler_e_2_e_tests_python.utils.kafka_client import KafkaClient
+from niffler_e_2_e_tests_python.utils.propagation_tracer import (
+    DEFAULT_POLL_INTERVAL,
+    PropagationTracer,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument(
+        "--rates", default="10,50,200", help="Темпы публикации, сообщений/с"
+    )
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    load_dotenv()
+    envs = SimpleNamespace(
+        kafka_address_producer=os.getenv("KAFKA_ADDRESS_PRODUCER"),
+        kafka_address_consumer=os.getenv("KAFKA_ADDRESS_CONSUMER"),
+    )
+    users_db = UsersDb(os.getenv("USER_DB_URL"))
+
+    print(
+        f"{'rate':>8} {'stored':>9} {'throughput':>11} {'p50':>9} {'p95':>9} {'p99':>9}"
+    )
+    with KafkaClient(envs) as kafka:
+        for rate in (float(r) for r in args.rates.split(",")):
+            tracer = PropagationTracer(kafka, users_db, poll=args.poll)
+            try:
+                report = tracer.run(args.messages, rate=rate, timeout=args.timeout)
+            finally:
+                tracer.cleanup()
+            row = report.to_dict()
+            print(
+                f"{rate:>6.0f}/s {report.stored:>4}/{report.sent:<4} {row['throughput']:>9.1f}/s"
+                f" {row['store_p50_ms']:>7.1f}ms {row['store_p95_ms']:>7.1f}ms"
+                f" {row['store_p99_ms']:>7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
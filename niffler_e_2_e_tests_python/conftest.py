@@ -1,7 +1,9 @@
+import logging
 import os
 import sys
+import time
 import warnings
-from collections.abc import Generator
+from collections.abc import Callable, Generator
 from typing import Any
 from uuid import uuid4
 
@@ -12,7 +14,10 @@ from allure_commons.types import AttachmentType
 from dotenv import load_dotenv
 from grpc import insecure_channel
 from pytest import Item
+from sqlalchemy.engine import make_url
 
+from niffler_e_2_e_tests_python.databases import engines as db_engines
+from niffler_e_2_e_tests_python.databases.auth_db import AuthDb, noop_password
 from niffler_e_2_e_tests_python.databases.friendship_db import FriendshipDb
 from niffler_e_2_e_tests_python.databases.used_db import UsersDb
 from niffler_e_2_e_tests_python.grpc_tests.internal.grpc.interceptors.allure import (
@@ -25,6 +30,7 @@ from niffler_e_2_e_tests_python.grpc_tests.internal.pb.niffler_currency_pb2_pbre
     NifflerCurrencyServiceClient,
 )
 from niffler_e_2_e_tests_python.models.config import Envs
+from niffler_e_2_e_tests_python.models.user import User
 from niffler_e_2_e_tests_python.pages.login_page import LoginPage
 from niffler_e_2_e_tests_python.utils.auth_client import AuthClient
 
@@ -33,7 +39,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from faker import Faker
 
 from niffler_e_2_e_tests_python.pages.main_page import MainPage
-from niffler_e_2_e_tests_python.utils.kafka_client import KafkaClient
+from niffler_e_2_e_tests_python.utils import http_capture, http_replay
+from niffler_e_2_e_tests_python.utils.auth_state import bearer_token
+from niffler_e_2_e_tests_python.utils.fake_kafka import FakeKafkaBroker
+from niffler_e_2_e_tests_python.utils.fixture_timings import timings as fixture_timings
+from niffler_e_2_e_tests_python.utils.http_metrics import metrics as http_metrics
+from niffler_e_2_e_tests_python.utils.kafka_client import KafkaClient, KafkaConnections
+from niffler_e_2_e_tests_python.utils.kafka_tail import KafkaTail
 
 pytest_plugins = [
     "fixtures.auth_fixtures",
@@ -45,6 +57,8 @@ pytest_plugins = [
 
 fake = Faker()
 
+DB_USER_PASSWORD = "12345"
+
 
 @pytest.hookimpl(hookwrapper=True, trylast=True)
 def pytest_runtest_call(item: Item) -> Generator[None, Any]:
@@ -84,13 +98,18 @@ def pytest_fixture_setup(fixturedef: pytest.FixtureDef, request: pytest.FixtureR
     """Pytest-хук, вызываемый при инициализации любой фикстуры (fixture_setup).
     Безопасно меняет название шага Setup в Allure-отчёте на более читаемое,
     например, добавляя префикс с областью видимости и красивое имя фикстуры.
+    Заодно замеряет длительность setup для отчёта ``--fixture-timings``.
 
     :param fixturedef: Определение фикстуры (FixtureDef), содержит метаданные о фикстуре.
     :param request: Объект запроса фикстуры (FixtureRequest), содержит данные запроса.
     :yield: Управление передаётся другим хукам (hookwrapper).
     """
 
+    started = time.perf_counter()
     yield
+    fixture_timings.record(
+        fixturedef.scope, fixturedef.argname, time.perf_counter() - started
+    )
     logger = allure_logger(request.config)
     if logger is not None:
         try:
@@ -129,11 +148,16 @@ def envs() -> Envs:
         kafka_address_producer=os.getenv("KAFKA_ADDRESS_PRODUCER"),
         kafka_address_consumer=os.getenv("KAFKA_ADDRESS_CONSUMER"),
         user_db_url=os.getenv("USER_DB_URL"),
+        auth_db_url=os.getenv("AUTH_DB_URL"),
         userdata_group_id=os.getenv("USERDATA_GROUP_ID"),
         grpc_address=os.getenv("GRPC_ADDRESS"),
         grpc_mock_address=os.getenv("GRPC_MOCK_ADDRESS"),
         userdata_soap_url=os.getenv("USERDATA_SOAP_URL"),
         userdata_soap_ns=os.getenv("USERDATA_SOAP_NS"),
+        http_max_connections=os.getenv("HTTP_MAX_CONNECTIONS"),
+        http_max_keepalive=os.getenv("HTTP_MAX_KEEPALIVE"),
+        http_keepalive_expiry=os.getenv("HTTP_KEEPALIVE_EXPIRY"),
+        http2=os.getenv("HTTP2"),
     )
     allure.attach(
         env_instance.model_dump_json(indent=2),
@@ -182,9 +206,35 @@ def create_user(
 
 @pytest.fixture(scope="function")
 def login(
+    main_page: MainPage, envs, api_test_user, auth_storage_state: dict
+) -> tuple[str, str, str]:
+    """Фикстура для авторизованного UI-теста без прохождения формы логина.
+
+    Браузерный контекст создаётся с токенами, полученными через API
+    (см. `auth_storage_state`), и сразу открывается главная страница.
+    Сам сценарий логина через форму проверяется в `tests/test_login.py`.
+
+    :param main_page: Объект главной страницы.
+    :param envs: Конфигурация окружения.
+    :param api_test_user: креды нового пользователя
+    :param auth_storage_state: Storage state авторизованного пользователя.
+    :return: Кортеж (username, password, token).
+    """
+    main_page.visit(envs.base_url)
+    main_page.history_of_spending_title.should_be_visible()
+
+    token = bearer_token(auth_storage_state)
+    allure.attach(token, name="token.txt", attachment_type=AttachmentType.TEXT)
+    return api_test_user.username, api_test_user.password, token
+
+
+@pytest.fixture(scope="function")
+def ui_login(
     login_page: LoginPage, main_page: MainPage, envs, api_test_user
 ) -> tuple[str, str, str]:
-    """Фикстура для авторизации пользователя через UI.
+    """Фикстура для авторизации пользователя через форму логина в UI.
+
+    Медленнее `login`; нужна только тестам, которым важен сам UI-поток входа.
 
     :param login_page: Объект страницы логина.
     :param main_page: Объект главной страницы.
@@ -230,6 +280,52 @@ def db_client(envs) -> UsersDb:
     return UsersDb(envs.user_db_url)
 
 
+@pytest.fixture(scope="session")
+def auth_db(envs) -> AuthDb | None:
+    """Клиент БД niffler-auth или None, если `AUTH_DB_URL` не задан.
+
+    :param envs: Объект окружения со строкой подключения `auth_db_url`.
+    :return: Экземпляр `AuthDb` или None.
+    """
+    return AuthDb(envs.auth_db_url) if envs.auth_db_url else None
+
+
+@pytest.fixture(scope="function")
+def db_users(
+    db_client: UsersDb, auth_db: AuthDb | None
+) -> Generator[Callable[..., list[User]], Any]:
+    """Фабрика пользователей, создаваемых пачкой прямо в БД, минуя `/register` и Kafka.
+
+    Подходит тестам, которым нужен только факт существования пользователей в userdata
+    (например, `allUsers` и сценарии дружбы через SOAP). С `with_credentials=True`
+    пользователи создаются и в niffler-auth с паролем `DB_USER_PASSWORD` и могут
+    логиниться. После теста все созданные пользователи удаляются одной транзакцией.
+
+    :param db_client: Клиент БД пользователей.
+    :param auth_db: Клиент БД niffler-auth или None.
+    :yields: Функция `(count, with_credentials=False) -> list[User]`.
+    """
+    created: list[str] = []
+
+    def _create(count: int, with_credentials: bool = False) -> list[User]:
+        if with_credentials and auth_db is None:
+            pytest.skip("AUTH_DB_URL is not set")
+        usernames = [f"db_{fake.user_name()}_{uuid4().hex[:8]}" for _ in range(count)]
+        created.extend(usernames)
+        users = db_client.create_users(usernames)
+        if with_credentials:
+            auth_db.create_users(
+                (username, noop_password(DB_USER_PASSWORD)) for username in usernames
+            )
+        return users
+
+    yield _create
+
+    db_client.delete_users(created)
+    if auth_db is not None:
+        auth_db.delete_users(created)
+
+
 @pytest.fixture(scope="session")
 def friendship_db(envs) -> FriendshipDb:
     """Фикстура уровня сессии для доступа к таблице `friendship` в пользовательской БД.
@@ -248,24 +344,78 @@ def friendship_db(envs) -> FriendshipDb:
     return FriendshipDb(envs.user_db_url)
 
 
+@pytest.fixture(scope="session")
+def fake_kafka(request) -> FakeKafkaBroker | None:
+    """Kafka-брокер в памяти процесса (включается опцией ``--fake-kafka``).
+
+    Топики из ``--kafka-tail-topics`` создаются сразу, остальные — при первой публикации.
+    Тесты, которым нужны сервисы Niffler по ту сторону Kafka, в этом режиме не проходят:
+    он предназначен для проверки и замеров самого Kafka-кода тестов.
+
+    :param request: Объект запроса фикстуры pytest.
+    :return: FakeKafkaBroker или None, если опция не задана.
+    """
+    if not request.config.getoption("--fake-kafka"):
+        return None
+    return FakeKafkaBroker(request.config.getoption("--kafka-tail-topics").split(","))
+
+
+@pytest.fixture(scope="session")
+def kafka_connections(envs, fake_kafka) -> Generator[KafkaConnections, Any]:
+    """Общие для сессии (на каждом xdist-воркере свои) AdminClient и Producer.
+
+    Метаданные кластера запрашиваются один раз здесь, а не в каждом тесте.
+
+    :param envs: Объект окружения с адресами брокеров.
+    :param fake_kafka: Фейковый брокер или None.
+    :yield: Экземпляр KafkaConnections.
+    """
+    if fake_kafka is not None:
+        yield fake_kafka.connections()
+        return
+    connections = KafkaConnections.connect(envs)
+    yield connections
+    connections.close()
+
+
 @pytest.fixture(scope="function")
-def kafka(envs, request):
+def kafka(envs, request, kafka_connections):
     """Предоставляет Kafka-клиент для публикации и чтения сообщений.
 
-    Открывает подключения продюсера/консьюмера на каждый тест и
-    автоматически закрывает их по завершении (контекстный менеджер гарантирует
-    закрытие консюмера и flush продюсера). Используйте этот клиент для отправки
-    тестовых сообщений и подписки на топики.
+    Продюсер и админ-клиент общие на сессию (`kafka_connections`), на каждый тест
+    создаётся только консюмер со своей группой: он лишь назначает партиции и оффсеты.
+    По завершении консюмер закрывается, а продюсер досылает буфер.
 
-    :param request:
+    :param request: Объект запроса фикстуры pytest.
     :param envs: Объект окружения с адресами брокеров и прочими настройками.
+    :param kafka_connections: Общие AdminClient и Producer.
     :yield: Экземпляр KafkaClient, готовый к взаимодействию с кластером.
     """
     group_id = f"{envs.userdata_group_id}-{request.node.nodeid}-{uuid4().hex[:6]}"
-    with KafkaClient(envs, group_id=group_id) as k:
+    with KafkaClient(envs, group_id=group_id, connections=kafka_connections) as k:
         yield k
 
 
+@pytest.fixture(scope="session")
+def kafka_tail(envs, request, kafka_connections) -> Generator[KafkaTail, Any]:
+    """Фоновый консюмер Kafka на всю сессию с индексированным буфером событий.
+
+    Запускается только если его запросил хотя бы один тест. Читает топики из
+    ``--kafka-tail-topics`` с текущего конца, поэтому тесты ждут своё событие
+    через `kafka_tail.wait_for(username=...)`, а не перечитывают топик сами.
+
+    :param envs: Объект окружения с адресами брокеров.
+    :param request: Объект запроса фикстуры pytest.
+    :param kafka_connections: Общие Kafka-клиенты (задают фабрику консюмера).
+    :yield: Запущенный KafkaTail.
+    """
+    topics = request.config.getoption("--kafka-tail-topics").split(",")
+    consumer_factory = kafka_connections.consumer_factory
+    with KafkaTail(envs, topics, consumer_factory=consumer_factory) as tail:
+        yield tail
+        logging.info("Kafka tail stats: %s", tail.buffer.stats())
+
+
 INTERCEPTORS = [
     LoggingInterceptor(),
     AllureInterceptor(),
@@ -282,6 +432,138 @@ def pytest_addoption(parser: pytest.Parser) -> None:
     :param parser: Объект парсера pytest, через который регистрируются пользовательские опции.
     """
     parser.addoption("--mock", action="store_true", default=False)
+    parser.addoption(
+        "--fake-gateway",
+        action="store_true",
+        default=False,
+        help="Поднять фейковый gateway (FastAPI + SQLite) в процессе и направить в него API-клиенты.",
+    )
+    parser.addoption(
+        "--user-pool-size",
+        action="store",
+        type=int,
+        default=4,
+        help="Сколько API-пользователей зарегистрировать заранее (пул растёт по требованию).",
+    )
+    parser.addoption(
+        "--fake-kafka",
+        action="store_true",
+        default=False,
+        help="Заменить Kafka брокером в памяти процесса (для проверки Kafka-кода тестов).",
+    )
+    parser.addoption(
+        "--kafka-tail-topics",
+        action="store",
+        default="users",
+        help="Топики (через запятую), которые читает фоновый консюмер фикстуры kafka_tail.",
+    )
+    parser.addoption(
+        "--api-read-cache",
+        action="store_true",
+        default=False,
+        help="Кэшировать чтения категорий gateway в пределах теста (сбрасывается записями).",
+    )
+    parser.addoption(
+        "--http-capture",
+        action="store",
+        default=http_capture.CaptureLevel.FULL.value,
+        choices=[level.value for level in http_capture.CaptureLevel],
+        help="Детализация HTTP-вложений в Allure: full, lazy (только для упавших тестов), metadata.",
+    )
+    parser.addoption(
+        "--http-body-limit",
+        action="store",
+        type=int,
+        default=http_capture.DEFAULT_BODY_LIMIT,
+        help="Максимальный размер тела запроса/ответа во вложении, байт (0 — без ограничения).",
+    )
+    parser.addoption(
+        "--http-metrics-json",
+        action="store",
+        default=None,
+        help="Куда сохранить JSON с латентностями gateway по эндпоинтам "
+        "(по умолчанию http-metrics.json в каталоге --alluredir).",
+    )
+    parser.addoption(
+        "--fixture-timings",
+        action="store_true",
+        default=False,
+        help="Вывести в конце прогона сводку длительности setup фикстур.",
+    )
+    parser.addoption(
+        "--db-pool-budget",
+        action="store",
+        type=int,
+        default=db_engines.DEFAULT_POOL_BUDGET,
+        help="Сколько соединений к одной БД допускается на все xdist-воркеры вместе.",
+    )
+    parser.addoption(
+        "--http-record",
+        action="store",
+        default=None,
+        metavar="PATH",
+        help="Записать весь трафик к gateway в HAR-файл (под xdist — файл на воркер).",
+    )
+    parser.addoption(
+        "--http-replay",
+        action="store",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Отвечать на запросы к gateway из HAR-файла, записанного через --http-record;"
+            " стенд не нужен: токены выпускаются локально, БД не используются."
+            " Воспроизводите так же, как записывали (с xdist или без)."
+        ),
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Применяет параметры захвата HTTP-трафика и пулов соединений БД из командной строки.
+
+    :param config: Pytest-конфигурация с опциями ``--http-capture``, ``--http-body-limit``,
+        ``--http-record``, ``--http-replay`` и ``--db-pool-budget``.
+    """
+    workers = getattr(config, "workerinput", {}).get("workercount", 1)
+    db_engines.engines.configure(workers, config.getoption("--db-pool-budget"))
+    http_capture.configure(
+        level=config.getoption("--http-capture"),
+        body_limit=config.getoption("--http-body-limit"),
+    )
+    try:
+        http_replay.configure(
+            record=config.getoption("--http-record"),
+            replay=config.getoption("--http-replay"),
+        )
+    except ValueError as e:
+        raise pytest.UsageError(str(e)) from e
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    """Сохраняет записанный трафик gateway в HAR-файл (при ``--http-record``) и закрывает пулы БД.
+
+    :param config: Pytest-конфигурация.
+    """
+    http_replay.save()
+    db_engines.engines.dispose()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item: Item, call: pytest.CallInfo):
+    """Прикладывает отложенные HTTP-вложения к упавшему тесту и сбрасывает буфер после теста.
+
+    В режиме ``--http-capture=lazy`` дампы запросов рендерятся только здесь и только
+    при падении любой из фаз (setup/call/teardown); для прошедших тестов буфер отбрасывается.
+
+    :param item: Тестовый элемент Pytest.
+    :param call: Информация о выполненной фазе теста.
+    :yield: Управление передаётся другим хукам (hookwrapper).
+    """
+    outcome = yield
+    report = outcome.get_result()
+    if report.failed:
+        http_capture.flush()
+    if report.when == "teardown":
+        http_capture.discard()
 
 
 @pytest.fixture(scope="function")
@@ -303,3 +585,122 @@ def grpc_client(request: pytest.FixtureRequest, envs) -> NifflerCurrencyServiceC
         channel = insecure_channel(envs.grpc_mock_address)
     intercepted_channel = grpc.intercept_channel(channel, *INTERCEPTORS)
     return NifflerCurrencyServiceClient(intercepted_channel)
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    """Передаёт гистограммы латентности HTTP и setup фикстур с xdist-воркера на контроллер.
+
+    :param session: Текущая pytest-сессия.
+    """
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["http_metrics"] = http_metrics.to_dict()
+        workeroutput["fixture_timings"] = fixture_timings.to_dict()
+        workeroutput["db_pools"] = db_engines.engines.to_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error) -> None:
+    """Сливает на контроллере xdist гистограммы латентности, пришедшие с воркера.
+
+    :param node: Узел xdist-воркера с `workeroutput`.
+    :param error: Ошибка завершения воркера (если была).
+    """
+    workeroutput = getattr(node, "workeroutput", {})
+    if workeroutput.get("http_metrics"):
+        http_metrics.merge_dict(workeroutput["http_metrics"])
+    if workeroutput.get("fixture_timings"):
+        fixture_timings.merge_dict(workeroutput["fixture_timings"])
+    if workeroutput.get("db_pools"):
+        db_engines.engines.merge_dict(workeroutput["db_pools"])
+
+
+def _write_fixture_timings(terminalreporter) -> None:
+    rows = fixture_timings.summary()
+    if not rows:
+        return
+    terminalreporter.section("fixture setup")
+    terminalreporter.write_line(
+        f"{'fixture':<40} {'scope':>8} {'count':>6} {'total':>10} {'mean':>9} {'max':>9}"
+    )
+    for row in rows:
+        terminalreporter.write_line(
+            f"{row['fixture']:<40} {row['scope']:>8} {row['count']:>6}"
+            f" {row['total_ms']:>8.1f}ms {row['mean_ms']:>7.1f}ms {row['max_ms']:>7.1f}ms"
+        )
+
+
+def _db_label(url: str, width: int = 48) -> str:
+    """Короткая подпись БД для таблицы: `host:port/database`, у SQLite — имя файла.
+
+    Если подпись всё равно длиннее `width`, сокращается середина, а не начало.
+    """
+    parsed = make_url(url)
+    if parsed.host:
+        port = f":{parsed.port}" if parsed.port else ""
+        label = f"{parsed.host}{port}/{parsed.database or ''}"
+    else:
+        name = os.path.basename(parsed.database or "") or ":memory:"
+        label = f"{parsed.get_backend_name()}:{name}"
+    if len(label) > width:
+        head = (width - 1) // 2
+        label = f"{label[:head]}…{label[head + 1 - width:]}"
+    return label
+
+
+def _write_db_pools(terminalreporter) -> None:
+    rows = [row for row in db_engines.engines.summary() if row["checkouts"]]
+    if not rows:
+        return
+    terminalreporter.section("db pools")
+    terminalreporter.write_line(
+        f"{'database':<48} {'checkouts':>9} {'connects':>8} {'peak':>5}"
+        f" {'wait p50':>9} {'wait p99':>9}"
+    )
+    for row in rows:
+        terminalreporter.write_line(
+            f"{_db_label(row['url']):<48} {row['checkouts']:>9} {row['connects']:>8}"
+            f" {row['peak_checked_out']:>5} {row['wait_p50_ms']:>7.1f}ms"
+            f" {row['wait_p99_ms']:>7.1f}ms"
+        )
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config: pytest.Config):
+    """Печатает p50/p95/p99 латентности gateway по эндпоинтам и сохраняет JSON-артефакт.
+
+    С ``--fixture-timings`` дополнительно печатает сводку длительности setup фикстур;
+    если тесты ходили в БД — сводку по пулам соединений.
+    На xdist-воркерах ничего не делает: итог выводит контроллер после слияния данных.
+
+    :param terminalreporter: Терминальный репортёр pytest.
+    :param exitstatus: Код завершения сессии.
+    :param config: Pytest-конфигурация.
+    """
+    if hasattr(config, "workerinput"):
+        return
+    if config.getoption("--fixture-timings"):
+        _write_fixture_timings(terminalreporter)
+    _write_db_pools(terminalreporter)
+    rows = http_metrics.summary()
+    if not rows:
+        return
+
+    terminalreporter.section("gateway latency")
+    terminalreporter.write_line(
+        f"{'endpoint':<48} {'status':>6} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9}"
+    )
+    for row in rows:
+        endpoint = f"{row['method']} {row['path']}"
+        terminalreporter.write_line(
+            f"{endpoint:<48} {row['status']:>6} {row['count']:>7}"
+            f" {row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms"
+        )
+
+    json_path = config.getoption("--http-metrics-json")
+    alluredir = getattr(config.option, "allure_report_dir", None)
+    if json_path is None and alluredir:
+        json_path = os.path.join(alluredir, "http-metrics.json")
+    if json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+        http_metrics.write_json(json_path)
+        terminalreporter.write_line(f"latency histograms saved to {json_path}")
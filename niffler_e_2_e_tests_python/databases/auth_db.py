@@ -0,0 +1,123 @@
+from collections.abc import Iterable
+from uuid import uuid4
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Engine,
+    MetaData,
+    String,
+    Table,
+    delete,
+    insert,
+    select,
+)
+
+from niffler_e_2_e_tests_python.databases.engines import get_engine
+
+# Права, которые niffler-auth выдаёт каждому зарегистрированному пользователю.
+DEFAULT_AUTHORITIES = ("read", "write")
+
+# Таблицы niffler-auth описаны через SQLAlchemy Core в отдельной MetaData:
+# имя `user` уже занято SQLModel-моделью userdata.
+_metadata = MetaData()
+
+auth_user = Table(
+    "user",
+    _metadata,
+    Column("id", String, primary_key=True),
+    Column("username", String, nullable=False),
+    Column("password", String, nullable=False),
+    Column("enabled", Boolean, nullable=False),
+    Column("account_non_expired", Boolean, nullable=False),
+    Column("account_non_locked", Boolean, nullable=False),
+    Column("credentials_non_expired", Boolean, nullable=False),
+)
+
+auth_authority = Table(
+    "authority",
+    _metadata,
+    Column("id", String, primary_key=True),
+    Column("user_id", String, nullable=False),
+    Column("authority", String, nullable=False),
+)
+
+
+def noop_password(password: str) -> str:
+    """Кодирует пароль для DelegatingPasswordEncoder без хеширования (`{noop}`).
+
+    niffler-auth проверяет пароли через `PasswordEncoderFactories.createDelegatingPasswordEncoder()`,
+    который по префиксу выбирает алгоритм, поэтому такой пароль принимается формой логина.
+
+    :param password: Пароль в открытом виде.
+    :return: Строка для колонки `user.password`.
+    """
+    return "{noop}" + password
+
+
+class AuthDb:
+    """Клиент доступа к БД niffler-auth (таблицы `user` и `authority`).
+
+    Нужен для массового создания учётных записей, минуя `/register`
+    и асинхронную доставку пользователя в userdata через Kafka.
+    """
+
+    engine: Engine
+
+    def __init__(self, db_url: str):
+        """Подключается к БД через общий для процесса движок (`get_engine`) с логированием SQL в Allure.
+
+        :param db_url: Строка подключения к БД в формате SQLAlchemy.
+        """
+        self.engine = get_engine(db_url)
+
+    def create_users(
+        self,
+        credentials: Iterable[tuple[str, str]],
+        authorities: Iterable[str] = DEFAULT_AUTHORITIES,
+    ) -> None:
+        """Массово создаёт учётные записи одной транзакцией (executemany).
+
+        :param credentials: Пары (username, закодированный пароль), например из `noop_password`
+            или заранее посчитанный `{bcrypt}...`.
+        :param authorities: Права, выдаваемые каждому пользователю.
+        """
+        authorities = list(authorities)
+        users = [
+            {
+                "id": str(uuid4()),
+                "username": username,
+                "password": encoded_password,
+                "enabled": True,
+                "account_non_expired": True,
+                "account_non_locked": True,
+                "credentials_non_expired": True,
+            }
+            for username, encoded_password in credentials
+        ]
+        if not users:
+            return
+        grants = [
+            {"id": str(uuid4()), "user_id": user["id"], "authority": authority}
+            for user in users
+            for authority in authorities
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(insert(auth_user), users)
+            if grants:
+                conn.execute(insert(auth_authority), grants)
+
+    def delete_users(self, usernames: Iterable[str]) -> None:
+        """Массово удаляет учётные записи и их права одной транзакцией.
+
+        :param usernames: Имена удаляемых пользователей.
+        """
+        usernames = list(usernames)
+        if not usernames:
+            return
+        user_ids = select(auth_user.c.id).where(auth_user.c.username.in_(usernames))
+        with self.engine.begin() as conn:
+            conn.execute(
+                delete(auth_authority).where(auth_authority.c.user_id.in_(user_ids))
+            )
+            conn.execute(delete(auth_user).where(auth_user.c.username.in_(usernames)))
@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from niffler_e_2_e_tests_python.utils.allure_helpers import attach_sql
+from niffler_e_2_e_tests_python.utils.http_metrics import LatencyHistogram
+
+# Сколько соединений к одной БД допускается на весь прогон (все xdist-воркеры вместе).
+DEFAULT_POOL_BUDGET = 20
+# Больше постоянных соединений на процесс тестам не нужно: запросы в тесте идут последовательно.
+MAX_POOL_SIZE = 5
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Параметры пула соединений одного процесса.
+
+    :param pool_size: Число постоянно удерживаемых соединений.
+    :param max_overflow: Сколько соединений можно открыть сверх `pool_size` при пике.
+    :param pre_ping: Проверять соединение перед выдачей из пула.
+    """
+
+    pool_size: int
+    max_overflow: int
+    pre_ping: bool
+
+    @classmethod
+    def for_workers(
+        cls, workers: int, budget: int = DEFAULT_POOL_BUDGET
+    ) -> "PoolSettings":
+        """Делит бюджет соединений к одной БД между xdist-воркерами.
+
+        При параллельном прогоне соединения подолгу простаивают между тестами
+        воркера и могут быть закрыты сервером, поэтому включается pre-ping;
+        в одном процессе это лишний запрос на каждую выдачу.
+
+        :param workers: Число процессов, одновременно работающих с БД.
+        :param budget: Суммарный лимит соединений на все процессы.
+        :return: Экземпляр PoolSettings.
+        """
+        per_worker = max(1, budget // max(workers, 1))
+        pool_size = min(MAX_POOL_SIZE, max(1, per_worker // 2))
+        return cls(pool_size, per_worker - pool_size, workers > 1)
+
+
+class PoolMetrics:
+    """Счётчики пула соединений: выдачи, новые соединения, ожидание свободного соединения."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.wait = LatencyHistogram()
+
+    def record_wait(self, elapsed_s: float) -> None:
+        """Записывает время получения соединения из пула, в секундах."""
+        with self._lock:
+            self.wait.record(elapsed_s * 1000)
+
+    def on_connect(self, *args) -> None:
+        """Обработчик события пула `connect`."""
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *args) -> None:
+        """Обработчик события пула `checkout`."""
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, *args) -> None:
+        """Обработчик события пула `checkin`."""
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def on_invalidate(self, *args) -> None:
+        """Обработчик события пула `invalidate`."""
+        with self._lock:
+            self.invalidations += 1
+
+    def to_dict(self) -> dict:
+        """Сериализует счётчики для логов и передачи между процессами."""
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "peak_checked_out": self.peak_checked_out,
+                "wait": self.wait.to_dict(),
+            }
+
+    def merge_dict(self, data: dict) -> None:
+        """Добавляет счётчики другого процесса (пиковое число соединений складывается).
+
+        :param data: Словарь `to_dict()`.
+        """
+        with self._lock:
+            self.checkouts += data["checkouts"]
+            self.connects += data["connects"]
+            self.invalidations += data["invalidations"]
+            self.peak_checked_out += data["peak_checked_out"]
+            self.wait.merge(LatencyHistogram.from_dict(data["wait"]))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, замеряющий, сколько длилось получение соединения (ожидание + подключение)."""
+
+    metrics: PoolMetrics | None = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - started)
+
+    def recreate(self) -> "TimedQueuePool":
+        """Пересоздаёт пул (например, при `engine.dispose()`), сохраняя метрики."""
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def _is_memory_sqlite(db_url: str) -> bool:
+    url = make_url(db_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+class EngineRegistry:
+    """Один SQLAlchemy Engine на строку подключения в пределах процесса.
+
+    `UsersDb`, `FriendshipDb`, `SpendDB` и `AuthDb` берут движки отсюда, поэтому
+    клиенты одной БД делят пул соединений, а его размер рассчитывается из
+    числа xdist-воркеров (`configure`). SQL в Allure прикладывается один раз на движок.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._engines: dict[str, Engine] = {}
+        self._metrics: dict[str, PoolMetrics] = {}
+        self.settings = PoolSettings.for_workers(1)
+
+    def configure(self, workers: int = 1, budget: int = DEFAULT_POOL_BUDGET) -> None:
+        """Задаёт параметры пулов для движков, которые будут созданы после вызова.
+
+        :param workers: Число xdist-воркеров (1 — без xdist).
+        :param budget: Суммарный лимит соединений к одной БД на все воркеры.
+        """
+        self.settings = PoolSettings.for_workers(workers, budget)
+
+    def _create(self, db_url: str) -> Engine:
+        if _is_memory_sqlite(db_url):
+            engine = create_engine(db_url)
+        else:
+            engine = create_engine(
+                db_url,
+                poolclass=TimedQueuePool,
+                pool_size=self.settings.pool_size,
+                max_overflow=self.settings.max_overflow,
+                pool_pre_ping=self.settings.pre_ping,
+            )
+        key = engine.url.render_as_string(hide_password=True)
+        metrics = self._metrics.setdefault(key, PoolMetrics())
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.metrics = metrics
+        event.listen(engine, "do_execute", fn=attach_sql)
+        event.listen(engine, "connect", metrics.on_connect)
+        event.listen(engine, "checkout", metrics.on_checkout)
+        event.listen(engine, "checkin", metrics.on_checkin)
+        event.listen(engine, "invalidate", metrics.on_invalidate)
+        return engine
+
+    def get(self, db_url: str) -> Engine:
+        """Возвращает общий движок для строки подключения, создавая его при первом обращении.
+
+        :param db_url: Строка подключения SQLAlchemy.
+        :return: Engine.
+        """
+        with self._lock:
+            engine = self._engines.get(db_url)
+            if engine is None:
+                engine = self._engines[db_url] = self._create(db_url)
+            return engine
+
+    def metrics(self) -> dict[str, PoolMetrics]:
+        """Метрики пулов по строке подключения (без пароля)."""
+        with self._lock:
+            return dict(self._metrics)
+
+    def to_dict(self) -> dict:
+        """Сериализует метрики всех пулов для передачи между процессами."""
+        return {url: metrics.to_dict() for url, metrics in self.metrics().items()}
+
+    def merge_dict(self, data: dict) -> None:
+        """Сливает метрики пулов, пришедшие с xdist-воркера.
+
+        :param data: Словарь `to_dict()`.
+        """
+        with self._lock:
+            for url, raw in data.items():
+                self._metrics.setdefault(url, PoolMetrics()).merge_dict(raw)
+
+    def summary(self) -> list[dict]:
+        """Возвращает сводку по пулам: выдачи, новые соединения, пик и ожидание соединения."""
+        rows = []
+        for url, metrics in self.metrics().items():
+            data = metrics.to_dict()
+            wait = LatencyHistogram.from_dict(data["wait"])
+            rows.append(
+                {
+                    "url": url,
+                    "checkouts": data["checkouts"],
+                    "connects": data["connects"],
+                    "invalidations": data["invalidations"],
+                    "peak_checked_out": data["peak_checked_out"],
+                    "wait_p50_ms": round(wait.percentile(50), 2),
+                    "wait_p99_ms": round(wait.percentile(99), 2),
+                    "wait_max_ms": round(wait.max_ms, 2),
+                }
+            )
+        return sorted(rows, key=lambda row: row["checkouts"], reverse=True)
+
+    def dispose(self) -> None:
+        """Закрывает пулы всех движков и забывает их (метрики сохраняются)."""
+        with self._lock:
+            engines, self._engines = list(self._engines.values()), {}
+        for engine in engines:
+            engine.dispose()
+        logging.info("DB pools: %s", self.summary())
+
+
+engines = EngineRegistry()
+
+
+def get_engine(db_url: str) -> Engine:
+    """Возвращает общий для процесса движок для строки подключения (см. `EngineRegistry`).
+
+    :param db_url: Строка подключения SQLAlchemy.
+    :return: Engine.
+    """
+    return engines.get(db_url)
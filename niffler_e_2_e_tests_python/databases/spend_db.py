@@ -1,10 +1,10 @@
 from collections.abc import Sequence
 
-from sqlalchemy import Engine, create_engine, event
+from sqlalchemy import Engine
 from sqlmodel import Session, select
 
+from niffler_e_2_e_tests_python.databases.engines import get_engine
 from niffler_e_2_e_tests_python.models.category import Category
-from niffler_e_2_e_tests_python.utils.allure_helpers import attach_sql
 
 
 class SpendDB:
@@ -13,12 +13,11 @@ class SpendDB:
     engine: Engine
 
     def __init__(self, db_url: str):
-        """Создает подключение к базе данных и настраивает логирование SQL-запросов в Allure.
+        """Подключается к БД через общий для процесса движок (`get_engine`) с логированием SQL в Allure.
 
         :param db_url: URL для подключения к базе данных.
         """
-        self.engine = create_engine(db_url)
-        event.listen(self.engine, "do_execute", fn=attach_sql)
+        self.engine = get_engine(db_url)
 
     # @staticmethod
     # def _pretty_sql(statement: str) -> str:
@@ -106,12 +105,14 @@ class SpendDB:
             return session.exec(statement).all()
 
     def delete_category_by_id(self, category_id: str):
-        """Удаляет категорию по её идентификатору.
+        """Удаляет категорию по её идентификатору; если её уже нет, ничего не делает.
 
         :param category_id: Идентификатор категории.
         """
         with Session(self.engine) as session:
             category = session.get(Category, category_id)
+            if category is None:
+                return
             session.delete(category)
             session.commit()
 
@@ -138,3 +139,14 @@ class SpendDB:
             for category in categories:
                 session.delete(category)
             session.commit()
+
+    def delete_categories_by_username(self, username: str):
+        """Удаляет все категории пользователя (траты пользователя должны быть удалены заранее).
+
+        :param username: Имя пользователя.
+        """
+        with Session(self.engine) as session:
+            statement = select(Category).where(Category.username == username)
+            for category in session.exec(statement).all():
+                session.delete(category)
+            session.commit()
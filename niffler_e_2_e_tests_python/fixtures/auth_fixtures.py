@@ -1,13 +1,31 @@
+import json
+import logging
+import os
 import time
-from collections.abc import Generator
-from dataclasses import dataclass
+from collections.abc import Callable, Generator
+from dataclasses import asdict, dataclass
 from typing import Any
 
+import allure
 import pytest
 from faker import Faker
 
 from niffler_e_2_e_tests_python.models.config import Envs
-from niffler_e_2_e_tests_python.utils.auth_client import AuthClient
+from niffler_e_2_e_tests_python.utils.api_clients import SpendApiClient
+from niffler_e_2_e_tests_python.utils.async_helpers import run_async
+from niffler_e_2_e_tests_python.utils.auth_client import (
+    AuthClient,
+    register_and_login_many,
+)
+from niffler_e_2_e_tests_python.utils.base_session import BaseSession
+from niffler_e_2_e_tests_python.utils.fake_gateway import fake_token
+from niffler_e_2_e_tests_python.utils.shared_user_store import (
+    SharedUserStore,
+    StoredUser,
+)
+from niffler_e_2_e_tests_python.utils.spend_seeder import DELETE_BATCH_SIZE
+from niffler_e_2_e_tests_python.utils.token_cache import TokenCache, TokenSet
+from niffler_e_2_e_tests_python.utils.user_pool import Credentials, UserPool
 
 
 @dataclass
@@ -20,72 +38,242 @@ class TestUser:
 fake = Faker()
 
 
-@pytest.fixture(scope="function")
-def api_test_user(envs: Envs, create_test_data, db_client) -> Generator[TestUser, Any]:
-    """Создаёт нового пользователя под КАЖДЫЙ тест и удаляет его после выполнения.
-    Гарантирует уникальность username и корректную работу при параллельных запусках.
+@pytest.fixture(scope="session")
+def token_cache(envs: Envs, offline_gateway: bool) -> Generator[TokenCache, Any]:
+    """Общий на сессию кэш access-токенов по имени пользователя.
+
+    OAuth-поток выполняется один раз на пользователя и повторяется только при
+    приближении `exp` токена. С ``--fake-gateway`` и ``--http-replay`` токены
+    выпускаются локально.
+    По завершении сессии счётчики кэша пишутся в лог и в Allure.
+
+    :param envs: Конфигурация окружения.
+    :param offline_gateway: Прогон без стенда (см. фикстуру `offline_gateway`).
+    :yields: Экземпляр TokenCache.
     """
-    username = f"{create_test_data[0]}_{fake.uuid4()[:8]}"
-    password = fake.password(
-        length=12, special_chars=True, digits=True, upper_case=True
+    if offline_gateway:
+        cache = TokenCache(lambda username, _: {"access_token": fake_token(username)})
+    else:
+
+        def _login(username: str, password: str) -> dict:
+            client = AuthClient(envs)
+            client.get_token(username, password)
+            return client.token_response
+
+        cache = TokenCache(
+            _login, refresh=lambda token: AuthClient(envs).refresh(token)
+        )
+    yield cache
+    logging.info("Token cache stats: %s", cache.stats())
+    allure.attach(
+        json.dumps(cache.stats(), indent=2),
+        name="Token cache stats",
+        attachment_type=allure.attachment_type.JSON,
     )
 
-    auth = AuthClient(envs)
 
+def _register(envs: Envs, username: str, password: str) -> None:
+    """Регистрирует пользователя через `/register`, повторяя попытку до трёх раз.
+
+    :param envs: Конфигурация окружения.
+    :param username: Имя пользователя.
+    :param password: Пароль.
+    """
+    auth = AuthClient(envs)
     for _ in range(3):
         reg_resp = auth.registration(username, password, envs)
         if reg_resp.status_code in (200, 201, 302):
-            break
+            return
         time.sleep(1)
+    raise AssertionError(f"Registration failed for {username}: {reg_resp.status_code}")
+
+
+def _pooled_credentials() -> tuple[str, str]:
+    username = f"pool_{fake.user_name()}_{fake.uuid4()[:8]}"
+    password = fake.password(
+        length=12, special_chars=True, digits=True, upper_case=True
+    )
+    return username, password
+
+
+def _shared_user_store(config: pytest.Config) -> SharedUserStore | None:
+    """Возвращает общее для xdist-воркеров хранилище пользователей или None вне xdist.
+
+    :param config: Pytest-конфигурация.
+    """
+    run_id = os.getenv("PYTEST_XDIST_TESTRUNUID")
+    if not os.getenv("PYTEST_XDIST_WORKER") or not run_id:
+        return None
+    # Без плагина cacheprovider (`-p no:cacheprovider`) атрибута `cache` нет вовсе.
+    cache = getattr(config, "cache", None)
+    if cache is not None:
+        directory = cache.mkdir("niffler-users")
     else:
-        raise AssertionError(
-            f"Registration failed after retries: {reg_resp.status_code}"
-        )
+        directory = config.rootpath / ".pytest_cache" / "d" / "niffler-users"
+    return SharedUserStore(directory, run_id)
 
-    token = auth.get_token(username, password)
-    assert token, f"Token was not issued for user {username}"
 
-    user = TestUser(username=username, password=password, token=token)
+def _adopt(pool: UserPool, token_cache: TokenCache, users: list[StoredUser]) -> None:
+    for user in users:
+        if user.token:
+            token_cache.seed(user.username, TokenSet(**user.token))
+    pool.adopt(Credentials(user.username, user.password) for user in users)
 
-    yield user
 
-    db_client.delete_user_by_username_from_users_and_friendship(username)
+def _provision_users(
+    envs: Envs, token_cache: TokenCache, offline: bool, count: int
+) -> list[StoredUser]:
+    """Регистрирует и авторизует `count` пользователей одной асинхронной пачкой.
 
+    Полученные токены сразу кладутся в `token_cache`. Без стенда (`offline`)
+    регистрация не нужна, токены выпускаются кэшем при первом обращении.
+    """
+    users = [_pooled_credentials() for _ in range(count)]
+    if not offline and users:
+        responses = run_async(register_and_login_many(envs, users))
+        now = time.time()
+        for (username, _), data in zip(users, responses, strict=True):
+            token_cache.seed(username, TokenSet.from_response(data, now))
+    stored = []
+    for username, password in users:
+        tokens = token_cache.peek(username)
+        stored.append(
+            StoredUser(username, password, asdict(tokens) if tokens else None)
+        )
+    return stored
 
-@pytest.fixture(scope="function")
-def two_api_users(
-    envs, db_client, create_test_data
-) -> Generator[tuple[TestUser, TestUser], Any]:
-    """Создаёт двух независимых пользователей."""
-    auth = AuthClient(envs)
-    users = []
 
-    for _i in range(2):
-        username = f"{create_test_data[0]}_{fake.uuid4()[:8]}"
-        password = fake.password(
-            length=12, special_chars=True, digits=True, upper_case=True
+def _stock_pool(
+    pool: UserPool,
+    token_cache: TokenCache,
+    store: SharedUserStore | None,
+    size: int,
+    provision: Callable[[int], list[StoredUser]],
+) -> None:
+    """Наполняет пул: вне xdist — своими пользователями, под xdist — долей воркера
+    из общего хранилища (первый воркер создаёт пользователей на всех).
+    """
+    if store is None:
+        users = provision(size)
+    else:
+        workers = int(os.getenv("PYTEST_XDIST_WORKER_COUNT", "1"))
+        users = store.claim(
+            os.environ["PYTEST_XDIST_WORKER"], size, size * workers, provision
         )
+    _adopt(pool, token_cache, users)
+
+
+@pytest.fixture(scope="session")
+def user_pool(
+    request,
+    envs: Envs,
+    db_client,
+    spend_db,
+    offline_gateway: bool,
+    http_pool,
+    token_cache: TokenCache,
+) -> Generator[UserPool, Any]:
+    """Пул заранее зарегистрированных пользователей для API-тестов.
+
+    В начале сессии асинхронной пачкой регистрируется ``--user-pool-size`` пользователей,
+    тесты берут их в эксклюзивную аренду. Под xdist пользователей и их токены
+    один раз создаёт первый воркер на всех, а остальные забирают свою часть из
+    общего хранилища в ``.pytest_cache``. При возврате у пользователя удаляются
+    траты (через gateway), категории и дружбы, профиль сбрасывается к исходному.
+    Если пул исчерпан, регистрируется новый пользователь. По завершении сессии
+    все пользователи пула удаляются. С ``--fake-gateway`` и ``--http-replay``
+    регистрация и БД userdata не используются.
+
+    :param request: Объект запроса фикстуры pytest.
+    :param envs: Конфигурация окружения.
+    :param db_client: Клиент БД пользователей.
+    :param spend_db: Клиент БД трат.
+    :param offline_gateway: Прогон без стенда (см. фикстуру `offline_gateway`).
+    :param http_pool: Общий пул HTTP-соединений.
+    :param token_cache: Кэш access-токенов.
+    :yields: Экземпляр UserPool.
+    """
+
+    def _register_user(username: str, password: str) -> None:
+        if not offline_gateway:
+            _register(envs, username, password)
+
+    def _reset(creds: Credentials) -> None:
+        token = token_cache.get_token(creds.username, creds.password)
+        session = BaseSession(envs.api_url, pool=http_pool)
+        try:
+            spend_api = SpendApiClient(session, token)
+            ids = [spend.id for spend in spend_api.iter_spends(prefetch=False)]
+            for i in range(0, len(ids), DELETE_BATCH_SIZE):
+                spend_api.delete_spending(ids[i : i + DELETE_BATCH_SIZE])
+        finally:
+            session.close()
+        spend_db.delete_categories_by_username(creds.username)
+        if not offline_gateway:
+            db_client.reset_user_state(creds.username)
+
+    def _remove(creds: Credentials) -> None:
+        token_cache.invalidate(creds.username)
+        if not offline_gateway:
+            spend_db.delete_categories_by_username(creds.username)
+            db_client.delete_user_by_username_from_users_and_friendship(creds.username)
 
-        for _ in range(3):
-            reg_resp = auth.registration(username, password, envs)
-            if reg_resp.status_code in (200, 201, 302):
-                break
-            time.sleep(1)
-        else:
-            raise AssertionError(f"Registration failed for {username}")
+    pool = UserPool(_register_user, _pooled_credentials, reset=_reset, remove=_remove)
+    size = request.config.getoption("--user-pool-size")
+    store = _shared_user_store(request.config)
+    worker = os.getenv("PYTEST_XDIST_WORKER")
 
-        token = auth.get_token(username, password)
-        assert token, f"Token not issued for user {username}"
-        users.append(TestUser(username=username, password=password, token=token))
+    def _provision(count: int) -> list[StoredUser]:
+        return _provision_users(envs, token_cache, offline_gateway, count)
+
+    _stock_pool(pool, token_cache, store, size, _provision)
+    yield pool
+    if store is not None:
+        _adopt(pool, token_cache, store.claim_rest(worker))
+    logging.info("User pool stats: %s", pool.stats())
+    allure.attach(
+        json.dumps(pool.stats(), indent=2),
+        name="User pool stats",
+        attachment_type=allure.attachment_type.JSON,
+    )
+    pool.close()
 
-    yield tuple(users)
 
-    for u in users:
-        db_client.delete_user_by_username_from_users_and_friendship(u.username)
+@pytest.fixture(scope="function")
+def api_test_user(
+    user_pool: UserPool, token_cache: TokenCache
+) -> Generator[TestUser, Any]:
+    """Выдаёт тесту пользователя из пула в эксклюзивное пользование.
+
+    Пользователь зарегистрирован заранее, после теста его траты, категории и дружбы
+    удаляются, а сам он возвращается в пул для следующих тестов.
+    """
+    with user_pool.leased() as creds:
+        token = token_cache.get_token(creds.username, creds.password)
+        assert token, f"Token was not issued for user {creds.username}"
+        yield TestUser(username=creds.username, password=creds.password, token=token)
 
 
 @pytest.fixture(scope="function")
-def api_auth_token(api_test_user: TestUser, envs: Envs) -> str:
-    """Фикстура для получения access_token для API-тестов (через AuthClient, минуя браузер)."""
-    client = AuthClient(envs)
-    return client.get_token(api_test_user.username, api_test_user.password)
+def two_api_users(
+    user_pool: UserPool, token_cache: TokenCache
+) -> Generator[tuple[TestUser, TestUser], Any]:
+    """Выдаёт двух независимых пользователей из пула."""
+    with user_pool.leased() as first, user_pool.leased() as second:
+        yield tuple(
+            TestUser(
+                username=creds.username,
+                password=creds.password,
+                token=token_cache.get_token(creds.username, creds.password),
+            )
+            for creds in (first, second)
+        )
+
+
+@pytest.fixture(scope="function")
+def api_auth_token(api_test_user: TestUser, token_cache: TokenCache) -> str:
+    """Фикстура для получения access_token для API-тестов (через кэш токенов, минуя браузер).
+
+    Токен, полученный при создании `api_test_user`, переиспользуется, пока не близок к истечению.
+    """
+    return token_cache.get_token(api_test_user.username, api_test_user.password)
@@ -1,53 +1,168 @@
+import json
+import logging
 from collections.abc import Generator
 from typing import Any
 
+import allure
 import pytest
 
+from niffler_e_2_e_tests_python.databases.engines import get_engine
 from niffler_e_2_e_tests_python.databases.spend_db import SpendDB
+from niffler_e_2_e_tests_python.models.category import Category
+from niffler_e_2_e_tests_python.utils import http_replay
 from niffler_e_2_e_tests_python.utils.api_clients import (
     CategoriesApiClient,
     SpendApiClient,
 )
-from niffler_e_2_e_tests_python.utils.base_session import BaseSession
+from niffler_e_2_e_tests_python.utils.base_session import BaseSession, HttpPool
+from niffler_e_2_e_tests_python.utils.fake_gateway import FakeGateway
+from niffler_e_2_e_tests_python.utils.read_cache import ReadCache
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fake_gateway(request, envs, tmp_path_factory) -> Generator[FakeGateway | None, Any]:
+    """Поднимает фейковый gateway в процессе тестов (включается опцией ``--fake-gateway``).
+
+    На время сессии `envs.api_url` указывает на фейковый сервер, поэтому все
+    API-клиенты и `http_pool` ходят в него без изменений в тестах. Данные лежат
+    в SQLite-файле во временном каталоге, к нему же подключается `spend_db`.
+
+    :param request: Объект запроса фикстуры pytest.
+    :param envs: Конфигурация окружения.
+    :param tmp_path_factory: Фабрика временных каталогов pytest.
+    :yields: Запущенный FakeGateway или None, если опция не задана.
+    """
+    if not request.config.getoption("--fake-gateway"):
+        yield None
+        return
+    db_path = tmp_path_factory.mktemp("fake_gateway") / "gateway.db"
+    gateway = FakeGateway(f"sqlite:///{db_path}").start()
+    real_url, envs.api_url = envs.api_url, gateway.url
+    yield gateway
+    envs.api_url = real_url
+    gateway.stop()
+
+
+@pytest.fixture(scope="session")
+def offline_gateway(fake_gateway) -> bool:
+    """Признак прогона API-тестов без стенда: ``--fake-gateway`` или ``--http-replay``.
+
+    Тогда токены выпускаются локально (`fake_token`), а регистрация пользователей
+    и БД userdata не используются.
+
+    :param fake_gateway: Фейковый gateway или None.
+    :return: True, если стенд не нужен.
+    """
+    return (
+        fake_gateway is not None
+        or http_replay.settings.mode is http_replay.ReplayMode.REPLAY
+    )
+
+
+@pytest.fixture(scope="session")
+def http_pool(envs) -> Generator[HttpPool, Any]:
+    """Общий пул HTTP-соединений к gateway на всю сессию (на каждый xdist-воркер свой).
+
+    Лимиты keep-alive и HTTP/2 берутся из окружения (`HTTP_MAX_CONNECTIONS`,
+    `HTTP_MAX_KEEPALIVE`, `HTTP_KEEPALIVE_EXPIRY`, `HTTP2`). По завершении сессии
+    счётчики переиспользования соединений пишутся в лог.
+
+    :param envs: Конфигурация окружения.
+    :yields: Экземпляр HttpPool.
+    """
+    pool = HttpPool(
+        envs.api_url,
+        max_connections=envs.http_max_connections,
+        max_keepalive_connections=envs.http_max_keepalive,
+        keepalive_expiry=envs.http_keepalive_expiry,
+        http2=bool(envs.http2),
+    )
+    yield pool
+    logging.info("Gateway HTTP pool stats: %s", pool.stats())
+    pool.close()
 
 
 @pytest.fixture
-def spend_api(api_auth_token, envs) -> Generator[SpendApiClient, Any]:
+def api_read_cache(request) -> Generator[ReadCache | None, Any]:
+    """Общий на тест кэш чтений gateway API-клиентов (включается опцией ``--api-read-cache``).
+
+    Один экземпляр передаётся всем клиентам теста, поэтому запись через любой
+    из них сбрасывает закэшированные чтения пользователя. По завершении теста
+    счётчики попаданий/промахов прикладываются к Allure-отчёту.
+
+    :param request: Объект запроса фикстуры pytest.
+    :yields: Экземпляр ReadCache или None, если кэш выключен.
+    """
+    if not request.config.getoption("--api-read-cache"):
+        yield None
+        return
+    cache = ReadCache()
+    yield cache
+    allure.attach(
+        json.dumps(cache.stats(), indent=2),
+        name="API read cache stats",
+        attachment_type=allure.attachment_type.JSON,
+    )
+
+
+@pytest.fixture
+def spend_api(
+    api_auth_token, envs, http_pool, api_read_cache
+) -> Generator[SpendApiClient, Any]:
     """Фикстура для создания API клиента SpendApiClient с авторизацией.
 
     :param api_auth_token: токен.
     :param envs: Конфигурация окружения.
+    :param http_pool: Общий пул HTTP-соединений.
+    :param api_read_cache: Общий на тест кэш чтений (или None).
     :yields: Экземпляр SpendApiClient.
     После завершения теста сессия закрывается.
     """
     token = api_auth_token
-    session = BaseSession(envs.api_url)
-    api = SpendApiClient(session, token)
+    session = BaseSession(envs.api_url, pool=http_pool)
+    api = SpendApiClient(session, token, cache=api_read_cache)
     yield api
     session.close()
 
 
 @pytest.fixture
-def category_api(api_auth_token, envs) -> Generator[CategoriesApiClient, Any]:
+def category_api(
+    api_auth_token, envs, http_pool, api_read_cache
+) -> Generator[CategoriesApiClient, Any]:
     """Фикстура для создания API клиента CategoriesApiClient с авторизацией.
 
     :param login: Кортеж с логином и токеном.
     :param envs: Конфигурация окружения.
+    :param http_pool: Общий пул HTTP-соединений.
+    :param api_read_cache: Общий на тест кэш чтений (или None).
     :yields: Экземпляр SpendApiClient.
     После завершения теста сессия закрывается.
     """
     token = api_auth_token
-    session = BaseSession(envs.api_url)
-    api = CategoriesApiClient(session, token)
+    session = BaseSession(envs.api_url, pool=http_pool)
+    api = CategoriesApiClient(session, token, cache=api_read_cache)
     yield api
     session.close()
 
 
 @pytest.fixture(scope="session")
-def spend_db(envs) -> SpendDB:
+def spend_db(envs, fake_gateway, tmp_path_factory) -> SpendDB:
     """Фикстура для подключения к базе данных трат.
 
+    С ``--fake-gateway`` подключается к SQLite-базе фейкового gateway. С ``--http-replay``
+    БД нет, поэтому подключается к пустой временной SQLite-базе с таблицей категорий:
+    подготовка и очистка данных в тестах проходят вхолостую.
+
     :param envs: Конфигурация окружения.
+    :param fake_gateway: Фейковый gateway или None.
+    :param tmp_path_factory: Фабрика временных каталогов pytest.
     :return: Экземпляр SpendDB.
     """
+    if fake_gateway is not None:
+        return SpendDB(fake_gateway.db_url)
+    if http_replay.settings.mode is http_replay.ReplayMode.REPLAY:
+        db_path = tmp_path_factory.mktemp("http_replay") / "spend.db"
+        db_url = f"sqlite:///{db_path}"
+        Category.metadata.create_all(get_engine(db_url), tables=[Category.__table__])
+        return SpendDB(db_url)
     return SpendDB(envs.spend_db_url)
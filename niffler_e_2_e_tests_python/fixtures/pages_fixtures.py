@@ -10,14 +10,60 @@ from niffler_e_2_e_tests_python.pages.login_page import LoginPage
 from niffler_e_2_e_tests_python.pages.main_page import MainPage
 from niffler_e_2_e_tests_python.pages.new_spending_page import NewSpendingPage
 from niffler_e_2_e_tests_python.pages.profile_page import ProfilePage
+from niffler_e_2_e_tests_python.utils.auth_state import StorageStateCache
+
+
+@pytest.fixture(scope="session")
+def storage_state_cache(envs) -> StorageStateCache:
+    """Общий на сессию кэш Playwright storage state по имени пользователя.
+
+    :param envs: Конфигурация окружения.
+    :return: Экземпляр StorageStateCache.
+    """
+    return StorageStateCache(envs.frontend_url)
+
+
+@pytest.fixture(scope="function")
+def auth_storage_state(
+    api_test_user, token_cache, storage_state_cache: StorageStateCache
+) -> dict:
+    """Storage state браузера, в котором `api_test_user` уже залогинен.
+
+    Токены берутся из API-авторизации (TokenCache) и кладутся в localStorage
+    фронтенда так же, как это делает сам фронтенд после логина.
+
+    :param api_test_user: Пользователь теста.
+    :param token_cache: Кэш access-токенов.
+    :param storage_state_cache: Кэш storage state.
+    :return: Словарь для `browser.new_context(storage_state=...)`.
+    """
+    token_cache.get_token(api_test_user.username, api_test_user.password)
+    tokens = token_cache.peek(api_test_user.username)
+    return storage_state_cache.get(api_test_user.username, tokens)
+
+
+@pytest.fixture(scope="function")
+def browser_storage_state(request) -> dict | None:
+    """Storage state для нового контекста браузера.
+
+    Если тест запрашивает фикстуру `login`, контекст сразу создаётся
+    авторизованным (см. `auth_storage_state`), иначе — пустым.
+
+    :param request: Объект запроса фикстуры pytest.
+    :return: Storage state или None.
+    """
+    if "login" in request.fixturenames:
+        return request.getfixturevalue("auth_storage_state")
+    return None
 
 
 @pytest.fixture(scope="function", params=["chromium"])
-def browser_page(request) -> Generator[Any, Any]:
+def browser_page(request, browser_storage_state) -> Generator[Any, Any]:
     """Фикстура для создания страницы браузера Playwright.
     Добавлена PW_HEADLESS переменная для headless режима в CI.
 
     :param request: Параметризировано браузером ('chromium', по умолчанию).
+    :param browser_storage_state: Storage state нового контекста или None.
     :yields: Экземпляр страницы Playwright Page.
     Делает скриншот и прикладывает видео после завершения теста.
     """
@@ -40,7 +86,9 @@ def browser_page(request) -> Generator[Any, Any]:
             headless=headless, args=common_args + ([] if headless else headed_args)
         )
         context = browser.new_context(
-            viewport={"width": 1600, "height": 900}, record_video_dir="allure-results/"
+            viewport={"width": 1600, "height": 900},
+            record_video_dir="allure-results/",
+            storage_state=browser_storage_state,
         )
         page = context.new_page()
 
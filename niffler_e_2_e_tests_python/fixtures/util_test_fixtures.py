@@ -15,6 +15,7 @@ from niffler_e_2_e_tests_python.utils.api_clients import (
     SpendApiClient,
 )
 from niffler_e_2_e_tests_python.utils.base_session import BaseSession
+from niffler_e_2_e_tests_python.utils.spend_seeder import SpendSeeder
 
 TEST_CATEGORY_NAME = DataTest.TEST_CATEGORY_NAME.value
 CATEGORY_NAME = DataTest.CATEGORY_NAME.value
@@ -32,24 +33,27 @@ def add_spending(
     :return: Внутренняя функция _add_spending для добавления траты через API.
     """
 
+    # Тот же кэш чтений, что у spend_api: добавление категории его сбрасывает.
+    category_api = CategoriesApiClient(
+        spend_api.session, spend_api.token, cache=spend_api.cache
+    )
+    # Категории пользователя запрашиваются один раз на тест, а не на каждую трату.
+    categories_by_name: dict[str, CategoryDTO] | None = None
+
     def _add_spending(description, amount=100, category_name=None, currency="RUB"):
+        nonlocal categories_by_name
         username = api_test_user.username
 
         category_obj = category
         if category_name:
-            all_categories = spend_api.session.get(
-                "/api/categories/all", headers=spend_api.headers
-            ).json()
-            match = next(
-                (c for c in all_categories if c["name"] == category_name), None
-            )
-            if not match:
-                match = spend_api.session.post(
-                    "/api/categories/add",
-                    json={"name": category_name, "username": username},
-                    headers=spend_api.headers,
-                ).json()
-            category_obj = CategoryDTO(**match)
+            if categories_by_name is None:
+                categories_by_name = {
+                    c.name: c for c in category_api.get_all_categories()
+                }
+            category_obj = categories_by_name.get(category_name)
+            if category_obj is None:
+                category_obj = category_api.add_category(category_name)
+                categories_by_name[category_name] = category_obj
         spend = SpendAdd(
             id=str(uuid.uuid4()),
             spendDate=(datetime.now(UTC) - timedelta(minutes=1)),
@@ -65,41 +69,68 @@ def add_spending(
 
 
 @pytest.fixture
-def spendings_manager(api_auth_token, envs) -> Generator[Any, Any]:
+def spendings_manager(
+    api_auth_token, envs, http_pool, api_read_cache
+) -> Generator[Any, Any]:
     """Фикстура-менеджер для создания и очистки трат. После завершения теста удаляет созданные траты.
 
     :param api_auth_token: Токен.
     :param envs: Конфигурация окружения.
+    :param http_pool: Общий пул HTTP-соединений.
+    :param api_read_cache: Общий на тест кэш чтений (или None).
     :yields: Кортеж (spend_api, created_spendings).
     """
     token = api_auth_token
-    session = BaseSession(envs.api_url)
-    spend_api = SpendApiClient(session, token)
+    session = BaseSession(envs.api_url, pool=http_pool)
+    spend_api = SpendApiClient(session, token, cache=api_read_cache)
     created_spendings = []
 
     yield spend_api, created_spendings
 
-    spends = spend_api.get_all_spends()
-    ids_to_delete = [s.id for s in spends if s.description in created_spendings]
+    ids_to_delete = [
+        s.id for s in spend_api.iter_spends() if s.description in created_spendings
+    ]
     if ids_to_delete:
         spend_api.delete_spending(ids_to_delete)
     session.close()
 
 
+@pytest.fixture
+def spend_seeder(
+    api_auth_token, api_test_user, envs, spend_api
+) -> Generator[SpendSeeder, Any]:
+    """Фикстура для массового создания трат с последующей пакетной очисткой.
+
+    :param api_auth_token: Токен.
+    :param api_test_user: Пользователь-владелец трат.
+    :param envs: Конфигурация окружения.
+    :param spend_api: Синхронный клиент трат, используется для удаления.
+    :yields: Экземпляр SpendSeeder.
+    После завершения теста удаляет все созданные посевом траты.
+    """
+    seeder = SpendSeeder(envs.api_url, api_auth_token, api_test_user.username)
+    yield seeder
+    seeder.cleanup(spend_api)
+
+
 @pytest.fixture()
-def category(api_auth_token, envs, spend_db) -> Generator[CategoryDTO, Any]:
+def category(
+    api_auth_token, envs, spend_db, http_pool, api_read_cache
+) -> Generator[CategoryDTO, Any]:
     """Фикстура для получения/создания тестовой категории (по умолчанию 'TestCat').
     После завершения теста удаляет созданную категорию из БД.
 
     :param api_auth_token: Токен.
     :param envs: Конфигурация окружения.
     :param spend_db: Объект доступа к БД.
+    :param http_pool: Общий пул HTTP-соединений.
+    :param api_read_cache: Общий на тест кэш чтений (или None).
     :yields: Экземпляр CategoryDTO.
     """
 
     token = api_auth_token
-    session = BaseSession(envs.api_url)
-    api = CategoriesApiClient(session, token)
+    session = BaseSession(envs.api_url, pool=http_pool)
+    api = CategoriesApiClient(session, token, cache=api_read_cache)
     category_name = "TestCat"
     current_categories = api.get_all_categories()
     category_obj = next(
@@ -32,10 +32,20 @@ class Envs(BaseModel):
     :type grpc_address: StrictStr
     :param grpc_mock_address: адрес grpc_mock сервиса
     :type grpc_mock_address: StrictStr
+    :param auth_db_url: URL для подключения к базе данных niffler-auth (опционально).
+    :type auth_db_url: str | None = None
     :param userdata_soap_url: адрес userdata_soap
     :type userdata_soap_url: str | None = None
     :param userdata_soap_ns: адрес userdata_soap
     :type userdata_soap_ns: str | None = None
+    :param http_max_connections: максимум соединений в общем HTTP-пуле к gateway
+    :type http_max_connections: int | None = None
+    :param http_max_keepalive: максимум простаивающих keep-alive соединений пула
+    :type http_max_keepalive: int | None = None
+    :param http_keepalive_expiry: время жизни простаивающего соединения, сек
+    :type http_keepalive_expiry: float | None = None
+    :param http2: включить HTTP/2 для общего пула (нужен пакет h2)
+    :type http2: bool | None = None
     """
 
     api_url: StrictStr
@@ -52,5 +62,10 @@ class Envs(BaseModel):
     userdata_group_id: StrictStr
     grpc_address: StrictStr
     grpc_mock_address: StrictStr
+    auth_db_url: str | None = None
     userdata_soap_url: str | None = None
     userdata_soap_ns: str | None = None
+    http_max_connections: int | None = None
+    http_max_keepalive: int | None = None
+    http_keepalive_expiry: float | None = None
+    http2: bool | None = None
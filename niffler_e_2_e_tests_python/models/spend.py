@@ -79,3 +79,49 @@ class SpendAdd(BaseModel):
     currency: StrictStr
     amount: StrictFloat
     description: StrictStr
+
+
+class SpendPage(BaseModel):
+    """Одна страница трат из пагинируемых эндпоинтов gateway `/api/v2|v3/spends/all`.
+
+    Нормализует оба формата ответа: Spring `Page` (v2, поля верхнего уровня)
+    и `PagedModel` (v3, метаданные во вложенном объекте `page`).
+
+    :param content: Траты на текущей странице.
+    :type content: list[SpendDTO]
+    :param number: Номер страницы (с нуля).
+    :type number: int
+    :param size: Размер страницы.
+    :type size: int
+    :param total_elements: Общее количество трат.
+    :type total_elements: int
+    :param total_pages: Общее количество страниц.
+    :type total_pages: int
+    """
+
+    content: list[SpendDTO]
+    number: int
+    size: int
+    total_elements: int
+    total_pages: int
+
+    @property
+    def is_last(self) -> bool:
+        """Признак последней страницы (в том числе пустой)."""
+        return not self.content or self.number + 1 >= self.total_pages
+
+    @classmethod
+    def from_response(cls, data: dict) -> "SpendPage":
+        """Создаёт страницу из JSON-ответа v2 (`Page`) или v3 (`PagedModel`).
+
+        :param data: Десериализованное тело ответа gateway.
+        :return: Экземпляр SpendPage.
+        """
+        meta = data.get("page") or data
+        return cls(
+            content=data.get("content", []),
+            number=meta.get("number", 0),
+            size=meta.get("size", 0),
+            total_elements=meta.get("totalElements", 0),
+            total_pages=meta.get("totalPages", 0),
+        )
@@ -3,26 +3,40 @@ set -u
 
 TEST_FILTER=""
 USE_MOCK=0
+USE_FAKE_GATEWAY=0
 WORKERS=""
 DIST="loadscope"
+HTTP_CAPTURE=""
+HTTP_RECORD=""
+HTTP_REPLAY=""
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
     --mock) USE_MOCK=1; shift;;
+    --fake-gateway) USE_FAKE_GATEWAY=1; shift;;
     --workers)
       WORKERS="$2"; shift 2;;
     --dist)
       DIST="$2"; shift 2;;
+    --http-capture)
+      HTTP_CAPTURE="$2"; shift 2;;
+    --http-record)
+      HTTP_RECORD="$2"; shift 2;;
+    --http-replay)
+      HTTP_REPLAY="$2"; shift 2;;
     -h|--help)
       cat <<EOF
-Usage: ./run_allure.sh [TEST_FILTER] [--mock] [--workers N|auto] [--dist loadscope|loadfile|no]
+Usage: ./run_allure.sh [TEST_FILTER] [--mock] [--fake-gateway] [--workers N|auto] [--dist loadscope|loadfile|no] [--http-capture full|lazy|metadata] [--http-record FILE|--http-replay FILE]
 
 Examples:
   ./run_allure.sh
   ./run_allure.sh api
   ./run_allure.sh --mock
+  ./run_allure.sh test_api --fake-gateway
   ./run_allure.sh api --workers auto
   ./run_allure.sh --workers 4 --dist loadfile
+  ./run_allure.sh api --http-capture lazy
+  ./run_allure.sh test_api --http-record gateway.har
 EOF
       exit 0;;
     *) TEST_FILTER="$1"; shift;;
@@ -32,6 +46,10 @@ done
 PYTEST_ARGS=(--alluredir=allure-results --clean-alluredir)
 [[ -n "$TEST_FILTER" ]] && PYTEST_ARGS+=(-k "$TEST_FILTER")
 [[ $USE_MOCK -eq 1 ]] && PYTEST_ARGS+=(--mock)
+[[ $USE_FAKE_GATEWAY -eq 1 ]] && PYTEST_ARGS+=(--fake-gateway)
+[[ -n "$HTTP_CAPTURE" ]] && PYTEST_ARGS+=(--http-capture "$HTTP_CAPTURE")
+[[ -n "$HTTP_RECORD" ]] && PYTEST_ARGS+=(--http-record "$HTTP_RECORD")
+[[ -n "$HTTP_REPLAY" ]] && PYTEST_ARGS+=(--http-replay "$HTTP_REPLAY")
 
 if [[ -n "$WORKERS" ]]; then
   PYTEST_ARGS+=(-n "$WORKERS" --dist "$DIST")
@@ -11,6 +11,7 @@ from niffler_e_2_e_tests_python.utils.api_clients import (
     CategoriesApiClient,
     SpendApiClient,
 )
+from niffler_e_2_e_tests_python.utils.spend_seeder import SpendSeeder
 
 TEST_CATEGORY_NAME = DataTest.TEST_CATEGORY_NAME.value
 CATEGORY_NAME = DataTest.CATEGORY_NAME.value
@@ -119,6 +120,45 @@ def test_delete_spending_api(
     assert not any(s.id == spend_dto.id for s in db_spends)
 
 
+@allure.feature("Spending")
+@allure.story("Spending CRUD")
+@pytest.mark.api
+@pytest.mark.parametrize("api_version", ["v2", "v3"])
+def test_iter_spends_api(
+    spend_api: SpendApiClient, create_test_spend_api: str, api_version: str
+):
+    """Проверка постраничного перебора трат через пагинируемые эндпоинты gateway."""
+    spends = list(spend_api.iter_spends(page_size=1, api_version=api_version))
+    assert any(s.id == create_test_spend_api for s in spends)
+    assert len({s.id for s in spends}) == len(spends)
+
+
+@allure.feature("Spending")
+@allure.story("Spending CRUD")
+@pytest.mark.api
+def test_seed_spends_api(
+    spend_api: SpendApiClient,
+    spend_seeder: SpendSeeder,
+    create_test_category_api: CategoryDTO,
+):
+    """Проверка массового создания трат с конкурентной отправкой."""
+    spends = [
+        SpendAdd(
+            spendDate=(datetime.now(UTC) - timedelta(minutes=1)),
+            category=create_test_category_api,
+            currency="RUB",
+            amount=10 + i,
+            description=f"Seed {i}",
+        )
+        for i in range(20)
+    ]
+    report = spend_seeder.seed(spends)
+    stored_ids = {s.id for s in spend_api.iter_spends()}
+    assert not report.errors
+    assert len(report.ids) == len(spends)
+    assert set(report.ids) <= stored_ids
+
+
 @allure.feature("Spending")
 @allure.story("Spending filters")
 @pytest.mark.api
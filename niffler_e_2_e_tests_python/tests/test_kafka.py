@@ -2,11 +2,13 @@ import json
 import logging
 import time
 
+import allure
 from allure import epic, id, step, suite, tag, title
 from faker import Faker
 
 from niffler_e_2_e_tests_python.models.config import Envs
 from niffler_e_2_e_tests_python.models.user import UserName
+from niffler_e_2_e_tests_python.utils.propagation_tracer import PropagationTracer
 
 
 @epic("[KAFKA][niffler-auth]: Паблишинг сообщений в кафку")
@@ -18,24 +20,22 @@ class TestAuthRegistrationKafkaTest:
     )
     @tag("KAFKA")
     def test_message_should_be_produced_to_kafka_after_successful_registration(
-        self, auth_client, kafka, envs: Envs
+        self, auth_client, kafka_tail, envs: Envs
     ):
         username = Faker().user_name()
         password = Faker().password(special_chars=False)
 
-        topic_partitions = kafka.subscribe_listen_new_offsets("users")
-
         result = auth_client.registration(username, password, envs=envs)
         assert result.status_code == 201
 
-        event = kafka.log_msg_and_json(topic_partitions, match_username=username)
+        event = kafka_tail.wait_for(topic="users", username=username)
 
         with step("Check that message from kafka exist"):
-            assert event != "" and event != b""
+            assert event.value != "" and event.value != b""
 
         with step("Check message content"):
-            UserName.model_validate(json.loads(event.decode("utf8")))
-            assert json.loads(event.decode("utf8"))["username"] == username
+            assert isinstance(event.model, UserName)
+            assert event.model.username == username
 
     @id("600002")
     @title(
@@ -100,8 +100,13 @@ class TestAuthRegistrationKafkaTest:
                     db_client.delete_user_by_username_from_users_and_friendship(u)
 
             with step("Публикуем пачку сообщений"):
-                for u in users:
-                    kafka.sending_message("users", u)
+                before = kafka.offset_snapshot("users")
+                stats = kafka.sending_messages("users", users)
+                assert stats.acked == len(users), stats.to_dict()
+
+            with step("Проверяем, что концы партиций сдвинулись на размер пачки"):
+                after = kafka.offset_snapshot("users", fresh=True)
+                assert before.new_messages(after) >= len(users), before.diff(after)
 
             with step("Проверяем, что все пользователи появились в БД"):
                 for u in users:
@@ -111,3 +116,25 @@ class TestAuthRegistrationKafkaTest:
         finally:
             for u in users:
                 db_client.delete_user_by_username_from_users_and_friendship(u)
+
+    @id("600006")
+    @title(
+        "KAFKA/USERDATA: задержка доставки событий users до БД userdata при заданном темпе"
+    )
+    @tag("KAFKA")
+    def test_userdata_propagation_latency(self, kafka, db_client):
+        tracer = PropagationTracer(kafka, db_client)
+        try:
+            with step("Публикуем 20 событий с темпом 10 сообщений/с"):
+                report = tracer.run(20, rate=10, timeout=25)
+                allure.attach(
+                    json.dumps(report.to_dict(), indent=2),
+                    name="propagation.json",
+                    attachment_type=allure.attachment_type.JSON,
+                )
+
+            with step("Все пользователи появились в БД"):
+                assert not report.missing, report.to_dict()
+                assert report.store_latency.count == 20
+        finally:
+            tracer.cleanup()
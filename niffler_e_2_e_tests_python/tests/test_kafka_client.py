@@ -0,0 +1,117 @@
+import json
+import time
+
+import pytest
+from allure import epic, id, step, suite, tag, title
+from faker import Faker
+
+from niffler_e_2_e_tests_python.models.user import UserName
+from niffler_e_2_e_tests_python.utils.kafka_client import (
+    CONSUME_SLICE,
+    USER_JSON_TYPE,
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def offline_kafka(fake_kafka):
+    """Эти тесты проверяют сам KafkaClient и публикуют в боевые топики — только с ``--fake-kafka``."""
+    if fake_kafka is None:
+        pytest.skip("run with --fake-kafka")
+    return fake_kafka
+
+
+@epic("[KAFKA][harness]: Kafka-клиент тестов")
+@suite("[KAFKA][harness]: Kafka-клиент тестов")
+class TestKafkaClient:
+    @id("600010")
+    @title("KAFKA/HARNESS: сообщение читается с оффсетов, снятых до публикации")
+    @tag("KAFKA")
+    def test_message_is_read_from_new_offsets(self, kafka):
+        username = Faker().user_name()
+
+        with step("Снимаем концы партиций и публикуем пользователя"):
+            partitions = kafka.subscribe_listen_new_offsets("users")
+            kafka.sending_message("users", "someone-else")
+            kafka.sending_message("users", username)
+
+        with step("Читаем именно своё сообщение"):
+            event = kafka.log_msg_and_json(
+                partitions, match_username=username, timeout=5
+            )
+            assert json.loads(event)["username"] == username
+
+    @id("600013")
+    @title("KAFKA/HARNESS: сообщение разбирается в модель по заголовку __TypeId__")
+    @tag("KAFKA")
+    def test_message_is_decoded_by_type_id(self, kafka):
+        username = Faker().user_name()
+
+        partitions = kafka.subscribe_listen_new_offsets("users")
+        kafka.produce_message("users", username, {"username": username})
+        kafka.sending_message("users", username)
+
+        with step("Сообщение без __TypeId__ отсеивается до разбора тела"):
+            message = kafka.wait_for_message(
+                partitions, type_id=USER_JSON_TYPE, username=username, timeout=5
+            )
+            assert message.type_id == USER_JSON_TYPE
+            assert message.key is None
+
+        with step("Тело разобрано в UserName"):
+            assert message.model == UserName(username=username)
+
+    @id("600011")
+    @title("KAFKA/HARNESS: пакетная публикация подтверждает все сообщения")
+    @tag("KAFKA")
+    def test_produce_many_acks_every_message(self, kafka):
+        users = [Faker().user_name() for _ in range(50)]
+
+        before = kafka.offset_snapshot("users", fresh=True)
+        stats = kafka.sending_messages("users", users)
+        after = kafka.offset_snapshot("users", fresh=True)
+
+        with step("Все сообщения подтверждены и легли в партиции"):
+            assert stats.acked == len(users), stats.to_dict()
+            assert sum(stats.per_partition.values()) == len(users)
+            assert before.new_messages(after) == len(users), before.diff(after)
+
+    @id("600012")
+    @title("KAFKA/HARNESS: фоновый консюмер находит событие по username с заголовками")
+    @tag("KAFKA")
+    def test_tail_indexes_event_with_headers(self, kafka, kafka_tail):
+        username = Faker().user_name()
+
+        kafka.sending_message("users", username)
+        event = kafka_tail.wait_for(topic="users", username=username, timeout=5)
+
+        with step("Событие содержит тип сообщения в заголовке __TypeId__"):
+            assert event.headers["__TypeId__"] == USER_JSON_TYPE.encode()
+            assert event.payload["username"] == username
+
+    @id("600014")
+    @title("KAFKA/HARNESS: consume возвращает неполную пачку только по таймауту")
+    @tag("KAFKA")
+    def test_consume_waits_for_full_batch_or_timeout(self, kafka):
+        partitions = kafka.subscribe_listen_new_offsets("users")
+        kafka.sending_message("users", Faker().user_name())
+        kafka.consumer.assign(partitions)
+
+        with step("Неполная пачка из 10 отдаётся по истечении таймаута"):
+            started = time.monotonic()
+            messages = kafka.consumer.consume(num_messages=10, timeout=0.5)
+            assert 0 < len(messages) < 10
+            assert time.monotonic() - started >= 0.5
+
+    @id("600015")
+    @title("KAFKA/HARNESS: ожидание сообщения не ждёт заполнения пачки")
+    @tag("KAFKA")
+    def test_wait_for_message_returns_before_timeout(self, kafka):
+        username = Faker().user_name()
+
+        partitions = kafka.subscribe_listen_new_offsets("users")
+        kafka.sending_message("users", username)
+
+        with step("Сообщение найдено за один отрезок consume, а не за весь timeout"):
+            started = time.monotonic()
+            kafka.wait_for_message(partitions, username=username, timeout=5)
+            assert time.monotonic() - started < 2 * CONSUME_SLICE
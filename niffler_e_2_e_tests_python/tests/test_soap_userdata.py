@@ -173,3 +173,29 @@ def test_decline_friendship(
         declined = userdata_soap.decline_invitation(user_b.username, user_a.username)
         assert declined["friendshipStatus"] in ("VOID", None)
         assert friendship_db.get_between(a, b) == []
+
+
+@allure.feature("SOAP / Userdata")
+@allure.story("allUsers -> usersResponse")
+@pytest.mark.soap
+def test_all_users_finds_db_users(userdata_soap: UserdataSoapClient, db_users):
+    """Проверяет поиск пользователей через SOAP-метод `allUsers`.
+
+    Шаги:
+      1. Создаёт трёх пользователей пачкой прямо в БД userdata (без регистрации).
+      2. От имени первого ищет второго через `allUsers` с `searchQuery`.
+      3. Проверяет, что найденный пользователь присутствует в ответе.
+
+    Цель:
+      Убедиться, что `allUsers` видит пользователей из таблицы `user`
+      и фильтрует их по поисковой строке.
+    """
+    requester, target, _ = db_users(3)
+
+    with allure.step("Вызвать allUsers с поиском по имени"):
+        result = userdata_soap.all_users(
+            requester.username, search_query=target.username
+        )
+
+    with allure.step("Проверить, что пользователь найден"):
+        assert target.username in {u["username"] for u in result["users"]}
@@ -1,12 +1,16 @@
 import json
 import logging
+from functools import cache
 from json import JSONDecodeError
 
 import allure
 import curlify
 from allure_commons.types import AttachmentType
-from jinja2 import Environment, PackageLoader, select_autoescape
-from requests import Response
+from jinja2 import Environment, PackageLoader, Template, select_autoescape
+from requests import PreparedRequest, Response
+
+from niffler_e_2_e_tests_python.utils import http_capture
+from niffler_e_2_e_tests_python.utils.http_capture import CaptureLevel
 
 # Легаси метод с обычным вложением без подсветки и стилей
 
@@ -53,6 +57,81 @@ from requests import Response
 #     return wrapper
 
 
+@cache
+def _http_templates() -> tuple[Template, Template]:
+    """Возвращает скомпилированные шаблоны запроса и ответа, общие для всего процесса.
+
+    Окружение Jinja2 и оба шаблона загружаются и компилируются один раз —
+    при первом обращении, а не на каждый HTTP-запрос.
+
+    :return: Кортеж (шаблон запроса, шаблон ответа).
+    """
+    env = Environment(loader=PackageLoader("schemas"), autoescape=select_autoescape())
+    return (
+        env.get_template("http-colored-request.ftl"),
+        env.get_template("http-colored-response.ftl"),
+    )
+
+
+class _LazyCurl:
+    """Curl-представление запроса, которое строится только при первом обращении к строке.
+
+    Передаётся в шаблон и в логгер вместо готовой строки: `curlify.to_curl`
+    вызывается, лишь когда вложение действительно рендерится или сообщение
+    действительно пишется в лог.
+    """
+
+    def __init__(self, request: PreparedRequest) -> None:
+        self._request = request
+        self._value: str | None = None
+
+    def __str__(self) -> str:
+        if self._value is None:
+            self._value = curlify.to_curl(self._request)
+        return self._value
+
+    def __bool__(self) -> bool:
+        return True
+
+
+def _attach_request_response(response: Response, curl: _LazyCurl) -> None:
+    """Рендерит HTML-вложения запроса/ответа и тело ответа (JSON или текст) в Allure.
+
+    :param response: Ответ requests с привязанным запросом.
+    :param curl: Ленивое curl-представление запроса.
+    """
+    request_template, response_template = _http_templates()
+
+    allure.attach(
+        body=request_template.render({"request": response.request, "curl": curl}),
+        name="Request",
+        attachment_type=AttachmentType.HTML,
+        extension=".html",
+    )
+
+    allure.attach(
+        body=response_template.render({"response": response}),
+        name=f"Response HTML {response.status_code}",
+        attachment_type=AttachmentType.HTML,
+        extension=".html",
+    )
+
+    try:
+        allure.attach(
+            body=json.dumps(response.json(), indent=4).encode("utf8"),
+            name=f"Response JSON {response.status_code}",
+            attachment_type=AttachmentType.JSON,
+            extension=".json",
+        )
+    except (JSONDecodeError, TypeError):
+        allure.attach(
+            body=response.text.encode("utf8"),
+            name=f"Response text {response.status_code}",
+            attachment_type=AttachmentType.TEXT,
+            extension=".txt",
+        )
+
+
 def allure_attach_request(function):
     """Декоратор для автоматического логирования HTTP-запроса и ответа в Allure-отчет с поддержкой HTML-подсветки и вложений.
 
@@ -66,6 +145,11 @@ def allure_attach_request(function):
         - Текст ответа, если сериализация не удалась (отдельным вложением с типом TEXT).
     - Для генерации HTML используются шаблоны Freemarker (ftl) через Jinja2 (не забудь скопировать шаблоны в папку **schemas**).
 
+    Шаблоны компилируются один раз на процесс (`_http_templates`), а curl строится лениво.
+    Уровень детализации определяется `http_capture.settings.level`: в режиме `lazy`
+    вложения рендерятся только для упавших тестов, в режиме `metadata` прикладывается
+    одна строка с методом, URL, статусом и временем ответа.
+
     Применение:
         @allure_attach_request
         def my_api_method(...): ...
@@ -88,60 +172,23 @@ def allure_attach_request(function):
     def wrapper(*args, **kwargs):
         method, url = args[1], args[2]
 
-        env = Environment(
-            loader=PackageLoader("schemas"), autoescape=select_autoescape()
-        )
-
-        request_template = env.get_template("http-colored-request.ftl")
-        response_template = env.get_template("http-colored-response.ftl")
-
         with allure.step(f"{method} {url}"):
             response: Response = function(*args, **kwargs)
-            curl = curlify.to_curl(response.request)
-            logging.debug(curl)
-            logging.debug(response.text)
-
-            request_render = request_template.render(
-                {
-                    "request": response.request,
-                    "curl": curl,
-                }
-            )
-
-            allure.attach(
-                body=request_render,
-                name="Request",
-                attachment_type=AttachmentType.HTML,
-                extension=".html",
-            )
-
-            response_render = response_template.render(
-                {
-                    "response": response,
-                }
-            )
-
-            allure.attach(
-                body=response_render,
-                name=f"Response HTML {response.status_code}",
-                attachment_type=AttachmentType.HTML,
-                extension=".html",
-            )
-
-            try:
-                allure.attach(
-                    body=json.dumps(response.json(), indent=4).encode("utf8"),
-                    name=f"Response JSON {response.status_code}",
-                    attachment_type=AttachmentType.JSON,
-                    extension=".json",
-                )
-            except (JSONDecodeError, TypeError):
+            curl = _LazyCurl(response.request)
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug("%s", curl)
+                logging.debug("%s", response.text)
+
+            if http_capture.settings.level is CaptureLevel.METADATA:
+                elapsed_ms = response.elapsed.total_seconds() * 1000
                 allure.attach(
-                    body=response.text.encode("utf8"),
-                    name=f"Response text {response.status_code}",
+                    f"{response.request.method} {response.request.url}"
+                    f" -> {response.status_code} ({elapsed_ms:.1f} ms)",
+                    name=f"{method} {url}",
                     attachment_type=AttachmentType.TEXT,
-                    extension=".txt",
                 )
+            else:
+                http_capture.run(lambda: _attach_request_response(response, curl))
 
         return response
 
@@ -1,13 +1,42 @@
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from functools import wraps
-from typing import Any
+from typing import Any, Literal
 
 import allure
 import httpx
 
 from niffler_e_2_e_tests_python.models.category import CategoryDTO
-from niffler_e_2_e_tests_python.models.spend import SpendAdd, SpendDTO
-from niffler_e_2_e_tests_python.utils.base_session import BaseSession
+from niffler_e_2_e_tests_python.models.spend import SpendAdd, SpendDTO, SpendPage
+from niffler_e_2_e_tests_python.utils.base_session import (
+    AsyncBaseSession,
+    BaseSession,
+    attach_response,
+)
+from niffler_e_2_e_tests_python.utils.read_cache import ReadCache
+
+
+def _check_status(resp: httpx.Response) -> httpx.Response:
+    """Проверяет статус ответа в шаге Allure, прикладывая тело ошибки.
+
+    :param resp: Ответ httpx.Response.
+    :return: Тот же ответ.
+    :raises httpx.HTTPStatusError: Если статус ответа — ошибка.
+    """
+    with allure.step(f"Check status ({resp.status_code})"):
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            allure.attach(
+                resp.text,
+                name=f"HTTP error {resp.status_code} response body",
+                attachment_type=allure.attachment_type.TEXT,
+            )
+            if e.response.status_code not in (200, 201):
+                e.add_note(resp.text)
+                raise e
+    return resp
 
 
 def check_status_allure(func):
@@ -15,7 +44,17 @@ def check_status_allure(func):
 
     @wraps(func)
     def wrapper(*args, **kwargs):
-        resp = func(*args, **kwargs)
+        return _check_status(func(*args, **kwargs))
+
+    return wrapper
+
+
+def check_status_allure_async(func):
+    """Асинхронный вариант `check_status_allure` для корутин API-клиента."""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        resp = await func(*args, **kwargs)
         with allure.step(f"Check status ({resp.status_code})"):
             try:
                 resp.raise_for_status()
@@ -33,16 +72,56 @@ def check_status_allure(func):
     return wrapper
 
 
+def _spend_payload(spend: SpendAdd, category: CategoryDTO, username: str) -> dict:
+    """Собирает тело запроса `/api/spends/add` из модели траты.
+
+    :param spend: Модель новой траты.
+    :param category: Категория, к которой относится трата.
+    :param username: Имя пользователя-владельца траты.
+    :return: Словарь, готовый к сериализации в JSON.
+    """
+    payload = spend.model_dump()
+    if isinstance(payload.get("spendDate"), datetime):
+        payload["spendDate"] = payload["spendDate"].isoformat()
+    payload["category"] = category.model_dump()
+    payload["username"] = username
+    return payload
+
+
 class BaseApiClient:
-    def __init__(self, session: BaseSession, token: str) -> None:
+    def __init__(
+        self, session: BaseSession, token: str, cache: ReadCache | None = None
+    ) -> None:
         """Инициализирует API клиент с сессией и токеном авторизации.
 
         :param session: Экземпляр сессии для выполнения HTTP-запросов.
         :param token: JWT-токен для авторизации.
+        :param cache: Необязательный кэш чтений; один и тот же экземпляр можно
+                      передать нескольким клиентам, чтобы их записи сбрасывали общий кэш.
         """
         self.session = session
+        self.cache = cache
         self.set_token(token)
 
+    def _cached(self, path: str, params: dict | None, loader):
+        """Возвращает результат чтения из кэша клиента или выполняет `loader()`.
+
+        :param path: Относительный путь эндпоинта (часть ключа кэша).
+        :param params: Query-параметры запроса (часть ключа кэша).
+        :param loader: Функция без аргументов, выполняющая реальный запрос.
+        :return: Закэшированный или свежий результат.
+        """
+        if self.cache is None:
+            return loader()
+        return self.cache.get_or_load(
+            self.token, ReadCache.make_key(path, params), loader
+        )
+
+    def _invalidate_cache(self) -> None:
+        """Сбрасывает закэшированные чтения текущего пользователя после записи."""
+        if self.cache is not None:
+            self.cache.invalidate(self.token)
+
     def set_token(self, token: str) -> None:
         """Устанавливает токен авторизации для последующих запросов.
 
@@ -137,16 +216,20 @@ class CategoriesApiClient(BaseApiClient):
     def get_all_categories(self, exclude_archived: bool = False) -> list[CategoryDTO]:
         """Получает список всех категорий пользователя."""
         with allure.step("Get all categories"):
-            resp = self._get(
-                "/api/categories/all",
-                params={"excludeArchived": exclude_archived},
-                headers=self.headers,
-            )
-            return [CategoryDTO.model_validate(item) for item in resp.json()]
+            params = {"excludeArchived": exclude_archived}
+
+            def _load() -> list[CategoryDTO]:
+                resp = self._get(
+                    "/api/categories/all", params=params, headers=self.headers
+                )
+                return [CategoryDTO.model_validate(item) for item in resp.json()]
+
+            return list(self._cached("/api/categories/all", params, _load))
 
     def add_category(self, category_name: str) -> CategoryDTO:
         """Создаёт новую категорию."""
         with allure.step("Add category"):
+            self._invalidate_cache()
             payload = {"name": category_name}
             resp = self._post("/api/categories/add", json=payload, headers=self.headers)
             return CategoryDTO.model_validate(resp.json())
@@ -154,6 +237,7 @@ class CategoriesApiClient(BaseApiClient):
     def add_duplicate_category(self, category_name: str) -> httpx.Response:
         """Создаёт новую дублирующую категорию."""
         with allure.step("Add duplicate category"):
+            self._invalidate_cache()
             payload = {"name": category_name}
             resp = self._post_raw(
                 "/api/categories/add", json=payload, headers=self.headers
@@ -165,6 +249,7 @@ class CategoriesApiClient(BaseApiClient):
     ) -> CategoryDTO:
         """Обновляет существующую категорию."""
         with allure.step("Update category"):
+            self._invalidate_cache()
             payload = {"id": category_id, "name": category_name, "archived": archived}
             resp = self._patch(
                 "/api/categories/update", json=payload, headers=self.headers
@@ -172,6 +257,34 @@ class CategoriesApiClient(BaseApiClient):
             return CategoryDTO.model_validate(resp.json())
 
 
+SPENDS_PAGE_PATHS = {"v2": "/api/v2/spends/all", "v3": "/api/v3/spends/all"}
+# Контроллеры v2/v3 не задают сортировку по умолчанию, а постраничное чтение
+# неупорядоченной выборки может пропускать и дублировать траты между страницами.
+# `id` — уникальный ключ, поэтому порядок полный.
+DEFAULT_SPENDS_SORT = ("spendDate,desc", "id,asc")
+
+
+def _spends_page_params(
+    page: int,
+    page_size: int,
+    filter_currency: str | None,
+    filter_period: str | None,
+    search_query: str | None,
+    sort: str | Sequence[str] | None,
+) -> dict:
+    """Собирает query-параметры пагинируемого эндпоинта трат."""
+    params = {"page": page, "size": page_size}
+    if filter_currency:
+        params["filterCurrency"] = filter_currency
+    if filter_period:
+        params["filterPeriod"] = filter_period
+    if search_query:
+        params["searchQuery"] = search_query
+    if sort:
+        params["sort"] = [sort] if isinstance(sort, str) else list(sort)
+    return params
+
+
 class SpendApiClient(BaseApiClient):
     def get_all_spends(
         self, filter_currency: str = None, filter_period: str = None
@@ -186,6 +299,117 @@ class SpendApiClient(BaseApiClient):
             resp = self._get("/api/spends/all", params=params, headers=self.headers)
             return [SpendDTO.model_validate(item) for item in resp.json()]
 
+    def get_spends_page(
+        self,
+        page: int = 0,
+        page_size: int = 50,
+        filter_currency: str = None,
+        filter_period: str = None,
+        search_query: str = None,
+        sort: str | Sequence[str] = None,
+        api_version: Literal["v2", "v3"] = "v3",
+    ) -> SpendPage:
+        """Получает одну страницу трат из пагинируемого эндпоинта gateway.
+
+        :param page: Номер страницы (с нуля).
+        :param page_size: Размер страницы.
+        :param filter_currency: Фильтр по валюте (RUB, USD, EUR, KZT).
+        :param filter_period: Фильтр по периоду (TODAY, WEEK, MONTH).
+        :param search_query: Строка поиска по описанию/категории.
+        :param sort: Сортировка в формате Spring, например `spendDate,desc`;
+            несколько ключей — последовательностью.
+        :param api_version: Версия эндпоинта: `v2` (Page) или `v3` (PagedModel).
+        :return: Страница трат.
+        """
+        params = _spends_page_params(
+            page, page_size, filter_currency, filter_period, search_query, sort
+        )
+        resp = self._get(
+            SPENDS_PAGE_PATHS[api_version], params=params, headers=self.headers
+        )
+        return SpendPage.from_response(resp.json())
+
+    def iter_spends(
+        self,
+        page_size: int = 50,
+        filter_currency: str = None,
+        filter_period: str = None,
+        search_query: str = None,
+        sort: str | Sequence[str] = None,
+        api_version: Literal["v2", "v3"] = "v3",
+        prefetch: bool = True,
+    ) -> Iterator[SpendDTO]:
+        """Лениво перебирает все траты пользователя постранично.
+
+        В памяти одновременно находятся не более двух страниц: текущая и, при
+        `prefetch=True`, следующая, которая запрашивается в фоновом потоке, пока
+        вызывающий код обрабатывает текущую. Фоновый поток выполняет только HTTP-запрос:
+        проверка статуса и HTTP-вложение делаются в потоке теста, когда он берёт
+        страницу, поэтому они не перемешиваются с его шагами Allure. Сам перебор
+        шагом не оборачивается, чтобы шаги вызывающего кода внутри цикла не
+        вкладывались в него.
+
+        Удаление трат во время перебора сдвигает страницы — сначала соберите
+        идентификаторы, затем удаляйте одним `delete_spending`.
+
+        :param page_size: Размер страницы.
+        :param filter_currency: Фильтр по валюте (RUB, USD, EUR, KZT).
+        :param filter_period: Фильтр по периоду (TODAY, WEEK, MONTH).
+        :param search_query: Строка поиска по описанию/категории.
+        :param sort: Сортировка в формате Spring; по умолчанию `DEFAULT_SPENDS_SORT`,
+            чтобы страницы не пересекались и не теряли траты.
+        :param api_version: Версия эндпоинта: `v2` (Page) или `v3` (PagedModel).
+        :param prefetch: Запрашивать следующую страницу в фоне.
+        :return: Итератор по SpendDTO.
+        """
+
+        sort = sort or DEFAULT_SPENDS_SORT
+
+        def fetch(page: int) -> SpendPage:
+            return self.get_spends_page(
+                page,
+                page_size,
+                filter_currency=filter_currency,
+                filter_period=filter_period,
+                search_query=search_query,
+                sort=sort,
+                api_version=api_version,
+            )
+
+        if not prefetch:
+            page = fetch(0)
+            while True:
+                yield from page.content
+                if page.is_last:
+                    return
+                page = fetch(page.number + 1)
+
+        def fetch_detached(page: int) -> httpx.Response:
+            params = _spends_page_params(
+                page, page_size, filter_currency, filter_period, search_query, sort
+            )
+            return self.session.get_detached(
+                SPENDS_PAGE_PATHS[api_version], params=params, headers=self.headers
+            )
+
+        def take(future: Future[httpx.Response]) -> SpendPage:
+            resp = future.result()
+            attach_response(resp)
+            return SpendPage.from_response(_check_status(resp).json())
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = fetch(0)
+            while True:
+                next_page = (
+                    None
+                    if page.is_last
+                    else executor.submit(fetch_detached, page.number + 1)
+                )
+                yield from page.content
+                if next_page is None:
+                    return
+                page = take(next_page)
+
     def get_spending_by_id(self, spend_id: str) -> SpendDTO:
         """Получает трату по ее идентификатору."""
         with allure.step("Get spending by id"):
@@ -203,11 +427,8 @@ class SpendApiClient(BaseApiClient):
     ) -> SpendDTO:
         """Добавляет новую трату."""
         with allure.step("Add spending"):
-            payload = spend.model_dump()
-            if isinstance(payload.get("spendDate"), datetime):
-                payload["spendDate"] = payload["spendDate"].isoformat()
-            payload["category"] = category.model_dump()
-            payload["username"] = username
+            self._invalidate_cache()
+            payload = _spend_payload(spend, category, username)
             resp = self._post("/api/spends/add", json=payload, headers=self.headers)
             return SpendDTO.model_validate(resp.json())
 
@@ -216,17 +437,15 @@ class SpendApiClient(BaseApiClient):
     ) -> httpx.Response:
         """Добавляет новую невалидную трату."""
         with allure.step("Add invalid spending"):
-            payload = spend.model_dump()
-            if isinstance(payload.get("spendDate"), datetime):
-                payload["spendDate"] = payload["spendDate"].isoformat()
-            payload["category"] = category.model_dump()
-            payload["username"] = username
+            self._invalidate_cache()
+            payload = _spend_payload(spend, category, username)
             resp = self._post_raw("/api/spends/add", json=payload, headers=self.headers)
             return resp
 
     def delete_spending(self, ids: list[str]) -> httpx.Response:
         """Удаляет одну или несколько трат по их идентификаторам."""
         with allure.step("Delete spending"):
+            self._invalidate_cache()
             resp = self._delete(
                 "/api/spends/remove",
                 params={"ids": ",".join(ids)},
@@ -237,9 +456,119 @@ class SpendApiClient(BaseApiClient):
     def delete_not_exists_spending(self, ids: list[str]) -> httpx.Response:
         """Удаляет одну или несколько несуществующих трат по их идентификаторам."""
         with allure.step("Delete not exists spending"):
+            self._invalidate_cache()
             resp = self._delete_raw(
                 "/api/spends/remove",
                 params={"ids": ",".join(ids)},
                 headers=self.headers,
             )
             return resp
+
+
+class AsyncBaseApiClient:
+    def __init__(self, session: AsyncBaseSession, token: str) -> None:
+        """Инициализирует асинхронный API клиент с сессией и токеном авторизации.
+
+        В отличие от синхронного клиента, методы не открывают собственные шаги Allure:
+        при конкурентном выполнении они перемешались бы в отчёте. Группировку даёт
+        `async_helpers.gather`, HTTP-вложения остаются прежними.
+
+        :param session: Экземпляр асинхронной сессии для выполнения HTTP-запросов.
+        :param token: JWT-токен для авторизации.
+        """
+        self.session = session
+        self.set_token(token)
+
+    def set_token(self, token: str) -> None:
+        """Устанавливает токен авторизации для последующих запросов.
+
+        :param token: JWT-токен для авторизации.
+        """
+        self.token = token
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+
+    @check_status_allure_async
+    async def _get(self, *args: Any, **kwargs: Any) -> httpx.Response:
+        """Выполняет асинхронный GET-запрос с проверкой статуса."""
+        return await self.session.get(*args, **kwargs)
+
+    @check_status_allure_async
+    async def _post(self, *args: Any, **kwargs: Any) -> httpx.Response:
+        """Выполняет асинхронный POST-запрос с проверкой статуса."""
+        return await self.session.post(*args, **kwargs)
+
+    @check_status_allure_async
+    async def _patch(self, *args: Any, **kwargs: Any) -> httpx.Response:
+        """Выполняет асинхронный PATCH-запрос с проверкой статуса."""
+        return await self.session.patch(*args, **kwargs)
+
+    @check_status_allure_async
+    async def _delete(self, *args: Any, **kwargs: Any) -> httpx.Response:
+        """Выполняет асинхронный DELETE-запрос с проверкой статуса."""
+        return await self.session.delete(*args, **kwargs)
+
+
+class AsyncCategoriesApiClient(AsyncBaseApiClient):
+    async def get_all_categories(
+        self, exclude_archived: bool = False
+    ) -> list[CategoryDTO]:
+        """Получает список всех категорий пользователя."""
+        resp = await self._get(
+            "/api/categories/all",
+            params={"excludeArchived": exclude_archived},
+            headers=self.headers,
+        )
+        return [CategoryDTO.model_validate(item) for item in resp.json()]
+
+    async def add_category(self, category_name: str) -> CategoryDTO:
+        """Создаёт новую категорию."""
+        payload = {"name": category_name}
+        resp = await self._post(
+            "/api/categories/add", json=payload, headers=self.headers
+        )
+        return CategoryDTO.model_validate(resp.json())
+
+    async def update_category(
+        self, category_id: str, category_name: str, archived: bool
+    ) -> CategoryDTO:
+        """Обновляет существующую категорию."""
+        payload = {"id": category_id, "name": category_name, "archived": archived}
+        resp = await self._patch(
+            "/api/categories/update", json=payload, headers=self.headers
+        )
+        return CategoryDTO.model_validate(resp.json())
+
+
+class AsyncSpendApiClient(AsyncBaseApiClient):
+    async def get_all_spends(
+        self, filter_currency: str = None, filter_period: str = None
+    ) -> list[SpendDTO]:
+        """Получает список всех трат пользователя с возможностью фильтрации."""
+        params = {}
+        if filter_currency:
+            params["filterCurrency"] = filter_currency
+        if filter_period:
+            params["filterPeriod"] = filter_period
+        resp = await self._get("/api/spends/all", params=params, headers=self.headers)
+        return [SpendDTO.model_validate(item) for item in resp.json()]
+
+    async def get_spending_by_id(self, spend_id: str) -> SpendDTO:
+        """Получает трату по ее идентификатору."""
+        resp = await self._get(f"/api/spends/{spend_id}", headers=self.headers)
+        return SpendDTO.model_validate(resp.json())
+
+    async def add_spending(
+        self, spend: SpendAdd, category: CategoryDTO, username: str
+    ) -> SpendDTO:
+        """Добавляет новую трату."""
+        payload = _spend_payload(spend, category, username)
+        resp = await self._post("/api/spends/add", json=payload, headers=self.headers)
+        return SpendDTO.model_validate(resp.json())
+
+    async def delete_spending(self, ids: list[str]) -> httpx.Response:
+        """Удаляет одну или несколько трат по их идентификаторам."""
+        return await self._delete(
+            "/api/spends/remove",
+            params={"ids": ",".join(ids)},
+            headers=self.headers,
+        )
@@ -0,0 +1,56 @@
+import asyncio
+from collections.abc import Awaitable, Coroutine, Iterable
+from typing import Any
+
+import allure
+
+DEFAULT_CONCURRENCY = 16
+
+
+async def gather(
+    aws: Iterable[Awaitable[Any]],
+    limit: int = DEFAULT_CONCURRENCY,
+    return_exceptions: bool = False,
+) -> list[Any]:
+    """Аналог `asyncio.gather` с ограничением числа одновременно выполняемых задач.
+
+    Одновременно в полёте находится не более `limit` корутин, остальные ждут
+    освобождения семафора. Порядок результатов совпадает с порядком входных задач.
+
+    Вся пачка оформляется одним шагом Allure: отдельные шаги на каждую корутину
+    не открываются, так как при конкурентном выполнении они перемешались бы
+    в дереве отчёта. HTTP-вложения клиентов попадают внутрь этого шага.
+
+    :param aws: Итерируемый набор awaitable-объектов (обычно корутины API-клиента).
+    :param limit: Максимальное число одновременно выполняемых задач.
+    :param return_exceptions: Если True — исключения возвращаются в списке результатов,
+                              иначе первое исключение пробрасывается наружу.
+    :return: Список результатов в порядке входных задач.
+    :raises ValueError: Если `limit` меньше 1.
+    """
+    if limit < 1:
+        raise ValueError(f"limit must be >= 1, got {limit}")
+
+    aws = list(aws)
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _bounded(aw: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await aw
+
+    with allure.step(f"Gather {len(aws)} tasks (limit={limit})"):
+        return await asyncio.gather(
+            *(_bounded(aw) for aw in aws), return_exceptions=return_exceptions
+        )
+
+
+def run_async(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Запускает корутину из синхронного кода (фикстуры, тесты) и возвращает её результат.
+
+    Каждая корутина выполняется в собственном event loop, поэтому асинхронные
+    сессии нужно создавать внутри неё, а не снаружи.
+
+    :param coro: Корутина для выполнения.
+    :return: Результат корутины.
+    """
+    return asyncio.run(coro)
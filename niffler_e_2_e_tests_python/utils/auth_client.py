@@ -1,14 +1,25 @@
+import asyncio
 import base64
+import logging
+from collections.abc import Iterable
 from typing import Any
 from urllib.parse import parse_qs, urlparse
 
 import allure
+import httpx
 import pkce
 from requests import Response, Session
 
 from niffler_e_2_e_tests_python.models.config import Envs
 from niffler_e_2_e_tests_python.models.oauth import OAuthRequest
 from niffler_e_2_e_tests_python.utils.allure_helpers import allure_attach_request
+from niffler_e_2_e_tests_python.utils.async_helpers import DEFAULT_CONCURRENCY, gather
+from niffler_e_2_e_tests_python.utils.base_session import AllureAsyncHttpxClient
+
+MAX_REDIRECTS = 10
+# Как и в последовательной регистрации фикстур: 3 попытки; паузы растут с 1 секунды.
+REGISTRATION_ATTEMPTS = 3
+REGISTRATION_BACKOFF = 1.0
 
 
 class AuthSession(Session):
@@ -80,6 +91,7 @@ class AuthClient:
             "Authorization": f"Basic {self._basic_token}"
         }
         self.token: str | None = None
+        self.token_response: dict = {}
 
     def get_token(self, username, password):
         """Возвращает token oauth для авторизации пользователя с username и password
@@ -116,9 +128,29 @@ class AuthClient:
             },
         )
 
-        self.token = token_response.json().get("access_token", None)
+        self.token_response = token_response.json()
+        self.token = self.token_response.get("access_token", None)
         return self.token
 
+    def refresh(self, refresh_token: str) -> dict:
+        """Обменивает refresh-токен на новую пару токенов (grant_type=refresh_token).
+
+        :param refresh_token: Refresh-токен из предыдущего ответа `/oauth2/token`.
+        :return: Десериализованный ответ `/oauth2/token`.
+        """
+        token_response = self.session.post(
+            url=f"{self.session.base_url}/oauth2/token",
+            data={
+                "refresh_token": refresh_token,
+                "grant_type": "refresh_token",
+                "client_id": "client",
+            },
+        )
+        token_response.raise_for_status()
+        self.token_response = token_response.json()
+        self.token = self.token_response.get("access_token", None)
+        return self.token_response
+
     def registration(self, username, password, envs: Envs):
         """Регистрирует пользователя через форму `/register` с использованием сессионных куки и CSRF.
 
@@ -161,3 +193,201 @@ class AuthClient:
             allow_redirects=True,
         )
         return result
+
+
+def _code_from_location(location: str) -> str | None:
+    code = parse_qs(urlparse(location).query).get("code")
+    return code[0] if code else None
+
+
+class AsyncAuthClient:
+    """Асинхронный клиент OAuth2 + PKCE на httpx.AsyncClient с той же семантикой, что AuthClient.
+
+    Редиректы обрабатываются вручную: цепочка проходится только до ответа,
+    в `Location` которого есть `code`, — страница фронтенда по `redirect_uri`
+    не запрашивается. Куки (в т.ч. `XSRF-TOKEN`) хранит cookie jar клиента.
+    Клиент привязан к event loop, поэтому создавать его нужно внутри корутины.
+    """
+
+    def __init__(
+        self, env: Envs, transport: httpx.AsyncBaseTransport | None = None
+    ) -> None:
+        """:param env: Конфиг с параметрами окружения.
+        :param transport: Общий транспорт (пул соединений) для нескольких клиентов;
+            такой транспорт клиент не закрывает. None — собственный транспорт.
+        """
+        self.base_url = env.auth_url
+        self.redirect_uri = env.frontend_url + "/authorized"
+        self.code_verifier, self.code_challenge = pkce.generate_pkce_pair()
+        self._basic_token: str = base64.b64encode(
+            env.auth_secret.encode("utf-8")
+        ).decode("utf-8")
+        self._owns_transport = transport is None
+        # Запросы к auth не попадают в таблицу «gateway latency».
+        self.client = AllureAsyncHttpxClient(
+            base_url=self.base_url,
+            follow_redirects=False,
+            transport=transport,
+            record_metrics=False,
+        )
+        self.code: str | None = None
+        self.token: str | None = None
+        self.token_response: dict = {}
+
+    async def __aenter__(self) -> "AsyncAuthClient":
+        """Возвращает сам клиент для использования в `async with`."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Закрывает клиент при выходе из `async with`."""
+        await self.close()
+
+    async def close(self) -> None:
+        """Закрывает HTTP-клиент (кроме случая общего транспорта)."""
+        if self._owns_transport:
+            await self.client.aclose()
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Выполняет запрос и вручную проходит цепочку редиректов.
+
+        Цепочка обрывается на первом редиректе с `code` в `Location` (код сохраняется
+        в `self.code`) или ведущем на `redirect_uri`.
+
+        :param method: HTTP-метод.
+        :param url: URL запроса (абсолютный или относительно `auth_url`).
+        :param kwargs: Дополнительные параметры httpx (params, data, headers).
+        :return: Последний полученный ответ.
+        :raises httpx.TooManyRedirects: Если цепочка длиннее `MAX_REDIRECTS`.
+        """
+        response = await self.client.request(method, url, **kwargs)
+        for _ in range(MAX_REDIRECTS):
+            if not response.is_redirect:
+                return response
+            location = response.headers["Location"]
+            code = _code_from_location(location)
+            if code:
+                self.code = code
+                return response
+            if location.startswith(self.redirect_uri):
+                return response
+            await response.aclose()
+            response = await self.client.send(response.next_request)
+        raise httpx.TooManyRedirects(
+            f"Exceeded {MAX_REDIRECTS} redirects", request=response.request
+        )
+
+    async def get_token(self, username: str, password: str) -> str | None:
+        """Асинхронный аналог `AuthClient.get_token`: authorize → login → token.
+
+        :param username: Имя пользователя.
+        :param password: Пароль.
+        :return: access_token или None, если сервер его не выдал.
+        """
+        await self._request(
+            "GET",
+            "/oauth2/authorize",
+            params=OAuthRequest(
+                redirect_uri=self.redirect_uri, code_challenge=self.code_challenge
+            ).model_dump(),
+        )
+        await self._request(
+            "POST",
+            "/login",
+            data={
+                "username": username,
+                "password": password,
+                "_csrf": self.client.cookies.get("XSRF-TOKEN"),
+            },
+        )
+        token_response = await self.client.post(
+            "/oauth2/token",
+            data={
+                "code": self.code,
+                "redirect_uri": self.redirect_uri,
+                "code_verifier": self.code_verifier,
+                "grant_type": "authorization_code",
+                "client_id": "client",
+            },
+        )
+        self.token_response = token_response.json()
+        self.token = self.token_response.get("access_token", None)
+        return self.token
+
+    async def registration(
+        self, username: str, password: str, envs: Envs
+    ) -> httpx.Response:
+        """Асинхронный аналог `AuthClient.registration`.
+
+        :param username: Имя пользователя.
+        :param password: Пароль (он же `passwordSubmit`).
+        :param envs: Объект окружения с адресом сервиса авторизации.
+        :return: HTTP-ответ на POST-запрос регистрации (после редиректов).
+        """
+        await self._request(
+            "GET",
+            f"{envs.auth_url}/register",
+            params={"redirect_uri": "http://auth.niffler.dc:9000/register"},
+        )
+        return await self._request(
+            "POST",
+            f"{envs.auth_url}/register",
+            data={
+                "username": username,
+                "password": password,
+                "passwordSubmit": password,
+                "_csrf": self.client.cookies.get("XSRF-TOKEN"),
+            },
+        )
+
+
+async def register_and_login_many(
+    envs: Envs,
+    users: Iterable[tuple[str, str]],
+    limit: int = DEFAULT_CONCURRENCY,
+) -> list[dict]:
+    """Конкурентно регистрирует пользователей и получает для них токены.
+
+    Все клиенты ходят через один пул соединений, куки у каждого свои. Регистрация
+    каждого пользователя повторяется до `REGISTRATION_ATTEMPTS` раз с растущей
+    паузой, чтобы кратковременный сбой auth под нагрузкой не срывал всю пачку.
+
+    :param envs: Конфигурация окружения.
+    :param users: Пары (username, password).
+    :param limit: Максимальное число одновременно обрабатываемых пользователей.
+    :return: Ответы `/oauth2/token` в порядке входных пользователей.
+    :raises AssertionError: Если регистрация пользователя не удалась после всех попыток.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+    )
+
+    async def _register(auth: AsyncAuthClient, username: str, password: str) -> None:
+        last_error = ""
+        for attempt in range(REGISTRATION_ATTEMPTS):
+            if attempt:
+                logging.warning(
+                    "Registration of %s failed (%s), retrying", username, last_error
+                )
+                await asyncio.sleep(REGISTRATION_BACKOFF * 2 ** (attempt - 1))
+            try:
+                response = await auth.registration(username, password, envs)
+            except httpx.TransportError as e:
+                last_error = repr(e)
+                continue
+            if response.status_code in (200, 201, 302):
+                return
+            last_error = str(response.status_code)
+        raise AssertionError(
+            f"Registration failed for {username} after retries: {last_error}"
+        )
+
+    async def _one(username: str, password: str) -> dict:
+        auth = AsyncAuthClient(envs, transport=transport)
+        await _register(auth, username, password)
+        await auth.get_token(username, password)
+        return auth.token_response
+
+    try:
+        return await gather((_one(u, p) for u, p in users), limit=limit)
+    finally:
+        await transport.aclose()
@@ -0,0 +1,89 @@
+import threading
+from urllib.parse import urlsplit
+
+from niffler_e_2_e_tests_python.utils.token_cache import TokenSet
+
+# Ключи localStorage, в которые фронтенд кладёт токены после логина
+# (`persistTokens` в niffler-ng-client/src/api/authUtils.ts). Запросы к gateway
+# фронтенд подписывает значением `id_token`.
+ID_TOKEN_KEY = "id_token"
+ACCESS_TOKEN_KEY = "access_token"
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def storage_state(frontend_url: str, tokens: TokenSet) -> dict:
+    """Собирает Playwright storage state, в котором пользователь уже залогинен во фронтенде.
+
+    :param frontend_url: Базовый URL фронтенда (из него берётся origin).
+    :param tokens: Токены пользователя; без `id_token` используется access_token.
+    :return: Словарь для `browser.new_context(storage_state=...)`.
+    """
+    return {
+        "cookies": [],
+        "origins": [
+            {
+                "origin": _origin(frontend_url),
+                "localStorage": [
+                    {
+                        "name": ID_TOKEN_KEY,
+                        "value": tokens.id_token or tokens.access_token,
+                    },
+                    {"name": ACCESS_TOKEN_KEY, "value": tokens.access_token},
+                ],
+            }
+        ],
+    }
+
+
+def bearer_token(state: dict) -> str:
+    """Возвращает токен, которым фронтенд из storage state будет подписывать запросы.
+
+    :param state: Storage state из `storage_state()`.
+    :return: Значение `id_token` из localStorage.
+    """
+    for origin in state["origins"]:
+        for item in origin["localStorage"]:
+            if item["name"] == ID_TOKEN_KEY:
+                return item["value"]
+    raise KeyError(ID_TOKEN_KEY)
+
+
+class StorageStateCache:
+    """Кэш storage state по имени пользователя.
+
+    Состояние пересобирается, только когда у пользователя сменился токен
+    (например, после обновления в TokenCache).
+    """
+
+    def __init__(self, frontend_url: str) -> None:
+        """:param frontend_url: Базовый URL фронтенда."""
+        self.frontend_url = frontend_url
+        self._lock = threading.Lock()
+        self._states: dict[str, tuple[str, dict]] = {}
+
+    def get(self, username: str, tokens: TokenSet) -> dict:
+        """Возвращает storage state пользователя для текущих токенов.
+
+        :param username: Имя пользователя.
+        :param tokens: Актуальные токены пользователя.
+        :return: Словарь storage state.
+        """
+        with self._lock:
+            cached = self._states.get(username)
+            if cached is not None and cached[0] == tokens.access_token:
+                return cached[1]
+            state = storage_state(self.frontend_url, tokens)
+            self._states[username] = (tokens.access_token, state)
+            return state
+
+    def invalidate(self, username: str) -> None:
+        """Удаляет сохранённое состояние пользователя.
+
+        :param username: Имя пользователя.
+        """
+        with self._lock:
+            self._states.pop(username, None)
@@ -1,8 +1,20 @@
+import importlib.util
 import json
+import logging
+import threading
+import time
 
 import allure
 import httpx
 
+from niffler_e_2_e_tests_python.utils import http_capture, http_replay
+from niffler_e_2_e_tests_python.utils.http_capture import CaptureLevel
+from niffler_e_2_e_tests_python.utils.http_metrics import metrics
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+
 
 def _pretty_headers(headers: dict) -> str:
     """Форматирует словарь HTTP-заголовков в удобочитаемую строку для отчёта или логов.
@@ -42,9 +54,13 @@ def _pretty_body(body, content_type="application/json"):
     :param content_type: Тип содержимого, влияет на форматирование (по умолчанию "application/json").
     :return: Строка с красиво отформатированным телом.
     """
+    body, truncated = http_capture.truncate(body)
+    if truncated:
+        # Обрезанный JSON не распарсить, поэтому отдаём как есть, с маркером обрезки.
+        return body.decode("utf-8", "replace") if isinstance(body, bytes) else body
     try:
         if isinstance(body, bytes):
-            body = body.decode("utf-8")
+            body = body.decode("utf-8", "replace")
         if "application/json" in content_type:
             parsed = json.loads(body)
             return json.dumps(parsed, indent=2, ensure_ascii=False)
@@ -74,8 +90,8 @@ def _dump_httpx_response(response: httpx.Response) -> str:
 
     resp_headers = _pretty_headers(dict(response.headers))
     resp_type = response.headers.get("content-type", "")
-    resp_text = response.text
-    resp_pretty = _pretty_body(resp_text, resp_type) if resp_text else ""
+    resp_content = response.content
+    resp_pretty = _pretty_body(resp_content, resp_type) if resp_content else ""
 
     return (
         f"--- HTTP Request ---\n"
@@ -90,27 +106,229 @@ def _dump_httpx_response(response: httpx.Response) -> str:
     )
 
 
+def _dump_httpx_metadata(response: httpx.Response) -> str:
+    """Формирует однострочное описание обмена: метод, URL, статус и время ответа.
+
+    :param response: Объект httpx.Response с привязанным запросом.
+    :return: Строка вида `GET http://host/api -> 200 (12.3 ms)`.
+    """
+    req = response.request
+    try:
+        elapsed = f"{response.elapsed.total_seconds() * 1000:.1f} ms"
+    except RuntimeError:
+        # Ответ, собранный транспортом без потока (моки, replay), не имеет elapsed.
+        elapsed = "n/a"
+    return f"{req.method} {req.url} -> {response.status_code} ({elapsed})"
+
+
+def _attach_httpx_response(response: httpx.Response) -> None:
+    """Прикладывает дамп запроса и ответа к текущему шагу Allure.
+
+    Общая точка для синхронного и асинхронного клиентов, чтобы вложения
+    в отчёте выглядели одинаково независимо от транспорта. Детализация
+    определяется уровнем `http_capture.settings.level`: полный дамп, отложенный
+    дамп (рендерится только для упавших тестов) или только метаданные.
+
+    :param response: Объект httpx.Response с привязанным запросом.
+    """
+    request = response.request
+    name = f"{request.method} {request.url}"
+    if http_capture.settings.level is CaptureLevel.METADATA:
+        allure.attach(
+            _dump_httpx_metadata(response),
+            name,
+            attachment_type=allure.attachment_type.TEXT,
+        )
+        return
+    http_capture.attach(name, lambda: _dump_httpx_response(response))
+
+
 class AllureHttpxClient(httpx.Client):
-    """httpx.Client с автоматическим логированием всех запросов в Allure."""
+    """httpx.Client с автоматическим логированием всех запросов в Allure.
+
+    Длительность каждого запроса записывается в гистограммы `http_metrics.metrics`.
+    """
 
     def send(self, request, **kwargs):
+        response = self.send_detached(request, **kwargs)
+        _attach_httpx_response(response)
+        return response
+
+    def send_detached(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        """Отправляет запрос и записывает метрики, не обращаясь к Allure.
+
+        Текущий шаг Allure общий на процесс, поэтому из фоновых потоков вложения
+        попадают под чужие шаги. Ответ, полученный этим методом, прикладывается
+        позже в потоке теста через `attach_response`.
+
+        :param request: Запрос, собранный `build_request`.
+        :return: Ответ httpx.Response.
+        """
+        started = time.perf_counter()
         response = super().send(request, **kwargs)
-        allure.attach(
-            _dump_httpx_response(response),
-            f"{request.method} {request.url}",
-            attachment_type=allure.attachment_type.TEXT,
+        metrics.record(
+            request.method,
+            request.url.path,
+            response.status_code,
+            time.perf_counter() - started,
         )
         return response
 
 
+def attach_response(response: httpx.Response) -> None:
+    """Прикладывает к текущему шагу Allure ответ, полученный `send_detached`.
+
+    :param response: Объект httpx.Response с привязанным запросом.
+    """
+    _attach_httpx_response(response)
+
+
+class AllureAsyncHttpxClient(httpx.AsyncClient):
+    """httpx.AsyncClient с автоматическим логированием всех запросов в Allure.
+
+    Вложения формируются тем же `_dump_httpx_response`, что и у синхронного клиента,
+    длительности запросов попадают в те же гистограммы `http_metrics.metrics`,
+    если клиент создан с `record_metrics=True`.
+    """
+
+    def __init__(self, *args, record_metrics: bool = True, **kwargs) -> None:
+        """:param record_metrics: Записывать длительности в гистограммы gateway;
+        False — для запросов к другим сервисам (например, auth).
+        """
+        super().__init__(*args, **kwargs)
+        self.record_metrics = record_metrics
+
+    async def send(self, request, **kwargs):
+        started = time.perf_counter()
+        response = await super().send(request, **kwargs)
+        if self.record_metrics:
+            metrics.record(
+                request.method,
+                request.url.path,
+                response.status_code,
+                time.perf_counter() - started,
+            )
+        _attach_httpx_response(response)
+        return response
+
+
+class PooledTransport(httpx.HTTPTransport):
+    """HTTP-транспорт с пулом keep-alive соединений и счётчиками их переиспользования.
+
+    Новое TCP-соединение фиксируется через trace-расширение httpcore
+    (событие `connection.connect_tcp.started`), поэтому счётчики не зависят
+    от внутренних атрибутов пула.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        """:param kwargs: Параметры httpx.HTTPTransport (limits, http2, retries и т.д.)."""
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.connections_opened = 0
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """Отправляет запрос через общий пул, попутно считая новые соединения.
+
+        :param request: Подготовленный httpx.Request.
+        :return: Ответ httpx.Response.
+        """
+        outer_trace = request.extensions.get("trace")
+
+        def _trace(event_name: str, info: dict) -> None:
+            if event_name == "connection.connect_tcp.started":
+                with self._lock:
+                    self.connections_opened += 1
+            if outer_trace is not None:
+                outer_trace(event_name, info)
+
+        request.extensions["trace"] = _trace
+        with self._lock:
+            self.requests_sent += 1
+        return super().handle_request(request)
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счётчики пула: запросы, открытые и переиспользованные соединения.
+
+        :return: Словарь `{"requests", "connections_opened", "connections_reused"}`.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests_sent,
+                "connections_opened": self.connections_opened,
+                "connections_reused": self.requests_sent - self.connections_opened,
+            }
+
+
+class HttpPool:
+    """Общий пул HTTP-соединений к gateway на процесс (один на xdist-воркер).
+
+    Держит единственный `PooledTransport`. Сессии, созданные с `pool=...`, строят
+    поверх него собственные лёгкие клиенты: cookie и заголовки по умолчанию у каждой
+    сессии свои, а соединения переиспользуются между тестами.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int | None = None,
+        max_keepalive_connections: int | None = None,
+        keepalive_expiry: float | None = None,
+        http2: bool = False,
+    ) -> None:
+        """Создаёт общий транспорт с заданными лимитами.
+
+        :param base_url: Базовый URL gateway.
+        :param max_connections: Максимум одновременных соединений в пуле.
+        :param max_keepalive_connections: Максимум простаивающих keep-alive соединений.
+        :param keepalive_expiry: Время жизни простаивающего соединения, в секундах.
+        :param http2: Включить HTTP/2 (требуется пакет `h2`, иначе используется HTTP/1.1).
+        """
+        if http2 and importlib.util.find_spec("h2") is None:
+            logging.warning("HTTP/2 requested, but package 'h2' is not installed")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=max_connections or DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections=(
+                max_keepalive_connections or DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            keepalive_expiry=keepalive_expiry or DEFAULT_KEEPALIVE_EXPIRY,
+        )
+        self.base_url = base_url
+        self.transport = PooledTransport(limits=limits, http2=http2)
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счётчики переиспользования соединений пула.
+
+        :return: Словарь со счётчиками `PooledTransport.stats()`.
+        """
+        return self.transport.stats()
+
+    def close(self) -> None:
+        """Закрывает все соединения пула."""
+        self.transport.close()
+
+
 class BaseSession:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, pool: HttpPool | None = None):
         """Инициализация базовой сессии HTTP-клиента с Allure-логированием.
 
+        Если передан `pool`, клиент сессии работает поверх общего транспорта пула
+        (cookie и заголовки остаются у сессии своими), а `close()` не закрывает
+        соединения пула.
+
         :param base_url: Базовый URL для всех HTTP-запросов.
+        :param pool: Общий пул соединений (см. фикстуру `http_pool`).
         """
         self.base_url = base_url
-        self.client = AllureHttpxClient(base_url=self.base_url)
+        self._owns_transport = pool is None
+        self.client = AllureHttpxClient(
+            base_url=self.base_url,
+            transport=http_replay.wrap_transport(
+                None if pool is None else pool.transport
+            ),
+        )
 
     def get(self, url: str, **kwargs) -> httpx.Response:
         """Выполняет HTTP GET-запрос.
@@ -121,6 +339,19 @@ class BaseSession:
         """
         return self.client.get(url, **kwargs)
 
+    def get_detached(self, url: str, **kwargs) -> httpx.Response:
+        """Выполняет HTTP GET-запрос без Allure-вложений — для фоновых потоков.
+
+        Ответ прикладывается вызывающим кодом через `attach_response` в потоке теста.
+
+        :param url: Относительный URL-адрес для запроса.
+        :param kwargs: Параметры httpx.Client.build_request (например, params, headers).
+        :return: Ответ httpx.Response.
+        """
+        return self.client.send_detached(
+            self.client.build_request("GET", url, **kwargs)
+        )
+
     def post(self, url: str, **kwargs) -> httpx.Response:
         """Выполняет HTTP POST-запрос.
 
@@ -149,5 +380,74 @@ class BaseSession:
         return self.client.delete(url, **kwargs)
 
     def close(self) -> None:
-        """Закрывает HTTP-клиент и освобождает все сетевые ресурсы."""
-        self.client.close()
+        """Закрывает HTTP-клиент и освобождает все сетевые ресурсы.
+
+        Закрытие клиента закрыло бы и транспорт, поэтому сессия поверх пула
+        клиент не закрывает: соединения пула закрывает его владелец.
+        """
+        if self._owns_transport:
+            self.client.close()
+
+
+class AsyncBaseSession:
+    def __init__(self, base_url: str):
+        """Инициализация асинхронной сессии HTTP-клиента с Allure-логированием.
+
+        Клиент привязывается к event loop при первом запросе, поэтому сессию нужно
+        создавать и закрывать внутри одного `asyncio.run(...)`. Удобнее всего —
+        через `async with AsyncBaseSession(url) as session: ...`.
+
+        :param base_url: Базовый URL для всех HTTP-запросов.
+        """
+        self.base_url = base_url
+        self.client = AllureAsyncHttpxClient(
+            base_url=self.base_url, transport=http_replay.wrap_async_transport(None)
+        )
+
+    async def __aenter__(self) -> "AsyncBaseSession":
+        """Возвращает саму сессию для использования в `async with`."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Закрывает HTTP-клиент при выходе из `async with`."""
+        await self.close()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """Выполняет асинхронный HTTP GET-запрос.
+
+        :param url: Относительный URL-адрес для запроса.
+        :param kwargs: Дополнительные параметры для httpx.AsyncClient.get (например, params, headers).
+        :return: Ответ httpx.Response.
+        """
+        return await self.client.get(url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        """Выполняет асинхронный HTTP POST-запрос.
+
+        :param url: Относительный URL-адрес для запроса.
+        :param kwargs: Дополнительные параметры для httpx.AsyncClient.post (например, json, data, headers).
+        :return: Ответ httpx.Response.
+        """
+        return await self.client.post(url, **kwargs)
+
+    async def patch(self, url: str, **kwargs) -> httpx.Response:
+        """Выполняет асинхронный HTTP PATCH-запрос.
+
+        :param url: Относительный URL-адрес для запроса.
+        :param kwargs: Дополнительные параметры для httpx.AsyncClient.patch (например, json, data, headers).
+        :return: Ответ httpx.Response.
+        """
+        return await self.client.patch(url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> httpx.Response:
+        """Выполняет асинхронный HTTP DELETE-запрос.
+
+        :param url: Относительный URL-адрес для запроса.
+        :param kwargs: Дополнительные параметры для httpx.AsyncClient.delete (например, params, headers).
+        :return: Ответ httpx.Response.
+        """
+        return await self.client.delete(url, **kwargs)
+
+    async def close(self) -> None:
+        """Закрывает асинхронный HTTP-клиент и освобождает все сетевые ресурсы."""
+        await self.client.aclose()
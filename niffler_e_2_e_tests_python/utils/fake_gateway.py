@@ -0,0 +1,587 @@
+import base64
+import json
+import threading
+import time
+import uuid
+from collections.abc import Generator
+from datetime import UTC, datetime, timedelta
+from typing import Literal
+
+import uvicorn
+from fastapi import APIRouter, Depends, FastAPI, Header, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from sqlalchemy import Engine, func
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Field, Session, SQLModel, create_engine, select
+
+from niffler_e_2_e_tests_python.models.category import Category
+from niffler_e_2_e_tests_python.utils.token_cache import jwt_claims
+
+# Как в niffler-spend: больше 8 активных категорий у пользователя быть не может.
+MAX_ACTIVE_CATEGORIES = 8
+SERVICE_NAME = "niffler-fake-gateway"
+
+
+class GatewaySpend(SQLModel, table=True):
+    """SQL-модель траты фейкового gateway (в отличие от `Spend`, хранит владельца).
+
+    :param id: Уникальный идентификатор траты (primary key).
+    :type id: str
+    :param username: Имя пользователя-владельца.
+    :type username: str
+    :param spendDate: Дата и время траты.
+    :type spendDate: datetime
+    :param category_id: Идентификатор категории.
+    :type category_id: str
+    :param currency: Валюта траты.
+    :type currency: str
+    :param amount: Сумма траты.
+    :type amount: float
+    :param description: Описание траты.
+    :type description: str
+    """
+
+    __tablename__ = "fake_gateway_spend"
+
+    id: str = Field(primary_key=True)
+    username: str = Field(index=True)
+    spendDate: datetime
+    category_id: str = Field(index=True)
+    currency: str
+    amount: float
+    description: str
+
+
+class CategoryIn(BaseModel):
+    id: str | None = None
+    name: str
+    archived: bool = False
+
+
+class SpendIn(BaseModel):
+    id: str | None = None
+    spendDate: datetime
+    category: CategoryIn
+    currency: Literal["RUB", "USD", "EUR", "KZT"]
+    amount: float
+    description: str = ""
+
+
+class GatewayError(Exception):
+    """Ошибка обработки запроса; превращается в `ErrorJson` с нужным статусом."""
+
+    def __init__(self, status: int, title: str, detail: str) -> None:
+        """:param status: HTTP-статус ответа.
+        :param title: Краткое описание статуса (reason phrase).
+        :param detail: Текст ошибки.
+        """
+        super().__init__(detail)
+        self.status = status
+        self.title = title
+        self.detail = detail
+
+
+def fake_token(username: str, ttl: timedelta = timedelta(hours=1)) -> str:
+    """Выпускает неподписанный JWT (`alg=none`) для фейкового gateway.
+
+    Gateway-заглушка не проверяет подпись и берёт пользователя из claim `sub`,
+    поэтому регистрация через niffler-auth не нужна.
+
+    :param username: Имя пользователя (claim `sub`).
+    :param ttl: Время жизни токена.
+    :return: Строка JWT.
+    """
+
+    def _b64(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    now = int(time.time())
+    header = _b64({"alg": "none", "typ": "JWT"})
+    payload = _b64({"sub": username, "iat": now, "exp": now + int(ttl.total_seconds())})
+    return f"{header}.{payload}."
+
+
+def _claims(authorization: str | None) -> dict | None:
+    """Достаёт claims из заголовка `Authorization: Bearer <jwt>` без проверки подписи."""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    return jwt_claims(authorization.removeprefix("Bearer ")) or None
+
+
+def _username(authorization: str | None = Header(default=None)) -> str:
+    claims = _claims(authorization)
+    if not claims or not claims.get("sub"):
+        raise GatewayError(
+            401, "Unauthorized", "Bearer token with 'sub' claim required"
+        )
+    return claims["sub"]
+
+
+def _category_json(category: Category) -> dict:
+    return {
+        "id": category.id,
+        "name": category.name,
+        "username": category.username,
+        "archived": category.archived,
+    }
+
+
+def _spend_json(spend: GatewaySpend, category: Category) -> dict:
+    return {
+        "id": spend.id,
+        "spendDate": _to_utc(spend.spendDate).isoformat(),
+        "category": _category_json(category),
+        "currency": spend.currency,
+        "amount": spend.amount,
+        "description": spend.description,
+        "username": spend.username,
+    }
+
+
+def _period_start(filter_period: str | None) -> datetime | None:
+    now = datetime.now(UTC)
+    match filter_period:
+        case "TODAY":
+            return now.replace(hour=0, minute=0, second=0, microsecond=0)
+        case "WEEK":
+            return now - timedelta(days=7)
+        case "MONTH":
+            return now - timedelta(days=30)
+    return None
+
+
+def _to_utc(value: datetime) -> datetime:
+    """Приводит дату к UTC; наивные даты (так их возвращает SQLite) считаются UTC."""
+    return value.astimezone(UTC) if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+def _session(request: Request) -> Generator[Session]:
+    """Сессия БД приложения; запросы к одному соединению SQLite выполняются по очереди."""
+    state = request.app.state
+    with state.db_lock, Session(state.engine) as session:
+        yield session
+
+
+def _user_category(session: Session, username: str, category_id: str) -> Category:
+    category = session.get(Category, category_id)
+    if category is None or category.username != username:
+        raise GatewayError(
+            404, "Not Found", f"Can`t find category by id: '{category_id}'"
+        )
+    return category
+
+
+def _check_active_limit(session: Session, username: str) -> None:
+    active = session.exec(
+        select(func.count())
+        .select_from(Category)
+        .where(Category.username == username, Category.archived.is_(False))
+    ).one()
+    if active >= MAX_ACTIVE_CATEGORIES:
+        raise GatewayError(
+            406,
+            "Not Acceptable",
+            f"Can`t add over than {MAX_ACTIVE_CATEGORIES} categories for user: '{username}'",
+        )
+
+
+def _add_category(session: Session, username: str, name: str) -> Category:
+    if not name.strip():
+        raise GatewayError(
+            400, "Bad Request", f"Can`t add category with name: '{name}'"
+        )
+    duplicate = session.exec(
+        select(Category).where(Category.username == username, Category.name == name)
+    ).first()
+    if duplicate is not None:
+        raise GatewayError(409, "Conflict", "Cannot save duplicates")
+    _check_active_limit(session, username)
+    category = Category(id=str(uuid.uuid4()), name=name, username=username)
+    session.add(category)
+    return category
+
+
+def _spend_category(session: Session, username: str, data: CategoryIn) -> Category:
+    """Категория траты: по id, либо существующая или новая по имени (как в niffler-spend)."""
+    if data.id:
+        return _user_category(session, username, data.id)
+    existing = session.exec(
+        select(Category).where(
+            Category.username == username, Category.name == data.name
+        )
+    ).first()
+    return existing or _add_category(session, username, data.name)
+
+
+def _user_spend(session: Session, username: str, spend_id: str) -> GatewaySpend:
+    spend = session.get(GatewaySpend, spend_id)
+    if spend is None or spend.username != username:
+        raise GatewayError(
+            404, "Not Found", f"Can`t find spend by given id: {spend_id}"
+        )
+    return spend
+
+
+class SpendFilter(BaseModel):
+    """Фильтры списка трат из query-параметров gateway."""
+
+    filterCurrency: str | None = None
+    filterPeriod: str | None = None
+    searchQuery: str | None = None
+
+    def statement(self, username: str):
+        """Строит запрос трат пользователя вместе с их категориями.
+
+        :param username: Имя пользователя.
+        :return: SELECT по (GatewaySpend, Category).
+        """
+        statement = (
+            select(GatewaySpend, Category)
+            .join(Category, Category.id == GatewaySpend.category_id)
+            .where(GatewaySpend.username == username)
+        )
+        if self.filterCurrency:
+            statement = statement.where(GatewaySpend.currency == self.filterCurrency)
+        if start := _period_start(self.filterPeriod):
+            statement = statement.where(GatewaySpend.spendDate >= start)
+        if self.searchQuery:
+            pattern = f"%{self.searchQuery.lower()}%"
+            statement = statement.where(
+                func.lower(GatewaySpend.description).like(pattern)
+                | func.lower(Category.name).like(pattern)
+            )
+        return statement
+
+
+class PageRequest(SpendFilter):
+    """Параметры пагинации в стиле Spring `Pageable` плюс фильтры.
+
+    Параметр `sort`, как и в Spring, может повторяться; он принимается самим
+    обработчиком (список в query) и передаётся в `fetch`.
+    """
+
+    page: int = 0
+    size: int = 20
+
+    def fetch(
+        self, session: Session, username: str, sort: list[str]
+    ) -> tuple[list[dict], int, int]:
+        """Выбирает страницу трат.
+
+        :param session: Сессия БД.
+        :param username: Имя пользователя.
+        :param sort: Ключи сортировки вида `поле,направление` по порядку приоритета.
+        :return: Кортеж (траты страницы, всего трат, всего страниц).
+        """
+        statement = self.statement(username)
+        total = session.exec(
+            select(func.count()).select_from(statement.subquery())
+        ).one()
+        order = []
+        for key in sort:
+            field_name, _, direction = key.partition(",")
+            column = getattr(GatewaySpend, field_name, GatewaySpend.spendDate)
+            order.append(column.asc() if direction.lower() == "asc" else column.desc())
+        rows = session.exec(
+            statement.order_by(*order, GatewaySpend.id)
+            .offset(self.page * self.size)
+            .limit(self.size)
+        ).all()
+        total_pages = -(-total // self.size) if self.size else 0
+        return [_spend_json(s, c) for s, c in rows], total, total_pages
+
+
+router = APIRouter()
+
+
+@router.get("/api/session/current")
+def session_current(authorization: str | None = Header(default=None)) -> dict:
+    claims = _claims(authorization) or {}
+
+    def _date(claim: str) -> str | None:
+        value = claims.get(claim)
+        return datetime.fromtimestamp(value, UTC).isoformat() if value else None
+
+    return {
+        "username": claims.get("sub"),
+        "issuedAt": _date("iat"),
+        "expiresAt": _date("exp"),
+    }
+
+
+@router.get("/api/categories/all")
+def categories_all(
+    exclude_archived: bool = Query(default=False, alias="excludeArchived"),
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> list[dict]:
+    statement = select(Category).where(Category.username == username)
+    if exclude_archived:
+        statement = statement.where(Category.archived.is_(False))
+    return [_category_json(c) for c in session.exec(statement.order_by(Category.name))]
+
+
+@router.post("/api/categories/add")
+def categories_add(
+    category: CategoryIn,
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> dict:
+    created = _add_category(session, username, category.name)
+    session.commit()
+    return _category_json(created)
+
+
+@router.patch("/api/categories/update")
+def categories_update(
+    category: CategoryIn,
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> dict:
+    stored = _user_category(session, username, category.id or "")
+    if stored.archived and not category.archived:
+        _check_active_limit(session, username)
+    stored.name, stored.archived = category.name, category.archived
+    session.add(stored)
+    session.commit()
+    return _category_json(stored)
+
+
+@router.get("/api/spends/all")
+def spends_all(
+    spend_filter: SpendFilter = Depends(),
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> list[dict]:
+    statement = spend_filter.statement(username)
+    rows = session.exec(statement.order_by(GatewaySpend.spendDate.desc())).all()
+    return [_spend_json(s, c) for s, c in rows]
+
+
+@router.get("/api/v2/spends/all")
+def spends_page_v2(
+    page: PageRequest = Depends(),
+    sort: list[str] = Query(default=["spendDate,desc"]),
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> dict:
+    content, total, total_pages = page.fetch(session, username, sort)
+    return {
+        "content": content,
+        "number": page.page,
+        "size": page.size,
+        "totalElements": total,
+        "totalPages": total_pages,
+        "numberOfElements": len(content),
+        "first": page.page == 0,
+        "last": page.page + 1 >= total_pages,
+        "empty": not content,
+    }
+
+
+@router.get("/api/v3/spends/all")
+def spends_page_v3(
+    page: PageRequest = Depends(),
+    sort: list[str] = Query(default=["spendDate,desc"]),
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> dict:
+    content, total, total_pages = page.fetch(session, username, sort)
+    return {
+        "content": content,
+        "page": {
+            "size": page.size,
+            "number": page.page,
+            "totalElements": total,
+            "totalPages": total_pages,
+        },
+    }
+
+
+@router.get("/api/spends/{spend_id}")
+def spends_get(
+    spend_id: str,
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> dict:
+    spend = _user_spend(session, username, spend_id)
+    return _spend_json(spend, session.get(Category, spend.category_id))
+
+
+@router.post("/api/spends/add", status_code=201)
+def spends_add(
+    spend: SpendIn,
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> dict:
+    category = _spend_category(session, username, spend.category)
+    stored = GatewaySpend(
+        id=str(uuid.uuid4()),
+        username=username,
+        spendDate=_to_utc(spend.spendDate),
+        category_id=category.id,
+        currency=spend.currency,
+        amount=spend.amount,
+        description=spend.description,
+    )
+    session.add(stored)
+    session.commit()
+    return _spend_json(stored, category)
+
+
+@router.patch("/api/spends/edit")
+def spends_edit(
+    spend: SpendIn,
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> dict:
+    if not spend.id:
+        raise GatewayError(400, "Bad Request", "Id should be present")
+    stored = _user_spend(session, username, spend.id)
+    category = _spend_category(session, username, spend.category)
+    stored.spendDate = _to_utc(spend.spendDate)
+    stored.category_id = category.id
+    stored.currency = spend.currency
+    stored.amount = spend.amount
+    stored.description = spend.description
+    session.add(stored)
+    session.commit()
+    return _spend_json(stored, category)
+
+
+@router.delete("/api/spends/remove")
+def spends_remove(
+    ids: list[str] = Query(),
+    username: str = Depends(_username),
+    session: Session = Depends(_session),
+) -> Response:
+    # Spring принимает список и повторяющимися параметрами, и через запятую.
+    ids = [spend_id for value in ids for spend_id in value.split(",")]
+    for spend_id in ids:
+        try:
+            uuid.UUID(spend_id)
+        except ValueError:
+            # Настоящий сервис падает на разборе UUID с 500.
+            raise GatewayError(
+                500, "Internal Server Error", f"Invalid UUID string: {spend_id}"
+            ) from None
+    spends = session.exec(
+        select(GatewaySpend).where(
+            GatewaySpend.username == username, GatewaySpend.id.in_(ids)
+        )
+    ).all()
+    if len(spends) != len(set(ids)):
+        raise GatewayError(404, "Not Found", f"Can`t find spends by given ids: {ids}")
+    for spend in spends:
+        session.delete(spend)
+    session.commit()
+    return Response(status_code=200)
+
+
+async def _gateway_error(request: Request, exc: GatewayError) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status,
+        content={
+            "type": f"{SERVICE_NAME}: Bad request",
+            "title": exc.title,
+            "status": exc.status,
+            "detail": exc.detail,
+            "instance": request.url.path,
+        },
+    )
+
+
+async def _validation_error(request: Request, exc: RequestValidationError):
+    # Spring отвечает на невалидное тело 400, а не 422, как FastAPI по умолчанию.
+    return await _gateway_error(
+        request, GatewayError(400, "Bad Request", str(exc.errors()))
+    )
+
+
+def create_app(engine: Engine) -> FastAPI:
+    """Собирает FastAPI-приложение, реализующее часть API niffler-gateway.
+
+    Поддерживаются `/api/session/current`, `/api/categories/*`, `/api/spends/*`
+    и пагинируемые `/api/v2|v3/spends/all`. Ошибки возвращаются в формате `ErrorJson`
+    с теми же статусами, что у настоящего сервиса (400, 404, 406, 409, 500).
+
+    :param engine: Движок SQLAlchemy; таблицы `category` и `fake_gateway_spend` создаются при необходимости.
+    :return: Экземпляр FastAPI.
+    """
+    SQLModel.metadata.create_all(
+        engine, tables=[Category.__table__, GatewaySpend.__table__]
+    )
+    app = FastAPI(title=SERVICE_NAME)
+    app.state.engine = engine
+    app.state.db_lock = threading.Lock()
+    app.include_router(router)
+    app.add_exception_handler(GatewayError, _gateway_error)
+    app.add_exception_handler(RequestValidationError, _validation_error)
+    return app
+
+
+class FakeGateway:
+    """Фейковый gateway, запущенный в том же процессе на случайном порту.
+
+    Используется вместо docker-compose стенда для быстрых прогонов API-тестов
+    (опция ``--fake-gateway``) и для изолированных замеров клиентской стороны.
+    По умолчанию данные хранятся в SQLite в памяти; чтобы к ним можно было
+    подключиться из `SpendDB`, передайте файловый URL.
+    """
+
+    def __init__(self, db_url: str = "sqlite://", host: str = "127.0.0.1") -> None:
+        """:param db_url: URL SQLite-базы (`sqlite://` — в памяти).
+        :param host: Адрес, на котором слушает сервер.
+        """
+        self.db_url = db_url
+        self.engine = create_engine(
+            db_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        self.app = create_app(self.engine)
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host=host, port=0, log_level="warning")
+        )
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Базовый URL запущенного сервера."""
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, timeout: float = 10.0) -> "FakeGateway":
+        """Запускает сервер в фоновом потоке и ждёт готовности.
+
+        :param timeout: Максимальное время ожидания старта, в секундах.
+        :return: Сам экземпляр (для цепочек вызовов).
+        :raises RuntimeError: Если сервер не стартовал за отведённое время.
+        """
+        self._thread = threading.Thread(
+            target=self._server.run, name=SERVICE_NAME, daemon=True
+        )
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake gateway did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        """Останавливает сервер и освобождает соединение с базой."""
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.engine.dispose()
+
+    def __enter__(self) -> "FakeGateway":
+        """Запускает сервер при входе в `with`."""
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Останавливает сервер при выходе из `with`."""
+        self.stop()
@@ -0,0 +1,494 @@
+import itertools
+import threading
+import time
+import zlib
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from typing import Any
+
+from confluent_kafka import (
+    OFFSET_BEGINNING,
+    OFFSET_END,
+    TIMESTAMP_CREATE_TIME,
+    KafkaError,
+    KafkaException,
+    TopicPartition,
+)
+from confluent_kafka.admin import (
+    BrokerMetadata,
+    ClusterMetadata,
+    ListOffsetsResultInfo,
+    PartitionMetadata,
+    TopicMetadata,
+)
+
+from niffler_e_2_e_tests_python.utils.kafka_client import KafkaConnections
+
+DEFAULT_PARTITIONS = 3
+FAKE_BROKER_ID = 0
+FAKE_BROKER_HOST = "fake-kafka"
+FAKE_BROKER_PORT = 9092
+
+
+def _to_bytes(value: str | bytes | None) -> bytes | None:
+    return value.encode("utf-8") if isinstance(value, str) else value
+
+
+def _headers(headers: dict | list | None) -> list[tuple[str, bytes]] | None:
+    if not headers:
+        return None
+    items = headers.items() if isinstance(headers, dict) else headers
+    return [(name, _to_bytes(value)) for name, value in items]
+
+
+def _deadline(timeout: float | None) -> float | None:
+    if timeout is None or timeout < 0:
+        return None
+    return time.monotonic() + timeout
+
+
+def _unknown_partition(topic: str, partition: int) -> KafkaException:
+    return KafkaException(
+        KafkaError(
+            KafkaError.UNKNOWN_TOPIC_OR_PART,
+            f"Unknown topic or partition: {topic} [{partition}]",
+        )
+    )
+
+
+class FakeMessage:
+    """Сообщение фейкового брокера с интерфейсом `confluent_kafka.Message`."""
+
+    __slots__ = ("_topic", "_partition", "_offset", "_key", "_value", "_headers", "_ts")
+
+    def __init__(
+        self,
+        topic: str,
+        partition: int,
+        offset: int,
+        key: bytes | None,
+        value: bytes | None,
+        headers: list[tuple[str, bytes]] | None,
+    ) -> None:
+        """:param topic: Имя топика.
+        :param partition: Номер партиции.
+        :param offset: Оффсет сообщения в партиции.
+        :param key: Ключ.
+        :param value: Тело.
+        :param headers: Заголовки в виде списка пар.
+        """
+        self._topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._key = key
+        self._value = value
+        self._headers = headers
+        self._ts = int(time.time() * 1000)
+
+    def topic(self) -> str:
+        """Имя топика."""
+        return self._topic
+
+    def partition(self) -> int:
+        """Номер партиции."""
+        return self._partition
+
+    def offset(self) -> int:
+        """Оффсет сообщения."""
+        return self._offset
+
+    def key(self) -> bytes | None:
+        """Ключ сообщения."""
+        return self._key
+
+    def value(self) -> bytes | None:
+        """Тело сообщения."""
+        return self._value
+
+    def headers(self) -> list[tuple[str, bytes]] | None:
+        """Заголовки сообщения (список пар, как у confluent-kafka)."""
+        return self._headers
+
+    def timestamp(self) -> tuple[int, int]:
+        """Тип и значение метки времени (время создания, мс)."""
+        return TIMESTAMP_CREATE_TIME, self._ts
+
+    def error(self) -> None:
+        """Фейковый брокер не возвращает сообщений-ошибок."""
+        return None
+
+
+class FakeKafkaBroker:
+    """Kafka-брокер в памяти процесса: топики, партиции, оффсеты и заголовки.
+
+    Лог каждой партиции — обычный список, оффсет сообщения — его индекс. Топики
+    создаются заранее (`create_topic`) или автоматически при первой публикации,
+    как при `auto.create.topics.enable=true`. Продюсеры, консюмеры и админ-клиент
+    получаются через `connections()` и повторяют ту часть API confluent-kafka,
+    которой пользуются `KafkaClient`, `KafkaOffsets` и `KafkaTail`.
+    """
+
+    def __init__(
+        self, topics: Iterable[str] = (), partitions: int = DEFAULT_PARTITIONS
+    ) -> None:
+        """:param topics: Топики, которые нужно создать сразу.
+        :param partitions: Число партиций у создаваемых топиков.
+        """
+        self.partitions = partitions
+        self._cond = threading.Condition()
+        self._logs: dict[str, list[list[FakeMessage]]] = {}
+        self._round_robin: dict[str, itertools.cycle] = {}
+        self.appended = 0
+        for topic in topics:
+            self.create_topic(topic)
+
+    def create_topic(self, topic: str, partitions: int | None = None) -> None:
+        """Создаёт топик, если его ещё нет.
+
+        :param topic: Имя топика.
+        :param partitions: Число партиций; по умолчанию — как у брокера.
+        """
+        with self._cond:
+            if topic not in self._logs:
+                count = partitions or self.partitions
+                self._logs[topic] = [[] for _ in range(count)]
+                self._round_robin[topic] = itertools.cycle(range(count))
+
+    def append(
+        self,
+        topic: str,
+        value: str | bytes | None,
+        key: str | bytes | None = None,
+        headers: dict | list | None = None,
+        partition: int = -1,
+    ) -> FakeMessage:
+        """Дописывает сообщение в партицию топика.
+
+        Партиция выбирается как у librdkafka: по crc32 ключа, без ключа — по кругу.
+
+        :param topic: Имя топика (создаётся при необходимости).
+        :param value: Тело сообщения.
+        :param key: Ключ сообщения.
+        :param headers: Заголовки (словарь или список пар).
+        :param partition: Явный номер партиции; -1 — выбрать автоматически.
+        :return: Записанное сообщение с присвоенным оффсетом.
+        :raises KafkaException: Если явно указанной партиции нет.
+        """
+        self.create_topic(topic)
+        key = _to_bytes(key)
+        with self._cond:
+            log = self._logs[topic]
+            if partition < 0:
+                if key is None:
+                    partition = next(self._round_robin[topic])
+                else:
+                    partition = zlib.crc32(key) % len(log)
+            elif partition >= len(log):
+                raise _unknown_partition(topic, partition)
+            message = FakeMessage(
+                topic,
+                partition,
+                len(log[partition]),
+                key,
+                _to_bytes(value),
+                _headers(headers),
+            )
+            log[partition].append(message)
+            self.appended += 1
+            self._cond.notify_all()
+        return message
+
+    def watermarks(self, topic: str, partition: int) -> tuple[int, int]:
+        """Возвращает (low, high) watermark партиции.
+
+        :raises KafkaException: Если топика или партиции нет.
+        """
+        with self._cond:
+            log = self._logs.get(topic)
+            if log is None or not 0 <= partition < len(log):
+                raise _unknown_partition(topic, partition)
+            return 0, len(log[partition])
+
+    def read(self, topic: str, partition: int, offset: int) -> FakeMessage | None:
+        """Возвращает сообщение по оффсету или None, если его ещё нет."""
+        with self._cond:
+            log = self._logs.get(topic)
+            if log is None or partition >= len(log) or offset >= len(log[partition]):
+                return None
+            return log[partition][offset]
+
+    def wait(self, seen: int, deadline: float | None) -> bool:
+        """Ждёт, пока в брокер допишут сообщение после отметки `seen`.
+
+        :param seen: Значение счётчика `appended`, прочитанное до проверки партиций.
+        :param deadline: Крайний момент ожидания (`time.monotonic()`); None — без ограничения.
+        :return: False, если время истекло.
+        """
+        with self._cond:
+            while self.appended == seen:
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def metadata(self, topic: str | None = None) -> ClusterMetadata:
+        """Собирает метаданные кластера в формате `AdminClient.list_topics()`.
+
+        :param topic: Имя топика; None — все топики.
+        """
+        md = ClusterMetadata()
+        md.cluster_id = "fake"
+        md.controller_id = FAKE_BROKER_ID
+        broker = BrokerMetadata()
+        broker.id, broker.host, broker.port = (
+            FAKE_BROKER_ID,
+            FAKE_BROKER_HOST,
+            FAKE_BROKER_PORT,
+        )
+        md.brokers = {FAKE_BROKER_ID: broker}
+        with self._cond:
+            names = [topic] if topic is not None else list(self._logs)
+            for name in names:
+                if name not in self._logs:
+                    continue
+                tm = TopicMetadata()
+                tm.topic = name
+                for p in range(len(self._logs[name])):
+                    pm = PartitionMetadata()
+                    pm.id, pm.leader = p, FAKE_BROKER_ID
+                    pm.replicas = pm.isrs = [FAKE_BROKER_ID]
+                    tm.partitions[p] = pm
+                md.topics[name] = tm
+        return md
+
+    def connections(self) -> KafkaConnections:
+        """Возвращает общие клиенты `KafkaClient`, работающие с этим брокером."""
+        return KafkaConnections(
+            FakeAdminClient(self),
+            FakeProducer(self),
+            consumer_factory=lambda config: FakeConsumer(self, config),
+            producer_factory=lambda config: FakeProducer(self, config),
+        )
+
+
+class FakeProducer:
+    """Продюсер фейкового брокера.
+
+    Сообщение попадает в лог сразу в `produce()`, а delivery-колбэки, как и у
+    настоящего продюсера, вызываются только из `poll()`/`flush()`.
+    """
+
+    def __init__(self, broker: FakeKafkaBroker, config: dict | None = None) -> None:
+        """:param broker: Фейковый брокер.
+        :param config: Конфигурация продюсера (принимается и игнорируется).
+        """
+        self.broker = broker
+        self.config = config or {}
+        self._lock = threading.Lock()
+        self._pending: list[tuple[Callable, FakeMessage]] = []
+
+    def __len__(self) -> int:
+        """Число сообщений, по которым ещё не вызван delivery-колбэк."""
+        with self._lock:
+            return len(self._pending)
+
+    def produce(
+        self,
+        topic: str,
+        value: str | bytes | None = None,
+        key: str | bytes | None = None,
+        partition: int = -1,
+        on_delivery: Callable | None = None,
+        callback: Callable | None = None,
+        headers: dict | list | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Публикует сообщение (сигнатура как у `confluent_kafka.Producer.produce`)."""
+        message = self.broker.append(topic, value, key, headers, partition)
+        report = on_delivery or callback
+        if report is not None:
+            with self._lock:
+                self._pending.append((report, message))
+
+    def poll(self, timeout: float | None = None) -> int:
+        """Вызывает накопившиеся delivery-колбэки.
+
+        :return: Число вызванных колбэков.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for report, message in pending:
+            report(None, message)
+        return len(pending)
+
+    def flush(self, timeout: float | None = None) -> int:
+        """Вызывает delivery-колбэки; недоставленных сообщений не бывает.
+
+        :return: 0 — число сообщений, оставшихся в очереди.
+        """
+        self.poll(0)
+        return 0
+
+
+class FakeConsumer:
+    """Консюмер фейкового брокера с ручным назначением партиций (`assign`)."""
+
+    def __init__(self, broker: FakeKafkaBroker, config: dict | None = None) -> None:
+        """:param broker: Фейковый брокер.
+        :param config: Конфигурация консюмера; учитывается только `auto.offset.reset`.
+        """
+        self.broker = broker
+        self.config = config or {}
+        self._lock = threading.Lock()
+        self._positions: dict[tuple[str, int], int] = {}
+        self._order: list[tuple[str, int]] = []
+        self._next = 0
+        self.closed = False
+
+    def _start_offset(self, tp: TopicPartition) -> int:
+        _, high = self.broker.watermarks(tp.topic, tp.partition)
+        offset = tp.offset
+        if offset < 0 and offset not in (OFFSET_BEGINNING, OFFSET_END):
+            reset = self.config.get("auto.offset.reset", "latest")
+            offset = (
+                OFFSET_BEGINNING if reset in ("earliest", "smallest") else OFFSET_END
+            )
+        if offset == OFFSET_BEGINNING:
+            return 0
+        if offset == OFFSET_END:
+            return high
+        return min(offset, high)
+
+    def assign(self, partitions: list[TopicPartition]) -> None:
+        """Назначает партиции с оффсетами (поддерживаются OFFSET_BEGINNING/OFFSET_END)."""
+        positions = {
+            (tp.topic, tp.partition): self._start_offset(tp) for tp in partitions
+        }
+        with self._lock:
+            self._positions = positions
+            self._order = list(positions)
+            self._next = 0
+
+    def unassign(self) -> None:
+        """Снимает назначение всех партиций."""
+        self.assign([])
+
+    def assignment(self) -> list[TopicPartition]:
+        """Текущие назначенные партиции."""
+        with self._lock:
+            return [TopicPartition(t, p) for t, p in self._order]
+
+    def position(self, partitions: list[TopicPartition]) -> list[TopicPartition]:
+        """Следующие оффсеты чтения для указанных партиций."""
+        with self._lock:
+            return [
+                TopicPartition(
+                    tp.topic,
+                    tp.partition,
+                    self._positions.get((tp.topic, tp.partition), -1001),
+                )
+                for tp in partitions
+            ]
+
+    def _take(self) -> FakeMessage | None:
+        with self._lock:
+            for i in range(len(self._order)):
+                key = self._order[(self._next + i) % len(self._order)]
+                message = self.broker.read(*key, self._positions[key])
+                if message is not None:
+                    self._positions[key] += 1
+                    self._next = (self._next + i + 1) % len(self._order)
+                    return message
+        return None
+
+    def poll(self, timeout: float | None = None) -> FakeMessage | None:
+        """Возвращает следующее сообщение из назначенных партиций или None по таймауту.
+
+        :param timeout: Таймаут, секунды; None или отрицательное — ждать бесконечно.
+        """
+        deadline = _deadline(timeout)
+        while True:
+            seen = self.broker.appended
+            message = self._take()
+            if message is not None or not self.broker.wait(seen, deadline):
+                return message
+
+    def consume(
+        self, num_messages: int = 1, timeout: float | None = None
+    ) -> list[FakeMessage]:
+        """Возвращает до `num_messages` сообщений.
+
+        Как и librdkafka, ждёт, пока наберётся полная пачка или истечёт `timeout`,
+        и только тогда возвращает накопленное — даже если первое сообщение
+        пришло сразу.
+
+        :param num_messages: Размер пачки.
+        :param timeout: Таймаут, секунды; None или отрицательное — ждать бесконечно.
+        """
+        deadline = _deadline(timeout)
+        messages: list[FakeMessage] = []
+        while True:
+            seen = self.broker.appended
+            while (
+                len(messages) < num_messages and (message := self._take()) is not None
+            ):
+                messages.append(message)
+            if len(messages) >= num_messages or not self.broker.wait(seen, deadline):
+                return messages
+
+    def get_watermark_offsets(
+        self,
+        partition: TopicPartition,
+        timeout: float | None = None,
+        cached: bool = False,
+    ) -> tuple[int, int]:
+        """Возвращает (low, high) watermark партиции."""
+        return self.broker.watermarks(partition.topic, partition.partition)
+
+    def list_topics(
+        self, topic: str | None = None, timeout: float = -1
+    ) -> ClusterMetadata:
+        """Метаданные кластера (как `Consumer.list_topics`)."""
+        return self.broker.metadata(topic)
+
+    def close(self) -> None:
+        """Закрывает консюмер."""
+        self.unassign()
+        self.closed = True
+
+
+class FakeAdminClient:
+    """Админ-клиент фейкового брокера: метаданные и `list_offsets`."""
+
+    def __init__(self, broker: FakeKafkaBroker) -> None:
+        """:param broker: Фейковый брокер."""
+        self.broker = broker
+
+    def list_topics(
+        self, topic: str | None = None, timeout: float = -1
+    ) -> ClusterMetadata:
+        """Метаданные кластера (как `AdminClient.list_topics`)."""
+        return self.broker.metadata(topic)
+
+    def list_offsets(
+        self, topic_partition_offsets: dict, **kwargs: Any
+    ) -> dict[TopicPartition, Future]:
+        """Возвращает начало или конец партиций по `OffsetSpec.earliest()`/`latest()`.
+
+        :return: Словарь future по TopicPartition, как у `AdminClient.list_offsets`.
+        """
+        futures = {}
+        for tp, spec in topic_partition_offsets.items():
+            future = Future()
+            try:
+                low, high = self.broker.watermarks(tp.topic, tp.partition)
+                offset = low if spec._value == OFFSET_BEGINNING else high
+                future.set_result(ListOffsetsResultInfo(offset, -1, -1))
+            except KafkaException as e:
+                future.set_exception(e)
+            futures[tp] = future
+        return futures
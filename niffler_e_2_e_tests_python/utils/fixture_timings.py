@@ -0,0 +1,76 @@
+import threading
+
+from niffler_e_2_e_tests_python.utils.http_metrics import LatencyHistogram
+
+
+class FixtureTimings:
+    """Реестр длительностей setup-фазы фикстур по ключу «scope, имя фикстуры».
+
+    Измерения хранятся в тех же логарифмических гистограммах, что и латентность HTTP,
+    поэтому их так же дёшево вести на каждый вызов и сливать между xdist-воркерами.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.histograms: dict[tuple[str, str], LatencyHistogram] = {}
+
+    def record(self, scope: str, name: str, elapsed_s: float) -> None:
+        """Записывает один setup фикстуры.
+
+        :param scope: Область видимости фикстуры (function, session, ...).
+        :param name: Имя фикстуры.
+        :param elapsed_s: Длительность setup, в секундах.
+        """
+        key = (scope, name)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(elapsed_s * 1000)
+
+    def merge_dict(self, data: dict) -> None:
+        """Сливает в реестр измерения, сериализованные `to_dict()` (например, от xdist-воркера).
+
+        :param data: Словарь вида `{"function kafka": {...}}`.
+        """
+        with self._lock:
+            for name, raw in data.items():
+                key = tuple(name.split(" ", 1))
+                incoming = LatencyHistogram.from_dict(raw)
+                if key in self.histograms:
+                    self.histograms[key].merge(incoming)
+                else:
+                    self.histograms[key] = incoming
+
+    def to_dict(self) -> dict:
+        """Сериализует все гистограммы для передачи между процессами."""
+        with self._lock:
+            return {
+                f"{scope} {name}": histogram.to_dict()
+                for (scope, name), histogram in self.histograms.items()
+            }
+
+    def summary(self) -> list[dict]:
+        """Возвращает сводку по фикстурам, отсортированную по суммарному времени setup."""
+        with self._lock:
+            rows = [
+                {
+                    "scope": scope,
+                    "fixture": name,
+                    "count": h.count,
+                    "total_ms": round(h.total_ms, 2),
+                    "mean_ms": round(h.total_ms / h.count, 2),
+                    "p95_ms": round(h.percentile(95), 2),
+                    "max_ms": round(h.max_ms, 2),
+                }
+                for (scope, name), h in self.histograms.items()
+            ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def clear(self) -> None:
+        """Удаляет все накопленные измерения."""
+        with self._lock:
+            self.histograms.clear()
+
+
+timings = FixtureTimings()
@@ -0,0 +1,114 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+import allure
+
+DEFAULT_BODY_LIMIT = 64 * 1024
+
+
+class CaptureLevel(StrEnum):
+    """Уровень детализации HTTP-вложений в Allure.
+
+    • FULL — полный дамп запроса и ответа прикладывается сразу (поведение по умолчанию).
+    • LAZY — сырые ответы лишь буферизуются, дамп рендерится только для упавших тестов
+      или по явному вызову `flush()`.
+    • METADATA — прикладывается одна строка: метод, URL, статус и время ответа.
+    """
+
+    FULL = "full"
+    LAZY = "lazy"
+    METADATA = "metadata"
+
+
+@dataclass
+class CaptureSettings:
+    """Текущие настройки захвата HTTP-трафика для процесса.
+
+    :param level: Уровень детализации вложений.
+    :param body_limit: Максимальный размер тела (в байтах), попадающий во вложение; 0 — без ограничения.
+    """
+
+    level: CaptureLevel = CaptureLevel.FULL
+    body_limit: int = DEFAULT_BODY_LIMIT
+    pending: list[Callable[[], None]] = field(default_factory=list)
+
+
+settings = CaptureSettings()
+
+
+def configure(level: str | CaptureLevel, body_limit: int = DEFAULT_BODY_LIMIT) -> None:
+    """Устанавливает уровень захвата и лимит размера тела (вызывается из `pytest_configure`).
+
+    :param level: Уровень детализации (`full`, `lazy`, `metadata`).
+    :param body_limit: Максимальный размер тела во вложении, в байтах; 0 — без ограничения.
+    """
+    settings.level = CaptureLevel(level)
+    settings.body_limit = body_limit
+    settings.pending.clear()
+
+
+def truncate(body: str | bytes, limit: int | None = None) -> tuple[str | bytes, bool]:
+    """Обрезает тело до лимита и добавляет маркер с количеством отброшенных байт.
+
+    :param body: Тело запроса или ответа.
+    :param limit: Лимит в байтах/символах; по умолчанию берётся из `settings.body_limit`.
+    :return: Кортеж (тело, было_ли_обрезано).
+    """
+    limit = settings.body_limit if limit is None else limit
+    if not limit or len(body) <= limit:
+        return body, False
+    if isinstance(body, bytes):
+        marker = f"\n... [truncated {len(body) - limit} bytes]".encode()
+        return body[:limit] + marker, True
+    return f"{body[:limit]}\n... [truncated {len(body) - limit} chars]", True
+
+
+def run(action: Callable[[], None]) -> None:
+    """Выполняет действие по прикладыванию вложений сразу или откладывает его в режиме LAZY.
+
+    :param action: Функция без аргументов, которая рендерит и прикладывает вложения.
+    """
+    if settings.level is CaptureLevel.LAZY:
+        settings.pending.append(action)
+        return
+    action()
+
+
+def attach(
+    name: str,
+    render: Callable[[], str | bytes],
+    attachment_type: allure.attachment_type = allure.attachment_type.TEXT,
+    extension: str | None = None,
+) -> None:
+    """Прикладывает вложение сразу или откладывает его рендеринг в режиме LAZY.
+
+    В режиме LAZY функция `render` не вызывается до `flush()`, поэтому тяжёлое
+    форматирование (pretty-print JSON, шаблоны, curl) не выполняется для прошедших тестов.
+
+    :param name: Имя вложения в Allure.
+    :param render: Функция без аргументов, возвращающая содержимое вложения.
+    :param attachment_type: Тип вложения Allure.
+    :param extension: Расширение файла вложения.
+    """
+    run(
+        lambda: allure.attach(
+            render(), name=name, attachment_type=attachment_type, extension=extension
+        )
+    )
+
+
+def flush() -> int:
+    """Рендерит и прикладывает все отложенные вложения к текущему элементу Allure.
+
+    :return: Количество выполненных отложенных действий.
+    """
+    pending, settings.pending = settings.pending, []
+    for action in pending:
+        action()
+    return len(pending)
+
+
+def discard() -> None:
+    """Отбрасывает отложенные вложения без рендеринга (тест прошёл)."""
+    settings.pending.clear()
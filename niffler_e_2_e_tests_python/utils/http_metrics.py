@@ -0,0 +1,194 @@
+import json
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+
+# Границы корзин растут геометрически (шаг ~5%): относительная погрешность перцентилей
+# не превышает шага, а на диапазон 0.1 мс .. 10 мин хватает ~320 корзин.
+_MIN_MS = 0.1
+_GROWTH = 1.05
+_LOG_GROWTH = math.log(_GROWTH)
+
+_ID_SEGMENT = re.compile(
+    r"^(?:\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$"
+)
+
+
+def templated_path(path: str) -> str:
+    """Заменяет идентификаторы в пути (UUID, числа) на `{id}`.
+
+    Пример: `/api/spends/5b2d...-...` -> `/api/spends/{id}`.
+
+    :param path: Путь запроса без query-параметров.
+    :return: Шаблон пути для группировки метрик.
+    """
+    return "/".join(
+        "{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")
+    )
+
+
+def _bucket(value_ms: float) -> int:
+    if value_ms <= _MIN_MS:
+        return 0
+    return int(math.log(value_ms / _MIN_MS) / _LOG_GROWTH) + 1
+
+
+def _bucket_upper_ms(index: int) -> float:
+    return _MIN_MS * _GROWTH**index
+
+
+@dataclass
+class LatencyHistogram:
+    """Гистограмма латентности с логарифмическими корзинами.
+
+    Запись — O(1) и без хранения отдельных значений, поэтому гистограммы дёшево
+    вести на каждый запрос и сливать между xdist-воркерами.
+    """
+
+    counts: dict[int, int] = field(default_factory=dict)
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def record(self, value_ms: float) -> None:
+        """Добавляет одно измерение.
+
+        :param value_ms: Длительность запроса, в миллисекундах.
+        """
+        index = _bucket(value_ms)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def percentile(self, q: float) -> float:
+        """Оценивает перцентиль по верхней границе корзины.
+
+        :param q: Перцентиль от 0 до 100.
+        :return: Оценка в миллисекундах (не больше фактического максимума).
+        """
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * q / 100) or 1
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_upper_ms(index), self.max_ms)
+        return self.max_ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Добавляет к гистограмме данные другой гистограммы.
+
+        :param other: Гистограмма с тем же разбиением на корзины.
+        """
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def to_dict(self) -> dict:
+        """Сериализует гистограмму в JSON-совместимый словарь."""
+        return {
+            "counts": {str(k): v for k, v in self.counts.items()},
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "max_ms": self.max_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        """Восстанавливает гистограмму из словаря `to_dict()`."""
+        return cls(
+            counts={int(k): v for k, v in data["counts"].items()},
+            count=data["count"],
+            total_ms=data["total_ms"],
+            max_ms=data["max_ms"],
+        )
+
+
+class HttpMetrics:
+    """Реестр гистограмм латентности по ключу «метод, шаблон пути, статус»."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.histograms: dict[tuple[str, str, int], LatencyHistogram] = {}
+
+    def record(self, method: str, path: str, status: int, elapsed_s: float) -> None:
+        """Записывает один HTTP-обмен.
+
+        :param method: HTTP-метод.
+        :param path: Путь запроса (идентификаторы будут заменены на `{id}`).
+        :param status: HTTP-статус ответа.
+        :param elapsed_s: Длительность запроса, в секундах.
+        """
+        key = (method, templated_path(path), status)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram()
+            histogram.record(elapsed_s * 1000)
+
+    def merge_dict(self, data: dict) -> None:
+        """Сливает в реестр метрики, сериализованные `to_dict()` (например, от xdist-воркера).
+
+        :param data: Словарь вида `{"GET /path 200": {...}}`.
+        """
+        with self._lock:
+            for name, raw in data.items():
+                # В шаблоне пути могут быть пробелы: метод — до первого, статус — после последнего.
+                rest, _, status = name.rpartition(" ")
+                method, _, path = rest.partition(" ")
+                key = (method, path, int(status))
+                incoming = LatencyHistogram.from_dict(raw)
+                if key in self.histograms:
+                    self.histograms[key].merge(incoming)
+                else:
+                    self.histograms[key] = incoming
+
+    def to_dict(self) -> dict:
+        """Сериализует все гистограммы для передачи между процессами."""
+        with self._lock:
+            return {
+                f"{method} {path} {status}": histogram.to_dict()
+                for (method, path, status), histogram in self.histograms.items()
+            }
+
+    def summary(self) -> list[dict]:
+        """Возвращает сводку p50/p95/p99 по каждому эндпоинту, отсортированную по p95."""
+        with self._lock:
+            rows = [
+                {
+                    "method": method,
+                    "path": path,
+                    "status": status,
+                    "count": h.count,
+                    "mean_ms": round(h.total_ms / h.count, 2),
+                    "p50_ms": round(h.percentile(50), 2),
+                    "p95_ms": round(h.percentile(95), 2),
+                    "p99_ms": round(h.percentile(99), 2),
+                    "max_ms": round(h.max_ms, 2),
+                }
+                for (method, path, status), h in self.histograms.items()
+            ]
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def write_json(self, path: str) -> None:
+        """Сохраняет сводку и сырые гистограммы в JSON-файл.
+
+        :param path: Путь к файлу артефакта.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"summary": self.summary(), "histograms": self.to_dict()}, f, indent=2
+            )
+
+    def clear(self) -> None:
+        """Удаляет все накопленные метрики."""
+        with self._lock:
+            self.histograms.clear()
+
+
+metrics = HttpMetrics()
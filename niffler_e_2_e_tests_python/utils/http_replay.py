@@ -0,0 +1,381 @@
+import glob
+import json
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from enum import StrEnum
+from pathlib import Path
+
+import httpx
+
+from niffler_e_2_e_tests_python.utils.http_metrics import templated_path
+
+# Заголовки, которые не участвуют в сопоставлении и не сохраняются в файл как есть:
+# секреты заменяются заглушкой, а транспортные пересчитываются при воспроизведении.
+SECRET_HEADERS = frozenset({"authorization", "cookie", "set-cookie"})
+TRANSPORT_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding"}
+)
+
+_UUID = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+)
+
+
+class ReplayMode(StrEnum):
+    """Режим работы транспорта gateway.
+
+    • OFF — запросы уходят в сеть как обычно.
+    • RECORD — запросы уходят в сеть, обмены пишутся в HAR-файл.
+    • REPLAY — ответы берутся из HAR-файла, сеть не используется.
+    """
+
+    OFF = "off"
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class ReplayMissError(httpx.TransportError):
+    """В записи нет ответа, подходящего под запрос."""
+
+
+def _normalize(text: str) -> str:
+    return _UUID.sub("{id}", text)
+
+
+def _request_key(request: httpx.Request) -> tuple[str, str, str]:
+    """Ключ сопоставления: метод, шаблон пути и отсортированный query без идентификаторов."""
+    query = "&".join(
+        sorted(f"{k}={_normalize(v)}" for k, v in request.url.params.multi_items())
+    )
+    return request.method, templated_path(request.url.path), query
+
+
+def _headers_to_har(headers: httpx.Headers) -> list[dict[str, str]]:
+    return [
+        {"name": k, "value": "<redacted>" if k.lower() in SECRET_HEADERS else v}
+        for k, v in headers.multi_items()
+        if k.lower() not in TRANSPORT_HEADERS
+    ]
+
+
+def _to_entry(request: httpx.Request, response: httpx.Response, content: bytes) -> dict:
+    """Собирает HAR-запись (формат 1.2, только используемые поля) из обмена."""
+    return {
+        "startedDateTime": datetime.now(UTC).isoformat(),
+        "request": {
+            "method": request.method,
+            "url": str(request.url),
+            "headers": _headers_to_har(request.headers),
+            "queryString": [
+                {"name": k, "value": v} for k, v in request.url.params.multi_items()
+            ],
+            "postData": {
+                "mimeType": request.headers.get("content-type", ""),
+                "text": request.content.decode("utf-8", "replace"),
+            },
+        },
+        "response": {
+            "status": response.status_code,
+            "headers": _headers_to_har(response.headers),
+            "content": {
+                "mimeType": response.headers.get("content-type", ""),
+                "size": len(content),
+                "text": content.decode("utf-8", "replace"),
+            },
+        },
+    }
+
+
+def _entry_key(entry: dict) -> tuple[str, str, str]:
+    request = entry["request"]
+    return _request_key(httpx.Request(request["method"], request["url"]))
+
+
+def _from_entry(entry: dict, request: httpx.Request) -> httpx.Response:
+    response = entry["response"]
+    return httpx.Response(
+        response["status"],
+        headers=[(h["name"], h["value"]) for h in response["headers"]],
+        content=response["content"]["text"].encode("utf-8"),
+        request=request,
+    )
+
+
+@dataclass
+class HarLog:
+    """Потокобезопасный журнал записанных обменов с gateway.
+
+    :param entries: Записи в порядке выполнения запросов.
+    """
+
+    entries: list[dict] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, entry: dict) -> None:
+        """Добавляет запись в журнал.
+
+        :param entry: HAR-запись обмена.
+        """
+        with self._lock:
+            self.entries.append(entry)
+
+    def save(self, path: str | Path) -> None:
+        """Сохраняет журнал в HAR-файл.
+
+        :param path: Путь к файлу.
+        """
+        with self._lock:
+            data = {
+                "log": {
+                    "version": "1.2",
+                    "creator": {"name": "niffler-e2e", "version": "1.0"},
+                    "entries": list(self.entries),
+                }
+            }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, *paths: str | Path) -> "HarLog":
+        """Загружает и объединяет записи из одного или нескольких HAR-файлов.
+
+        :param paths: Пути к файлам.
+        :return: Журнал со всеми записями.
+        """
+        entries = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                entries.extend(json.load(f)["log"]["entries"])
+        return cls(entries=entries)
+
+
+class RecordingTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Транспорт-обёртка: отправляет запрос через вложенный транспорт и пишет обмен в журнал.
+
+    Тело ответа вычитывается целиком и возвращается клиенту новым ответом с теми же
+    заголовками, поэтому сжатие и метрики клиента работают как без записи.
+    """
+
+    def __init__(
+        self, inner: httpx.BaseTransport | httpx.AsyncBaseTransport, log: HarLog
+    ) -> None:
+        """:param inner: Реальный транспорт (синхронный или асинхронный).
+        :param log: Журнал, в который пишутся обмены.
+        """
+        self.inner = inner
+        self.log = log
+
+    def _record(
+        self, request: httpx.Request, response: httpx.Response, raw: bytes
+    ) -> httpx.Response:
+        decoded = httpx.Response(
+            response.status_code, headers=response.headers, content=raw
+        )
+        self.log.add(_to_entry(request, response, decoded.read()))
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(raw),
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """Выполняет запрос через вложенный транспорт и записывает обмен.
+
+        :param request: Подготовленный httpx.Request.
+        :return: Ответ httpx.Response.
+        """
+        response = self.inner.handle_request(request)
+        try:
+            raw = b"".join(response.stream)
+        finally:
+            response.stream.close()
+        return self._record(request, response, raw)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Асинхронный вариант `handle_request`.
+
+        :param request: Подготовленный httpx.Request.
+        :return: Ответ httpx.Response.
+        """
+        response = await self.inner.handle_async_request(request)
+        try:
+            raw = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.stream.aclose()
+        return self._record(request, response, raw)
+
+    def close(self) -> None:
+        """Закрывает вложенный транспорт."""
+        self.inner.close()
+
+    async def aclose(self) -> None:
+        """Закрывает вложенный асинхронный транспорт."""
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Транспорт, отвечающий записанными ответами без обращения к сети.
+
+    Запрос сопоставляется с записью по методу, шаблону пути (UUID и числа заменены
+    на `{id}`) и query без идентификаторов; заголовки не учитываются. Записи с одинаковым
+    ключом отдаются в порядке записи, а последняя повторяется, когда очередь исчерпана,
+    поэтому повторные чтения и ретраи не ломают воспроизведение. Среди кандидатов
+    предпочитается запись с тем же телом запроса (с точностью до идентификаторов).
+    """
+
+    def __init__(self, log: HarLog) -> None:
+        """:param log: Журнал записанных обменов."""
+        self._lock = threading.Lock()
+        self._queues: dict[tuple[str, str, str], list[dict]] = defaultdict(list)
+        for entry in log.entries:
+            self._queues[_entry_key(entry)].append(entry)
+
+    def _match(self, request: httpx.Request) -> httpx.Response:
+        key = _request_key(request)
+        body = _normalize(request.content.decode("utf-8", "replace"))
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                raise ReplayMissError(
+                    f"No recorded response for {request.method} {request.url}",
+                    request=request,
+                )
+            index = next(
+                (
+                    i
+                    for i, entry in enumerate(queue)
+                    if _normalize(entry["request"]["postData"]["text"]) == body
+                ),
+                0,
+            )
+            entry = queue[index] if len(queue) == 1 else queue.pop(index)
+        return _from_entry(entry, request)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        """Возвращает записанный ответ на запрос.
+
+        :param request: Подготовленный httpx.Request.
+        :return: Ответ httpx.Response из записи.
+        :raises ReplayMissError: Если подходящей записи нет.
+        """
+        request.read()
+        return self._match(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Асинхронный вариант `handle_request`.
+
+        :param request: Подготовленный httpx.Request.
+        :return: Ответ httpx.Response из записи.
+        :raises ReplayMissError: Если подходящей записи нет.
+        """
+        await request.aread()
+        return self._match(request)
+
+
+@dataclass
+class ReplaySettings:
+    """Настройки записи/воспроизведения трафика gateway для процесса.
+
+    :param mode: Текущий режим.
+    :param path: Путь к HAR-файлу.
+    :param log: Журнал записи (RECORD) или загруженные записи (REPLAY).
+    :param replay: Общий на процесс транспорт воспроизведения (REPLAY).
+    """
+
+    mode: ReplayMode = ReplayMode.OFF
+    path: Path | None = None
+    log: HarLog = field(default_factory=HarLog)
+    replay: ReplayTransport | None = None
+
+
+settings = ReplaySettings()
+
+
+def _worker_path(path: Path) -> Path:
+    """Под xdist каждый воркер пишет свой файл `<имя>.<gwN><расширение>`."""
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    return path.with_name(f"{path.stem}.{worker}{path.suffix}") if worker else path
+
+
+def configure(record: str | None = None, replay: str | None = None) -> None:
+    """Включает запись или воспроизведение (вызывается из `pytest_configure`).
+
+    При воспроизведении загружается сам файл и файлы воркеров `<имя>.gw*<расширение>`,
+    записанные параллельным прогоном.
+
+    :param record: Путь к HAR-файлу для записи трафика.
+    :param replay: Путь к HAR-файлу для воспроизведения.
+    :raises ValueError: Если заданы оба режима сразу или файл для воспроизведения не найден.
+    """
+    if record and replay:
+        raise ValueError("--http-record and --http-replay are mutually exclusive")
+    if record:
+        settings.mode, settings.path, settings.log = (
+            ReplayMode.RECORD,
+            _worker_path(Path(record)),
+            HarLog(),
+        )
+    elif replay:
+        path = Path(replay)
+        paths = sorted(glob.glob(str(path.with_name(f"{path.stem}.gw*{path.suffix}"))))
+        if path.exists():
+            paths.insert(0, str(path))
+        if not paths:
+            raise ValueError(f"HAR file for replay not found: {path}")
+        settings.mode, settings.path, settings.log = (
+            ReplayMode.REPLAY,
+            path,
+            HarLog.load(*paths),
+        )
+        settings.replay = ReplayTransport(settings.log)
+    else:
+        settings.mode, settings.path, settings.log = ReplayMode.OFF, None, HarLog()
+    if settings.mode is not ReplayMode.REPLAY:
+        settings.replay = None
+
+
+def wrap_transport(transport: httpx.BaseTransport | None) -> httpx.BaseTransport | None:
+    """Оборачивает синхронный транспорт клиента gateway согласно текущему режиму.
+
+    :param transport: Реальный транспорт или None (транспорт httpx по умолчанию).
+    :return: Исходный транспорт (OFF), записывающая обёртка (RECORD) или общий ReplayTransport.
+    """
+    if settings.mode is ReplayMode.RECORD:
+        return RecordingTransport(transport or httpx.HTTPTransport(), settings.log)
+    if settings.mode is ReplayMode.REPLAY:
+        return settings.replay
+    return transport
+
+
+def wrap_async_transport(
+    transport: httpx.AsyncBaseTransport | None,
+) -> httpx.AsyncBaseTransport | None:
+    """Асинхронный вариант `wrap_transport`.
+
+    :param transport: Реальный асинхронный транспорт или None.
+    :return: Исходный транспорт, записывающая обёртка или ReplayTransport.
+    """
+    if settings.mode is ReplayMode.RECORD:
+        return RecordingTransport(transport or httpx.AsyncHTTPTransport(), settings.log)
+    if settings.mode is ReplayMode.REPLAY:
+        return settings.replay
+    return transport
+
+
+def save() -> None:
+    """Сохраняет записанный трафик в HAR-файл (только в режиме RECORD)."""
+    if settings.mode is ReplayMode.RECORD and settings.path is not None:
+        settings.log.save(settings.path)
+        logging.info(
+            "Recorded %d gateway exchanges to %s",
+            len(settings.log.entries),
+            settings.path,
+        )
@@ -1,16 +1,128 @@
 import json
 import logging
 import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
 from typing import Any
 from uuid import uuid4
 
 from confluent_kafka import TopicPartition
 from confluent_kafka.admin import AdminClient
 from confluent_kafka.cimpl import Consumer, Message, Producer
+from pydantic import BaseModel
 
 from niffler_e_2_e_tests_python.models.user import UserName
+from niffler_e_2_e_tests_python.utils.http_metrics import LatencyHistogram
+from niffler_e_2_e_tests_python.utils.kafka_decoding import (
+    TYPE_ID_HEADER,
+    USER_JSON_TYPE,
+    DecodedMessage,
+    MessageTypes,
+    message_types,
+)
+from niffler_e_2_e_tests_python.utils.kafka_offsets import KafkaOffsets, OffsetSnapshot
 from niffler_e_2_e_tests_python.utils.waiters import wait_until_timeout
 
+DEFAULT_BATCH_SIZE = 100
+# Максимальная длительность одного `consume`: librdkafka возвращает пачку, только когда
+# она заполнена или истёк таймаут, поэтому ожидание режется на короткие отрезки.
+CONSUME_SLICE = 0.2
+# Сколько текстов ошибок доставки сохранять в DeliveryStats.
+MAX_ERROR_SAMPLES = 10
+
+
+@dataclass
+class DeliveryStats:
+    """Итог пакетной публикации `KafkaClient.produce_many`.
+
+    :param acked: Сколько сообщений подтвердил брокер.
+    :param failed: Сколько сообщений не доставлено.
+    :param per_partition: Число подтверждённых сообщений по партициям.
+    :param latency: Гистограмма задержки «produce → delivery callback», мс.
+    :param elapsed: Полное время публикации вместе с финальным flush, секунды.
+    :param errors: Первые тексты ошибок доставки.
+    """
+
+    acked: int = 0
+    failed: int = 0
+    per_partition: dict[int, int] = field(default_factory=dict)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    elapsed: float = 0.0
+    errors: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Сводка для логов и Allure-вложений."""
+        return {
+            "acked": self.acked,
+            "failed": self.failed,
+            "per_partition": self.per_partition,
+            "p50_ms": round(self.latency.percentile(50), 2),
+            "p95_ms": round(self.latency.percentile(95), 2),
+            "p99_ms": round(self.latency.percentile(99), 2),
+            "max_ms": round(self.latency.max_ms, 2),
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput": round(self.acked / self.elapsed, 1) if self.elapsed else 0.0,
+            "errors": self.errors,
+        }
+
+
+def _serialize(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode("utf-8")
+    return json.dumps(value).encode("utf-8")
+
+
+@dataclass
+class KafkaConnections:
+    """Долгоживущие AdminClient и Producer, общие для всех KafkaClient одного процесса.
+
+    Оба клиента потокобезопасны, поэтому один экземпляр переиспользуется тестами
+    всей сессии (на каждом xdist-воркере свой), а тест создаёт только консюмер.
+    Кэш концов партиций (`offsets`) тоже общий. Фабрики создают консюмеры тестов
+    и отдельные продюсеры пакетной публикации — их подменяет фейковый брокер.
+    """
+
+    admin: AdminClient
+    producer: Producer
+    consumer_factory: Callable[[dict], Consumer] = Consumer
+    producer_factory: Callable[[dict], Producer] = Producer
+    offsets: KafkaOffsets = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Создаёт кэш концов партиций поверх админ-клиента."""
+        self.offsets = KafkaOffsets(self.admin)
+
+    @classmethod
+    def connect(cls, envs) -> "KafkaConnections":
+        """Создаёт клиентов и один раз логирует «рекламируемые» адреса брокеров.
+
+        Это помогает диагностировать проблемы с `advertised.listeners`
+        (частая причина ошибок подключения в Docker/Compose).
+
+        :param envs: Объект с настройками окружения.
+        :return: Экземпляр KafkaConnections.
+        :raises: Исключения `confluent_kafka` при невозможности получить метаданные кластера.
+        """
+        admin = AdminClient({"bootstrap.servers": envs.kafka_address_producer})
+        producer = Producer({"bootstrap.servers": envs.kafka_address_producer})
+        md = admin.list_topics(timeout=5)
+        advertised = {b.id: f"{b.host}:{b.port}" for b in md.brokers.values()}
+        logging.info(
+            "Bootstrap(producer)=%s, Bootstrap(consumer)=%s, Advertised brokers=%s",
+            envs.kafka_address_producer,
+            envs.kafka_address_consumer,
+            advertised,
+        )
+        return cls(admin, producer)
+
+    def close(self) -> None:
+        """Дожидается отправки всего, что осталось в очереди продюсера."""
+        self.producer.flush(5)
+
 
 class KafkaClient:
     """Класс для взаимодействия с Apache Kafka на базе библиотеки `confluent-kafka`.
@@ -21,8 +133,8 @@ class KafkaClient:
       • подписываться на партиции и читать сообщения, начиная с нужных оффсетов;
       • получать «верхние» оффсеты партиций и логировать принятые сообщения.
 
-    Во время инициализации логирует «рекламируемые» брокерами адреса, что помогает диагностировать
-    проблемы с `advertised.listeners` (частая причина ошибок подключения в Docker/Compose).
+    Админ-клиент и продюсер берутся из `KafkaConnections`: в тестах они общие на сессию,
+    а собственным у клиента остаётся только консюмер.
     """
 
     def __init__(
@@ -30,23 +142,31 @@ class KafkaClient:
         envs,
         client_id: str = "tester",
         group_id: str | None = None,
+        connections: "KafkaConnections | None" = None,
     ):
         """Инициализирует Kafka-клиенты (AdminClient, Producer, Consumer) на основании окружения.
         Если group_id не передан — генерируется уникальный для каждого клиента.
         Это нужно для изоляции параллельных тестов (xdist).
 
+        Админ-клиент и продюсер можно передать общими (`connections`): тогда клиент
+        создаёт только собственный консюмер и не запрашивает метаданные кластера.
+
         :param envs: Объект с настройками окружения (содержит адреса для продюсера и консюмера).
         :param client_id: Идентификатор клиента для метрик и отладки.
         :param group_id: Группа консюмера для управления оффсетами и ребалансом.
+        :param connections: Общие AdminClient и Producer; None — создать собственные.
         :raises: Исключения `confluent_kafka` при невозможности получить метаданные кластера.
         """
         self.server_producer = envs.kafka_address_producer
         self.server_consumer = envs.kafka_address_consumer
         self.group_id = group_id or f"tester-{uuid4().hex[:8]}"
 
-        self.admin = AdminClient({"bootstrap.servers": self.server_producer})
-        self.producer = Producer({"bootstrap.servers": self.server_producer})
-        self.consumer = Consumer(
+        connections = connections or KafkaConnections.connect(envs)
+        self.admin = connections.admin
+        self.producer = connections.producer
+        self.offsets = connections.offsets
+        self._producer_factory = connections.producer_factory
+        self.consumer = connections.consumer_factory(
             {
                 "bootstrap.servers": self.server_consumer,
                 "group.id": self.group_id,
@@ -56,15 +176,6 @@ class KafkaClient:
                 "enable.ssl.certificate.verification": False,
             }
         )
-        md = self.admin.list_topics(timeout=5)
-        advertised = {b.id: f"{b.host}:{b.port}" for b in md.brokers.values()}
-        logging.info(
-            "Bootstrap(producer)=%s, Bootstrap(consumer)=%s, Advertised brokers=%s, group_id=%s",
-            self.server_producer,
-            self.server_consumer,
-            advertised,
-            self.group_id,
-        )
 
     def __enter__(self):
         """Возвращает сам клиент для использования в контекстном менеджере `with`.
@@ -134,6 +245,85 @@ class KafkaClient:
             logging.error("Failed to produce message: %s", e)
             raise
 
+    def produce_many(
+        self,
+        topic: str,
+        values: Iterable[Any],
+        key: Callable[[Any], str | None] | None = None,
+        headers: dict[str, str] | None = None,
+        linger_ms: int = 20,
+        batch_size: int = 1_000_000,
+        compression: str = "lz4",
+        flush_timeout: float = 60.0,
+    ) -> DeliveryStats:
+        """Публикует пачку сообщений с батчингом на стороне продюсера и одним финальным flush.
+
+        Для пачки создаётся отдельный продюсер с заданными `linger.ms`, `batch.size`
+        и `compression.type`; сообщения копятся в его очереди и уходят крупными
+        батчами. При переполнении локальной очереди публикация ждёт её разгрузки.
+
+        :param topic: Имя топика.
+        :param values: Значения: bytes, str, pydantic-модели или JSON-совместимые объекты.
+        :param key: Функция, вычисляющая ключ по значению; None — без ключа.
+        :param headers: Заголовки, добавляемые к каждому сообщению (например, `__TypeId__`).
+        :param linger_ms: Сколько продюсер ждёт наполнения батча, мс.
+        :param batch_size: Максимальный размер батча, байт.
+        :param compression: Алгоритм сжатия (`none`, `gzip`, `snappy`, `lz4`, `zstd`).
+        :param flush_timeout: Максимальное время финального flush, секунды.
+        :return: Статистика доставки.
+        """
+        producer = self._producer_factory(
+            {
+                "bootstrap.servers": self.server_producer,
+                "linger.ms": linger_ms,
+                "batch.size": batch_size,
+                "compression.type": compression,
+            }
+        )
+        stats = DeliveryStats()
+
+        def _on_delivery(sent_at: float, err: Exception | None, msg: Message) -> None:
+            if err is not None:
+                stats.failed += 1
+                if len(stats.errors) < MAX_ERROR_SAMPLES:
+                    stats.errors.append(str(err))
+                return
+            stats.acked += 1
+            partition = msg.partition()
+            stats.per_partition[partition] = stats.per_partition.get(partition, 0) + 1
+            stats.latency.record((time.perf_counter() - sent_at) * 1000)
+
+        started = time.perf_counter()
+        for value in values:
+            kwargs = {
+                "value": _serialize(value),
+                "key": key(value) if key is not None else None,
+                "headers": headers,
+            }
+            while True:
+                sent_at = time.perf_counter()
+                try:
+                    producer.produce(
+                        topic,
+                        on_delivery=lambda err, msg, t=sent_at: _on_delivery(
+                            t, err, msg
+                        ),
+                        **kwargs,
+                    )
+                    break
+                except BufferError:
+                    producer.poll(0.1)
+            producer.poll(0)
+        remaining = producer.flush(flush_timeout)
+        stats.elapsed = time.perf_counter() - started
+        if remaining:
+            stats.failed += remaining
+            stats.errors.append(
+                f"{remaining} messages not delivered before flush timeout"
+            )
+        logging.info("Kafka produce_many(%s): %s", topic, stats.to_dict())
+        return stats
+
     def produce_user_data(self, user_data: dict[str, Any]):
         """Публикует пользовательские данные в топик `userdata`.
 
@@ -178,6 +368,116 @@ class KafkaClient:
         except AttributeError:
             pass
 
+    def consume_batch(
+        self, max_messages: int = DEFAULT_BATCH_SIZE, timeout: float = 1.0
+    ) -> list[Message]:
+        """Забирает до `max_messages` сообщений одним вызовом `Consumer.consume`.
+
+        Возвращается сразу, как только набралась пачка или истёк `timeout`;
+        сообщения с ошибками (например, конец партиции) логируются и отбрасываются.
+
+        :param max_messages: Максимальный размер пачки.
+        :param timeout: Максимальное время ожидания пачки, секунды.
+        :return: Список сообщений (возможно, пустой).
+        """
+        messages = self.consumer.consume(num_messages=max_messages, timeout=timeout)
+        batch = []
+        for message in messages:
+            if message.error():
+                logging.debug("Kafka consume error: %s", message.error())
+                continue
+            batch.append(message)
+        return batch
+
+    def iter_messages(
+        self,
+        until: Callable[[Message], bool] | None = None,
+        timeout: float = 25.0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Iterator[Message]:
+        """Потоково отдаёт сообщения из назначенных партиций до общего дедлайна.
+
+        Внутри — `consume_batch` с таймаутом не больше `CONSUME_SLICE`: `consume`
+        не возвращает неполную пачку раньше таймаута, поэтому с оставшимся до
+        дедлайна временем одиночное сообщение ждало бы весь `timeout`. Перебор
+        заканчивается по дедлайну или сразу после сообщения, для которого `until`
+        вернул True (это сообщение тоже отдаётся).
+
+        :param until: Условие остановки или None — читать до дедлайна.
+        :param timeout: Общее время чтения, секунды.
+        :param batch_size: Размер пачки одного `consume`.
+        :return: Итератор сообщений.
+        """
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            for message in self.consume_batch(
+                batch_size, min(remaining, CONSUME_SLICE)
+            ):
+                yield message
+                if until is not None and until(message):
+                    return
+
+    def iter_decoded(
+        self,
+        key: str | None = None,
+        type_id: str | None = None,
+        timeout: float = 25.0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        types: MessageTypes = message_types,
+    ) -> Iterator[DecodedMessage]:
+        """Отдаёт сообщения с ленивым разбором, отфильтрованные по ключу и `__TypeId__`.
+
+        Фильтр проверяет только ключ и заголовки: тело не разбирается, пока
+        вызывающий код не обратится к `payload`, `model` или `username`.
+
+        :param key: Ожидаемый ключ; None — любой.
+        :param type_id: Ожидаемый `__TypeId__`; None — любой.
+        :param timeout: Общее время чтения, секунды.
+        :param batch_size: Размер пачки одного `consume`.
+        :param types: Реестр моделей по `__TypeId__`.
+        :return: Итератор DecodedMessage.
+        """
+        for message in self.iter_messages(timeout=timeout, batch_size=batch_size):
+            decoded = DecodedMessage(message, types)
+            if decoded.matches(key=key, type_id=type_id):
+                yield decoded
+
+    def wait_for_message(
+        self,
+        topic_partitions,
+        where: Callable[[DecodedMessage], bool] | None = None,
+        *,
+        key: str | None = None,
+        type_id: str | None = None,
+        username: str | None = None,
+        timeout: float = 25.0,
+    ) -> DecodedMessage:
+        """Ждёт первое подходящее сообщение, начиная с заданных оффсетов.
+
+        Сначала дёшево отсеиваются сообщения с чужим ключом и `__TypeId__`, затем
+        у оставшихся один раз разбирается тело для `username` и `where`.
+
+        :param topic_partitions: Партиции с оффсетами (`subscribe_listen_new_offsets()`).
+        :param where: Дополнительное условие на сообщение.
+        :param key: Ожидаемый ключ.
+        :param type_id: Ожидаемый `__TypeId__`.
+        :param username: Ожидаемый `username` в теле.
+        :param timeout: Общее время ожидания, секунды.
+        :return: Найденное сообщение (тело доступно как `.model`, `.payload`, `.raw`).
+        :raises AssertionError: Если за `timeout` подходящего сообщения не было.
+        """
+        self.consumer.assign(topic_partitions)
+        for message in self.iter_decoded(key=key, type_id=type_id, timeout=timeout):
+            if username is not None and message.username != username:
+                continue
+            if where is None or where(message):
+                logging.info("Kafka message: %s", message.payload)
+                return message
+
+        raise AssertionError(
+            "Timed out waiting Kafka event" + (f" for {username}" if username else "")
+        )
+
     def get_last_offset(self, topic: str = "", partition_id=0):
         """Возвращает верхнюю границу оффсета (high watermark) для заданной партиции.
 
@@ -228,61 +528,40 @@ class KafkaClient:
         :raises ValueError: если формат сообщения невалиден (например, не JSON),
                             но эти ошибки обычно перехватываются и просто логируются.
         """
-        self.consumer.assign(topic_partitions)
-
-        deadline = time.time() + timeout
-        while True:
-            remaining = deadline - time.time()
-            if remaining <= 0:
-                break
-
-            raw = self.consume_message(
-                topic_partitions,
-                timeout=max(0.2, remaining),
-                polling_interval=0.5,
-                err=False,
-            )
-
-            if not raw:
-                continue
-
-            try:
-                payload = json.loads(
-                    raw.decode("utf-8") if isinstance(raw, bytes | bytearray) else raw
-                )
-            except Exception as e:
-                logging.debug("Skip non-JSON message: %s", e)
-                continue
-
-            logging.info("Kafka payload: %s", payload)
-            if match_username is None or payload.get("username") == match_username:
-                return raw
-
-        raise AssertionError(
-            "Timed out waiting Kafka event"
-            + (f" for {match_username}" if match_username else "")
-        )
+        return self.wait_for_message(
+            topic_partitions,
+            lambda message: message.payload is not None,
+            username=match_username,
+            timeout=timeout,
+        ).raw
+
+    def offset_snapshot(self, *topics: str, fresh: bool = False) -> OffsetSnapshot:
+        """Снимает концы всех партиций топиков одним запросом к брокеру.
+
+        Пример: `before = kafka.offset_snapshot("users", fresh=True)`, действие,
+        `before.new_messages(kafka.offset_snapshot("users", fresh=True))`. Снимок из кэша
+        может отставать на секунду, поэтому для точного подсчёта оба снимка берутся свежими.
+
+        :param topics: Имена топиков.
+        :param fresh: Не брать снимок из кэша (он живёт около секунды).
+        :return: Экземпляр OffsetSnapshot.
+        """
+        return self.offsets.snapshot(topics, fresh=fresh)
 
     def subscribe_listen_new_offsets(self, topic):
         """Подписывается на топик и возвращает список партиций со следующими оффсетами чтения.
 
-        Логика:
-          1) получить перечень партиций топика;
-          2) определить high watermark (текущий «конец» партиции) для каждой;
-          3) вернуть `TopicPartition(topic, partition_id, next_offset)` — чтобы читать только новые сообщения.
+        Концы всех партиций берутся из `offset_snapshot()` — одним пакетным запросом
+        `list_offsets`, а не отдельным `get_watermark_offsets` на каждую партицию.
 
         :param topic: Имя топика.
         :return: Список `TopicPartition` с оффсетами для чтения «с конца».
         """
-        md = self.admin.list_topics(topic, timeout=5)
-        p_ids = md.topics[topic].partitions.keys()
-
-        partitions_offsets_event = {p: self.get_last_offset(topic, p) for p in p_ids}
-        logging.info("%s offsets: %s", topic, partitions_offsets_event)
-
-        return [
-            TopicPartition(topic, p, off) for p, off in partitions_offsets_event.items()
-        ]
+        partitions = self.offset_snapshot(topic).topic_partitions(topic)
+        logging.info(
+            "%s offsets: %s", topic, {tp.partition: tp.offset for tp in partitions}
+        )
+        return partitions
 
     def sending_message(self, topic: str, username: str):
         """Формирует и публикует доменное сообщение о пользователе в указанный топик.
@@ -300,6 +579,19 @@ class KafkaClient:
             topic,
             value=value,
             on_delivery=KafkaClient.delivery_report,
-            headers={"__TypeId__": "guru.qa.niffler.model.UserJson"},
+            headers={TYPE_ID_HEADER: USER_JSON_TYPE},
         )
         self.producer.flush(5)
+
+    def sending_messages(self, topic: str, usernames: Iterable[str]) -> DeliveryStats:
+        """Пакетный вариант `sending_message`: публикует пользователей одной пачкой.
+
+        :param topic: Имя целевого топика (например, `users`).
+        :param usernames: Имена пользователей.
+        :return: Статистика доставки.
+        """
+        return self.produce_many(
+            topic,
+            (UserName(username=username) for username in usernames),
+            headers={TYPE_ID_HEADER: USER_JSON_TYPE},
+        )
@@ -0,0 +1,165 @@
+import logging
+
+from confluent_kafka.cimpl import Message
+from pydantic import BaseModel
+from pydantic_core import from_json
+
+from niffler_e_2_e_tests_python.models.user import UserName
+
+TYPE_ID_HEADER = "__TypeId__"
+USER_JSON_TYPE = "guru.qa.niffler.model.UserJson"
+
+
+def json_object(raw: bytes | str | None) -> dict | None:
+    """Разбирает тело сообщения как JSON-объект парсером pydantic-core.
+
+    :param raw: Тело сообщения.
+    :return: Словарь или None, если тело пустое, не JSON или не объект.
+    """
+    if not raw:
+        return None
+    try:
+        payload = from_json(raw)
+    except ValueError as e:
+        logging.debug("Skip non-JSON message: %s", e)
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+class MessageTypes:
+    """Реестр pydantic-моделей по значению заголовка `__TypeId__`.
+
+    Spring Kafka пишет в `__TypeId__` имя Java-класса тела сообщения; по нему
+    выбирается модель, в которую тело разбирается сразу из байтов (`model_validate_json`).
+    """
+
+    def __init__(self) -> None:
+        self._models: dict[str, type[BaseModel]] = {}
+
+    def register(self, type_id: str, model: type[BaseModel]) -> None:
+        """Связывает тип сообщения с моделью.
+
+        :param type_id: Значение заголовка `__TypeId__`.
+        :param model: Pydantic-модель тела.
+        """
+        self._models[type_id] = model
+
+    def model_for(self, type_id: str | None) -> type[BaseModel] | None:
+        """Возвращает модель для типа сообщения или None, если тип не зарегистрирован."""
+        return self._models.get(type_id) if type_id else None
+
+
+message_types = MessageTypes()
+message_types.register(USER_JSON_TYPE, UserName)
+
+
+class DecodedMessage:
+    """Сообщение Kafka с ленивым разбором.
+
+    Ключ, заголовки, JSON-словарь и модель вычисляются при первом обращении
+    и кэшируются, поэтому фильтр по ключу или `__TypeId__` отбрасывает чужие
+    сообщения, не трогая тело, а прошедшие фильтр разбираются ровно один раз.
+    """
+
+    __slots__ = ("message", "types", "_headers", "_payload", "_model")
+
+    _UNSET = object()
+
+    def __init__(self, message: Message, types: MessageTypes = message_types) -> None:
+        """:param message: Сообщение confluent-kafka.
+        :param types: Реестр моделей по `__TypeId__`.
+        """
+        self.message = message
+        self.types = types
+        self._headers: dict[str, bytes] | None = None
+        self._payload = self._UNSET
+        self._model = self._UNSET
+
+    @property
+    def topic(self) -> str:
+        """Имя топика."""
+        return self.message.topic()
+
+    @property
+    def partition(self) -> int:
+        """Номер партиции."""
+        return self.message.partition()
+
+    @property
+    def offset(self) -> int:
+        """Оффсет сообщения."""
+        return self.message.offset()
+
+    @property
+    def raw(self) -> bytes | None:
+        """Тело сообщения без разбора."""
+        return self.message.value()
+
+    @property
+    def key(self) -> str | None:
+        """Ключ сообщения, декодированный как UTF-8."""
+        key = self.message.key()
+        return key.decode("utf-8", "replace") if isinstance(key, bytes) else key
+
+    @property
+    def headers(self) -> dict[str, bytes]:
+        """Заголовки сообщения."""
+        if self._headers is None:
+            self._headers = dict(self.message.headers() or [])
+        return self._headers
+
+    @property
+    def type_id(self) -> str | None:
+        """Значение заголовка `__TypeId__`."""
+        value = self.headers.get(TYPE_ID_HEADER)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    @property
+    def payload(self) -> dict | None:
+        """Тело как JSON-словарь (None, если тело не JSON-объект)."""
+        if self._payload is self._UNSET:
+            self._payload = json_object(self.raw)
+        return self._payload
+
+    @property
+    def model(self) -> BaseModel | None:
+        """Тело, разобранное в модель по `__TypeId__`.
+
+        :return: Экземпляр модели или None, если тип не зарегистрирован.
+        :raises pydantic.ValidationError: Если тело не соответствует модели.
+        """
+        if self._model is self._UNSET:
+            model = self.types.model_for(self.type_id)
+            self._model = model.model_validate_json(self.raw) if model else None
+        return self._model
+
+    @property
+    def username(self) -> str | None:
+        """`username` из модели, а если тип неизвестен или тело невалидно — из JSON-словаря."""
+        try:
+            model = self.model
+        except ValueError:
+            model = None
+        if model is not None and hasattr(model, "username"):
+            return model.username
+        payload = self.payload
+        return payload.get("username") if payload else None
+
+    def matches(
+        self, key: str | None = None, type_id: str | None = None, **headers: str
+    ) -> bool:
+        """Проверяет сообщение по ключу и заголовкам, не разбирая тело.
+
+        :param key: Ожидаемый ключ; None — любой.
+        :param type_id: Ожидаемый `__TypeId__`; None — любой.
+        :param headers: Ожидаемые значения других заголовков.
+        :return: True, если все условия выполнены.
+        """
+        if key is not None and self.key != key:
+            return False
+        if type_id is not None and self.type_id != type_id:
+            return False
+        return all(
+            self.headers.get(name) == value.encode("utf-8")
+            for name, value in headers.items()
+        )
@@ -0,0 +1,169 @@
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from confluent_kafka import TopicPartition
+from confluent_kafka.admin import AdminClient, OffsetSpec
+
+# Сколько секунд снимок концов партиций считается свежим.
+DEFAULT_OFFSETS_TTL = 1.0
+DEFAULT_OFFSETS_TIMEOUT = 10.0
+
+
+@dataclass(frozen=True)
+class OffsetSnapshot:
+    """Концы (high watermark) партиций нескольких топиков на момент снимка.
+
+    Снимок неизменяем: его можно взять до действия, ещё раз — после, и сравнить через `diff()`.
+
+    :param offsets: Оффсет конца по ключу `(topic, partition)`.
+    :param taken_at: Момент снимка (`time.monotonic()`).
+    """
+
+    offsets: dict[tuple[str, int], int]
+    taken_at: float
+
+    def topics(self) -> list[str]:
+        """Возвращает имена топиков снимка в алфавитном порядке."""
+        return sorted({topic for topic, _ in self.offsets})
+
+    def topic_partitions(self, topic: str | None = None) -> list[TopicPartition]:
+        """Возвращает `TopicPartition` с оффсетами конца — для чтения только новых сообщений.
+
+        :param topic: Имя топика; None — все топики снимка.
+        :return: Список `TopicPartition`, готовый для `consumer.assign()`.
+        """
+        return [
+            TopicPartition(t, p, offset)
+            for (t, p), offset in sorted(self.offsets.items())
+            if topic is None or t == topic
+        ]
+
+    def diff(self, later: "OffsetSnapshot") -> dict[tuple[str, int], int]:
+        """Считает, сколько сообщений появилось в каждой партиции к более позднему снимку.
+
+        Партиции, которых нет в этом снимке, считаются с нулевого оффсета.
+
+        :param later: Снимок, сделанный после действия.
+        :return: Прирост по ключу `(topic, partition)`; партиции без изменений не попадают.
+        """
+        return {
+            key: offset - self.offsets.get(key, 0)
+            for key, offset in later.offsets.items()
+            if offset != self.offsets.get(key, 0)
+        }
+
+    def new_messages(self, later: "OffsetSnapshot", topic: str | None = None) -> int:
+        """Суммарное число новых сообщений к более позднему снимку.
+
+        :param later: Снимок, сделанный после действия.
+        :param topic: Имя топика; None — все топики.
+        :return: Количество сообщений.
+        """
+        return sum(
+            delta
+            for (t, _), delta in self.diff(later).items()
+            if topic is None or t == topic
+        )
+
+
+class KafkaOffsets:
+    """Получает концы партиций одним пакетным запросом `AdminClient.list_offsets`.
+
+    Список партиций берётся из метаданных кластера один раз на топик, а концы партиций
+    кэшируются на `ttl` секунд: подряд идущие тесты, подписывающиеся на тот же топик,
+    не ходят в брокер. Устаревший конец безопасен для подписки — консюмер лишь прочитает
+    несколько уже существующих сообщений, — а для сравнения «до/после» есть `fresh=True`.
+    """
+
+    def __init__(
+        self,
+        admin: AdminClient,
+        ttl: float = DEFAULT_OFFSETS_TTL,
+        timeout: float = DEFAULT_OFFSETS_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """:param admin: Админ-клиент Kafka.
+        :param ttl: Сколько секунд снимок топика переиспользуется.
+        :param timeout: Таймаут запросов метаданных и оффсетов, секунды.
+        :param clock: Источник монотонного времени.
+        """
+        self.admin = admin
+        self.ttl = ttl
+        self.timeout = timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._partitions: dict[str, list[int]] = {}
+        self._cached: dict[str, tuple[float, dict[int, int]]] = {}
+        self.requests = 0
+
+    def _partition_ids(self, topics: list[str]) -> dict[str, list[int]]:
+        unknown = [topic for topic in topics if topic not in self._partitions]
+        if unknown:
+            md = self.admin.list_topics(timeout=self.timeout)
+            for topic in unknown:
+                if topic not in md.topics:
+                    raise ValueError(f"Kafka topic {topic!r} does not exist")
+                self._partitions[topic] = sorted(md.topics[topic].partitions)
+        return {topic: self._partitions[topic] for topic in topics}
+
+    def _fetch(self, topics: list[str]) -> dict[str, dict[int, int]]:
+        request = {
+            TopicPartition(topic, p): OffsetSpec.latest()
+            for topic, partitions in self._partition_ids(topics).items()
+            for p in partitions
+        }
+        futures = self.admin.list_offsets(request, request_timeout=self.timeout)
+        self.requests += 1
+        result: dict[str, dict[int, int]] = {topic: {} for topic in topics}
+        for tp, future in futures.items():
+            result[tp.topic][tp.partition] = future.result().offset
+        return result
+
+    def snapshot(self, topics: Iterable[str], fresh: bool = False) -> OffsetSnapshot:
+        """Снимает концы всех партиций указанных топиков.
+
+        :param topics: Имена топиков.
+        :param fresh: Игнорировать кэш (нужно для снимка «после» действия).
+        :return: Экземпляр OffsetSnapshot.
+        :raises ValueError: Если топика нет в кластере.
+        :raises KafkaException: Если брокер не вернул оффсеты.
+        """
+        topics = list(dict.fromkeys(topics))
+        with self._lock:
+            now = self._clock()
+            stale = [
+                topic
+                for topic in topics
+                if fresh
+                or topic not in self._cached
+                or now - self._cached[topic][0] > self.ttl
+            ]
+            if stale:
+                for topic, offsets in self._fetch(stale).items():
+                    self._cached[topic] = (now, offsets)
+                logging.info("Kafka end offsets for %s fetched", stale)
+            offsets = {
+                (topic, p): offset
+                for topic in topics
+                for p, offset in self._cached[topic][1].items()
+            }
+            taken_at = (
+                min(self._cached[topic][0] for topic in topics) if topics else now
+            )
+        return OffsetSnapshot(offsets, taken_at)
+
+    def invalidate(self, topic: str | None = None) -> None:
+        """Сбрасывает кэш концов партиций (и список партиций) топика или всех топиков.
+
+        :param topic: Имя топика; None — все топики.
+        """
+        with self._lock:
+            if topic is None:
+                self._cached.clear()
+                self._partitions.clear()
+            else:
+                self._cached.pop(topic, None)
+                self._partitions.pop(topic, None)
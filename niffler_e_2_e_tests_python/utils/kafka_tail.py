@@ -0,0 +1,339 @@
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+from confluent_kafka import TopicPartition
+from confluent_kafka.cimpl import Consumer, Message
+from pydantic import BaseModel
+
+from niffler_e_2_e_tests_python.utils.kafka_decoding import (
+    TYPE_ID_HEADER,
+    json_object,
+    message_types,
+)
+
+DEFAULT_MAX_EVENTS = 10_000
+DEFAULT_MAX_AGE = 300.0
+POLL_INTERVAL = 0.2
+
+
+@dataclass
+class KafkaEvent:
+    """Сообщение Kafka, сохранённое фоновым консюмером.
+
+    :param seq: Порядковый номер события в буфере (растёт монотонно).
+    :param topic: Топик.
+    :param partition: Партиция.
+    :param offset: Оффсет.
+    :param key: Ключ сообщения (строка) или None.
+    :param value: Сырые байты значения.
+    :param headers: Заголовки сообщения.
+    :param received_at: Момент получения (`time.monotonic()`).
+    :param payload: Значение, разобранное как JSON-объект, или None.
+    """
+
+    seq: int
+    topic: str
+    partition: int
+    offset: int
+    key: str | None
+    value: bytes
+    headers: dict[str, bytes] = field(default_factory=dict)
+    received_at: float = 0.0
+    payload: dict | None = None
+
+    @property
+    def username(self) -> str | None:
+        """Значение `username` из JSON-payload, если оно есть."""
+        return self.payload.get("username") if self.payload else None
+
+    @property
+    def model(self) -> BaseModel | None:
+        """Payload, разобранный в модель по заголовку `__TypeId__` (см. `message_types`).
+
+        :return: Экземпляр модели или None, если тип не зарегистрирован или payload пуст.
+        :raises pydantic.ValidationError: Если payload не соответствует модели.
+        """
+        type_id = self.headers.get(TYPE_ID_HEADER)
+        if isinstance(type_id, bytes):
+            type_id = type_id.decode("utf-8")
+        model = message_types.model_for(type_id)
+        return model.model_validate(self.payload) if model and self.payload else None
+
+
+class EventBuffer:
+    """Ограниченный кольцевой буфер событий Kafka с индексами по ключу и `username`.
+
+    События хранятся в порядке поступления; при превышении `max_events` или
+    возраста `max_age` вытесняются самые старые. Индексы — очереди в том же
+    порядке, поэтому вытеснение и поиск по ключу/имени стоят O(1) (плюс
+    просмотр нескольких событий одного ключа). Ожидающие потоки будятся
+    через `threading.Condition` при каждом новом событии.
+    """
+
+    def __init__(
+        self,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        max_age: float = DEFAULT_MAX_AGE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """:param max_events: Максимум событий в буфере.
+        :param max_age: Максимальный возраст события, секунды.
+        :param clock: Источник монотонного времени.
+        """
+        self.max_events = max_events
+        self.max_age = max_age
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._events: deque[KafkaEvent] = deque()
+        self._by_key: dict[str, deque[KafkaEvent]] = {}
+        self._by_username: dict[str, deque[KafkaEvent]] = {}
+        self._seq = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        """Текущее число событий в буфере."""
+        with self._cond:
+            self._evict()
+            return len(self._events)
+
+    @staticmethod
+    def _unindex(index: dict[str, deque[KafkaEvent]], name: str | None) -> None:
+        if name is None:
+            return
+        bucket = index.get(name)
+        if bucket:
+            bucket.popleft()
+            if not bucket:
+                del index[name]
+
+    def _evict(self) -> None:
+        deadline = self._clock() - self.max_age
+        while self._events and (
+            len(self._events) > self.max_events
+            or self._events[0].received_at < deadline
+        ):
+            event = self._events.popleft()
+            self._unindex(self._by_key, event.key)
+            self._unindex(self._by_username, event.username)
+            self.evicted += 1
+
+    def add(
+        self,
+        topic: str,
+        partition: int,
+        offset: int,
+        key: str | None,
+        value: bytes,
+        headers: dict[str, bytes] | None = None,
+    ) -> KafkaEvent:
+        """Добавляет событие, индексирует его и будит ожидающих.
+
+        :return: Сохранённое событие.
+        """
+        payload = json_object(value)
+        with self._cond:
+            self._seq += 1
+            event = KafkaEvent(
+                self._seq,
+                topic,
+                partition,
+                offset,
+                key,
+                value,
+                headers or {},
+                self._clock(),
+                payload,
+            )
+            self._events.append(event)
+            if key is not None:
+                self._by_key.setdefault(key, deque()).append(event)
+            if event.username is not None:
+                self._by_username.setdefault(event.username, deque()).append(event)
+            self._evict()
+            self._cond.notify_all()
+        return event
+
+    def mark(self) -> int:
+        """Возвращает номер последнего события: `find(after=mark)` вернёт только более новые."""
+        with self._cond:
+            return self._seq
+
+    def _candidates(
+        self, key: str | None, username: str | None
+    ) -> Iterable[KafkaEvent]:
+        if key is not None:
+            return self._by_key.get(key, ())
+        if username is not None:
+            return self._by_username.get(username, ())
+        return self._events
+
+    def find(
+        self,
+        *,
+        topic: str | None = None,
+        key: str | None = None,
+        username: str | None = None,
+        after: int = 0,
+        predicate: Callable[[KafkaEvent], bool] | None = None,
+    ) -> KafkaEvent | None:
+        """Ищет первое подходящее событие среди уже полученных.
+
+        :param topic: Топик или None — любой.
+        :param key: Ключ сообщения (поиск по индексу).
+        :param username: `username` из payload (поиск по индексу).
+        :param after: Учитывать только события с `seq` больше этого (см. `mark()`).
+        :param predicate: Дополнительное условие.
+        :return: Событие или None.
+        """
+        with self._cond:
+            self._evict()
+            for event in self._candidates(key, username):
+                if (
+                    event.seq > after
+                    and (topic is None or event.topic == topic)
+                    and (username is None or event.username == username)
+                    and (predicate is None or predicate(event))
+                ):
+                    return event
+        return None
+
+    def wait_for(self, timeout: float = 25.0, **criteria) -> KafkaEvent:
+        """Ждёт появления события, подходящего под критерии `find()`.
+
+        :param timeout: Максимальное время ожидания, секунды.
+        :param criteria: Аргументы `find()` (topic, key, username, after, predicate).
+        :return: Найденное событие.
+        :raises AssertionError: Если событие не появилось за `timeout`.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                event = self.find(**criteria)
+                if event is not None:
+                    return event
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        raise AssertionError(f"Timed out waiting Kafka event matching {criteria}")
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счётчики буфера: `{"size", "received", "evicted"}`."""
+        with self._cond:
+            self._evict()
+            return {
+                "size": len(self._events),
+                "received": self._seq,
+                "evicted": self.evicted,
+            }
+
+
+class KafkaTail:
+    """Фоновый консюмер, складывающий все новые сообщения заданных топиков в EventBuffer.
+
+    Партиции назначаются с текущих high watermark ещё в `start()`, поэтому
+    любое сообщение, опубликованное после его возврата, попадёт в буфер.
+    Один экземпляр на сессию заменяет повторное чтение одного и того же
+    трафика каждым тестом.
+    """
+
+    def __init__(
+        self,
+        envs,
+        topics: Iterable[str],
+        buffer: EventBuffer | None = None,
+        group_id: str | None = None,
+        consumer_factory: Callable[[dict], Consumer] = Consumer,
+    ) -> None:
+        """:param envs: Конфигурация окружения (адрес консюмера Kafka).
+        :param topics: Топики, которые нужно читать.
+        :param buffer: Буфер событий; по умолчанию создаётся новый.
+        :param group_id: Группа консюмера; по умолчанию уникальная.
+        :param consumer_factory: Фабрика консюмера по конфигурации (для фейкового брокера).
+        """
+        self.topics = list(topics)
+        self.buffer = buffer or EventBuffer()
+        self.consumer = consumer_factory(
+            {
+                "bootstrap.servers": envs.kafka_address_consumer,
+                "group.id": group_id or f"tail-{uuid4().hex[:8]}",
+                "client.id": "tester-tail",
+                "enable.auto.commit": False,
+                "enable.ssl.certificate.verification": False,
+            }
+        )
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _end_offsets(self) -> list[TopicPartition]:
+        metadata = self.consumer.list_topics(timeout=5)
+        partitions = []
+        for topic in self.topics:
+            if topic not in metadata.topics:
+                logging.warning("Kafka tail: no such topic %s", topic)
+                continue
+            for p in metadata.topics[topic].partitions:
+                _, high = self.consumer.get_watermark_offsets(
+                    TopicPartition(topic, p), timeout=10
+                )
+                partitions.append(TopicPartition(topic, p, high))
+        return partitions
+
+    def _ingest(self, message: Message) -> None:
+        key = message.key()
+        self.buffer.add(
+            message.topic(),
+            message.partition(),
+            message.offset(),
+            key.decode("utf-8", "replace") if isinstance(key, bytes) else key,
+            message.value(),
+            dict(message.headers() or []),
+        )
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            message = self.consumer.poll(POLL_INTERVAL)
+            if message is None:
+                continue
+            if message.error():
+                logging.warning("Kafka tail error: %s", message.error())
+                continue
+            self._ingest(message)
+
+    def start(self) -> "KafkaTail":
+        """Назначает партиции с конца и запускает фоновый поток чтения.
+
+        :return: Сам KafkaTail.
+        """
+        partitions = self._end_offsets()
+        logging.info("Kafka tail assigned: %s", partitions)
+        self.consumer.assign(partitions)
+        self._thread = threading.Thread(
+            target=self._run, name="kafka-tail", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает поток и закрывает консюмер."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.consumer.close()
+
+    def __enter__(self) -> "KafkaTail":
+        """Запускает чтение при входе в `with`."""
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Останавливает чтение при выходе из `with`."""
+        self.stop()
+
+    def wait_for(self, timeout: float = 25.0, **criteria) -> KafkaEvent:
+        """Ждёт подходящее событие в буфере; см. `EventBuffer.wait_for`."""
+        return self.buffer.wait_for(timeout, **criteria)
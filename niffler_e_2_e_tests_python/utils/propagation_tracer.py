@@ -0,0 +1,219 @@
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+from niffler_e_2_e_tests_python.databases.used_db import UsersDb
+from niffler_e_2_e_tests_python.models.user import UserName
+from niffler_e_2_e_tests_python.utils.http_metrics import LatencyHistogram
+from niffler_e_2_e_tests_python.utils.kafka_client import KafkaClient
+from niffler_e_2_e_tests_python.utils.kafka_decoding import (
+    TYPE_ID_HEADER,
+    USER_JSON_TYPE,
+)
+
+CORRELATION_ID_HEADER = "X-Correlation-Id"
+SENT_AT_HEADER = "X-Sent-At"
+DEFAULT_POLL_INTERVAL = 0.1
+# Сколько имён проверять в БД одним `SELECT ... IN (...)`.
+POLL_CHUNK_SIZE = 500
+
+
+@dataclass
+class TracedEvent:
+    """Одно событие, отправленное трассировщиком.
+
+    :param correlation_id: Идентификатор корреляции (заголовок `X-Correlation-Id`).
+    :param username: Имя пользователя в сообщении (содержит correlation_id).
+    :param sent_at: Момент публикации (epoch, секунды; заголовок `X-Sent-At` в мс).
+    :param acked_at: Момент подтверждения брокером или None.
+    :param stored_at: Момент, когда строка найдена в БД userdata, или None.
+    """
+
+    correlation_id: str
+    username: str
+    sent_at: float
+    acked_at: float | None = None
+    stored_at: float | None = None
+
+
+@dataclass
+class PropagationReport:
+    """Итог прогона `PropagationTracer.run`.
+
+    :param sent: Сколько событий отправлено.
+    :param stored: Сколько из них дошло до БД userdata.
+    :param rate: Заданный темп публикации, сообщений/с (None — без ограничения).
+    :param elapsed: Время от первой публикации до последней найденной строки, секунды.
+    :param ack_latency: Гистограмма «публикация → подтверждение брокера», мс.
+    :param store_latency: Гистограмма «публикация → строка в БД», мс.
+    :param missing: Имена пользователей, не появившихся в БД до таймаута.
+    """
+
+    sent: int = 0
+    stored: int = 0
+    rate: float | None = None
+    elapsed: float = 0.0
+    ack_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    store_latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    missing: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """Сводка для логов, Allure-вложений и бенчмарка."""
+        store = self.store_latency
+        return {
+            "sent": self.sent,
+            "stored": self.stored,
+            "rate": self.rate,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput": round(self.stored / self.elapsed, 1) if self.elapsed else 0.0,
+            "ack_p50_ms": round(self.ack_latency.percentile(50), 2),
+            "ack_p99_ms": round(self.ack_latency.percentile(99), 2),
+            "store_p50_ms": round(store.percentile(50), 2),
+            "store_p95_ms": round(store.percentile(95), 2),
+            "store_p99_ms": round(store.percentile(99), 2),
+            "store_max_ms": round(store.max_ms, 2),
+            "missing": self.missing,
+        }
+
+
+class PropagationTracer:
+    """Замеряет задержку «сообщение в топике users → строка в БД userdata».
+
+    Каждое сообщение получает заголовки `X-Correlation-Id` и `X-Sent-At`, а имя
+    пользователя строится из correlation ID, поэтому строка в БД однозначно
+    сопоставляется с событием. Публикация идёт с заданным темпом, а между
+    отправками одним запросом проверяется, какие из ещё не найденных пользователей
+    уже появились. Точность замера ограничена интервалом опроса `poll`.
+    """
+
+    def __init__(
+        self,
+        kafka: KafkaClient,
+        users_db: UsersDb,
+        topic: str = "users",
+        poll: float = DEFAULT_POLL_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """:param kafka: Kafka-клиент (используется его общий продюсер).
+        :param users_db: Клиент БД userdata.
+        :param topic: Топик, который читает userdata.
+        :param poll: Интервал опроса БД, секунды.
+        :param clock: Источник текущего времени (epoch, секунды).
+        """
+        self.kafka = kafka
+        self.users_db = users_db
+        self.topic = topic
+        self.poll = poll
+        self._clock = clock
+        self.events: dict[str, TracedEvent] = {}
+
+    def send(self) -> TracedEvent:
+        """Публикует одно событие пользователя со штампами корреляции и времени.
+
+        :return: Отправленное событие.
+        """
+        correlation_id = uuid4().hex
+        event = TracedEvent(
+            correlation_id, f"trace-{correlation_id[:16]}", self._clock()
+        )
+
+        def _on_delivery(err, msg) -> None:
+            if err is None:
+                event.acked_at = self._clock()
+            else:
+                logging.warning(
+                    "Traced event %s not delivered: %s", correlation_id, err
+                )
+
+        self.kafka.producer.produce(
+            self.topic,
+            value=UserName(username=event.username).model_dump_json(),
+            headers={
+                TYPE_ID_HEADER: USER_JSON_TYPE,
+                CORRELATION_ID_HEADER: correlation_id,
+                SENT_AT_HEADER: str(int(event.sent_at * 1000)),
+            },
+            on_delivery=_on_delivery,
+        )
+        self.kafka.producer.poll(0)
+        self.events[event.username] = event
+        return event
+
+    def _check_stored(self) -> int:
+        pending = [u for u, e in self.events.items() if e.stored_at is None]
+        found = 0
+        for i in range(0, len(pending), POLL_CHUNK_SIZE):
+            now = self._clock()
+            for username in self.users_db.existing_usernames(
+                pending[i : i + POLL_CHUNK_SIZE]
+            ):
+                self.events[username].stored_at = now
+                found += 1
+        return found
+
+    def _pending(self) -> int:
+        return sum(1 for e in self.events.values() if e.stored_at is None)
+
+    def run(
+        self, count: int, rate: float | None = None, timeout: float = 60.0
+    ) -> PropagationReport:
+        """Публикует `count` событий с темпом `rate` и ждёт их появления в БД.
+
+        :param count: Сколько событий отправить.
+        :param rate: Сообщений в секунду; None — отправить все сразу.
+        :param timeout: Сколько ждать последние строки после окончания публикации, секунды.
+        :return: Отчёт с распределениями задержек.
+        """
+        started = self._clock()
+        next_poll = started
+        for i in range(count):
+            if rate:
+                while (delay := started + i / rate - self._clock()) > 0:
+                    if self._clock() >= next_poll:
+                        self._check_stored()
+                        next_poll = self._clock() + self.poll
+                    time.sleep(min(delay, self.poll))
+            self.send()
+        self.kafka.producer.flush(timeout)
+
+        deadline = self._clock() + timeout
+        while self._pending() and self._clock() < deadline:
+            self._check_stored()
+            if self._pending():
+                time.sleep(self.poll)
+        return self.report(rate, started)
+
+    def report(
+        self, rate: float | None = None, started: float | None = None
+    ) -> PropagationReport:
+        """Собирает отчёт по отправленным событиям.
+
+        :param rate: Темп публикации, который записать в отчёт.
+        :param started: Начало прогона; по умолчанию — момент первой отправки.
+        :return: PropagationReport.
+        """
+        report = PropagationReport(sent=len(self.events), rate=rate)
+        events = list(self.events.values())
+        if not events:
+            return report
+        started = started if started is not None else min(e.sent_at for e in events)
+        last_stored = started
+        for event in events:
+            if event.acked_at is not None:
+                report.ack_latency.record((event.acked_at - event.sent_at) * 1000)
+            if event.stored_at is None:
+                report.missing.append(event.username)
+                continue
+            report.stored += 1
+            report.store_latency.record((event.stored_at - event.sent_at) * 1000)
+            last_stored = max(last_stored, event.stored_at)
+        report.elapsed = last_stored - started
+        logging.info("Kafka -> userdata propagation: %s", report.to_dict())
+        return report
+
+    def cleanup(self) -> None:
+        """Удаляет из БД userdata всех пользователей, созданных трассировщиком."""
+        self.users_db.delete_users(self.events)
+        self.events.clear()
@@ -0,0 +1,72 @@
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any
+
+
+class ReadCache:
+    """Кэш чтений API-клиентов с инвалидацией по записи.
+
+    Значения хранятся по ключу (пользователь, путь, параметры запроса). Любая
+    запись того же пользователя через клиент, подключённый к кэшу, сбрасывает
+    все его закэшированные чтения. Счётчики попаданий и промахов показывают,
+    сколько обращений к gateway удалось сэкономить.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._data: dict[Hashable, dict[Hashable, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(path: str, params: dict | None = None) -> Hashable:
+        """Строит ключ чтения из пути и параметров запроса.
+
+        :param path: Относительный путь эндпоинта.
+        :param params: Query-параметры запроса.
+        :return: Хэшируемый ключ.
+        """
+        return path, tuple(sorted((params or {}).items()))
+
+    def get_or_load(
+        self, user: Hashable, key: Hashable, loader: Callable[[], Any]
+    ) -> Any:
+        """Возвращает закэшированное значение или загружает и запоминает его.
+
+        :param user: Идентификатор пользователя (например, токен клиента).
+        :param key: Ключ чтения, см. `make_key`.
+        :param loader: Функция без аргументов, выполняющая реальный запрос.
+        :return: Значение из кэша или результат `loader()`.
+        """
+        with self._lock:
+            user_data = self._data.setdefault(user, {})
+            if key in user_data:
+                self.hits += 1
+                return user_data[key]
+            self.misses += 1
+        value = loader()
+        with self._lock:
+            self._data.setdefault(user, {})[key] = value
+        return value
+
+    def invalidate(self, user: Hashable) -> None:
+        """Сбрасывает все закэшированные чтения пользователя.
+
+        :param user: Идентификатор пользователя.
+        """
+        with self._lock:
+            if self._data.pop(user, None):
+                self.invalidations += 1
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счётчики кэша.
+
+        :return: Словарь `{"hits", "misses", "invalidations"}`.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,152 @@
+import json
+import os
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+STORE_FILE = "users.json"
+LOCK_FILE = "users.lock"
+
+
+@dataclass
+class StoredUser:
+    """Запись о пользователе в общем хранилище.
+
+    :param username: Имя пользователя.
+    :param password: Пароль.
+    :param token: Сериализованный TokenSet (`asdict`) или None.
+    :param owner: xdist-воркер, забравший пользователя, или None, если он свободен.
+    """
+
+    username: str
+    password: str
+    token: dict | None = None
+    owner: str | None = None
+
+
+def _lock(f) -> None:
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        while True:
+            try:
+                # LK_LOCK сам повторяет попытки около 10 секунд, затем бросает OSError.
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    else:
+        import fcntl
+
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+
+def _unlock(f) -> None:
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Эксклюзивная межпроцессная блокировка на файле.
+
+    `flock` на POSIX и `msvcrt.locking` на Windows; модуль импортируется при
+    захвате, поэтому импорт плагина не зависит от платформы.
+
+    :param path: Путь к файлу блокировки (создаётся при необходимости).
+    """
+    with open(path, "a") as f:
+        _lock(f)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+
+class SharedUserStore:
+    """Хранилище зарегистрированных пользователей и их токенов, общее для xdist-воркеров.
+
+    Первый воркер, захвативший блокировку в новом прогоне, становится координатором:
+    разом регистрирует и авторизует пользователей для всех воркеров и записывает их
+    в JSON-файл. Остальные ждут на блокировке и забирают свою часть уже готовых
+    пользователей. Записи прошлых прогонов отбрасываются по `run_id`.
+    """
+
+    def __init__(self, directory: Path, run_id: str) -> None:
+        """:param directory: Каталог хранилища (например, внутри `.pytest_cache`).
+        :param run_id: Идентификатор прогона, общий для всех воркеров.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / STORE_FILE
+        self.lock_path = directory / LOCK_FILE
+        self.run_id = run_id
+
+    def _read(self) -> list[StoredUser] | None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        if data.get("run_id") != self.run_id:
+            return None
+        return [StoredUser(**user) for user in data["users"]]
+
+    def _write(self, users: list[StoredUser]) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(
+                {"run_id": self.run_id, "users": [asdict(user) for user in users]}
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+    def claim(
+        self,
+        owner: str,
+        count: int,
+        total: int,
+        provision: Callable[[int], list[StoredUser]],
+    ) -> list[StoredUser]:
+        """Забирает `count` свободных пользователей, при необходимости создавая всех.
+
+        :param owner: Имя воркера, например `gw0`.
+        :param count: Сколько пользователей нужно этому воркеру.
+        :param total: Сколько пользователей создать на все воркеры, если хранилище пусто.
+        :param provision: Функция (total) -> список зарегистрированных пользователей;
+            вызывается только координатором и под блокировкой.
+        :return: Пользователи, закреплённые за `owner` (их может быть меньше `count`).
+        """
+        with file_lock(self.lock_path):
+            users = self._read()
+            if users is None:
+                users = provision(total)
+            claimed = [user for user in users if user.owner is None][:count]
+            for user in claimed:
+                user.owner = owner
+            self._write(users)
+        return claimed
+
+    def claim_rest(self, owner: str) -> list[StoredUser]:
+        """Забирает всех ещё свободных пользователей прогона (например, для удаления).
+
+        :param owner: Имя воркера.
+        :return: Пользователи, закреплённые за `owner`.
+        """
+        with file_lock(self.lock_path):
+            users = self._read()
+            if users is None:
+                return []
+            claimed = [user for user in users if user.owner is None]
+            for user in claimed:
+                user.owner = owner
+            self._write(users)
+        return claimed
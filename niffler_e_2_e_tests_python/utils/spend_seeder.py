@@ -0,0 +1,171 @@
+import logging
+import statistics
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+import allure
+
+from niffler_e_2_e_tests_python.models.category import CategoryDTO
+from niffler_e_2_e_tests_python.models.spend import SpendAdd
+from niffler_e_2_e_tests_python.utils.api_clients import (
+    AsyncCategoriesApiClient,
+    AsyncSpendApiClient,
+    SpendApiClient,
+)
+from niffler_e_2_e_tests_python.utils.async_helpers import (
+    DEFAULT_CONCURRENCY,
+    gather,
+    run_async,
+)
+from niffler_e_2_e_tests_python.utils.base_session import AsyncBaseSession
+
+# Каждый UUID в query-параметре `ids` занимает ~39 байт (36 + `%2C`), а строка запроса вместе
+# с заголовками (включая JWT в Authorization) должна уложиться в 8 КБ — лимит Tomcat по
+# умолчанию. 100 UUID (~3.9 КБ) оставляют запас под токен и остальные заголовки.
+DELETE_BATCH_SIZE = 100
+
+
+@dataclass
+class SeedReport:
+    """Итог массового создания трат.
+
+    :param ids: Идентификаторы созданных трат в порядке входных данных (без упавших).
+    :param errors: Исключения упавших запросов.
+    :param elapsed: Общее время посева, в секундах.
+    :param latencies: Длительность каждого успешного запроса, в секундах.
+    """
+
+    ids: list[str] = field(default_factory=list)
+    errors: list[BaseException] = field(default_factory=list)
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """Число успешно созданных трат в секунду."""
+        return len(self.ids) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: int) -> float:
+        """Возвращает перцентиль латентности запросов, в миллисекундах.
+
+        :param q: Перцентиль от 1 до 99.
+        :return: Значение перцентиля в мс или 0, если данных нет.
+        """
+        if not self.latencies:
+            return 0.0
+        if len(self.latencies) == 1:
+            return self.latencies[0] * 1000
+        return statistics.quantiles(self.latencies, n=100)[q - 1] * 1000
+
+    def summary(self) -> str:
+        """Формирует человекочитаемую сводку по пропускной способности и латентности."""
+        return (
+            f"created: {len(self.ids)}, failed: {len(self.errors)}, "
+            f"elapsed: {self.elapsed:.2f}s, throughput: {self.throughput:.1f} req/s, "
+            f"latency p50/p95/p99: {self.percentile(50):.1f}/"
+            f"{self.percentile(95):.1f}/{self.percentile(99):.1f} ms"
+        )
+
+
+class SpendSeeder:
+    """Массовое создание трат через gateway с ограничением числа запросов в полёте.
+
+    Категории разрешаются один раз на весь посев: существующие берутся одним
+    `GET /api/categories/all`, отсутствующие создаются. Затем траты отправляются
+    конкурентно через асинхронный клиент. Все созданные идентификаторы запоминаются
+    и удаляются в `cleanup()` пакетными вызовами `delete_spending`.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        username: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+    ) -> None:
+        """:param base_url: Базовый URL gateway.
+        :param token: JWT-токен пользователя.
+        :param username: Имя пользователя-владельца трат.
+        :param concurrency: Максимальное число одновременно выполняемых запросов.
+        """
+        self.base_url = base_url
+        self.token = token
+        self.username = username
+        self.concurrency = concurrency
+        self.created_ids: list[str] = []
+
+    async def _resolve_categories(
+        self, categories_api: AsyncCategoriesApiClient, names: set[str]
+    ) -> dict[str, CategoryDTO]:
+        existing = {c.name: c for c in await categories_api.get_all_categories()}
+        missing = [name for name in names if name not in existing]
+        if missing:
+            created = await gather(
+                (categories_api.add_category(name) for name in missing),
+                limit=self.concurrency,
+            )
+            existing.update({c.name: c for c in created})
+        return existing
+
+    async def _seed(self, spends: list[SpendAdd]) -> SeedReport:
+        report = SeedReport()
+        async with AsyncBaseSession(self.base_url) as session:
+            spend_api = AsyncSpendApiClient(session, self.token)
+            categories = await self._resolve_categories(
+                AsyncCategoriesApiClient(session, self.token),
+                {s.category.name for s in spends},
+            )
+
+            async def _add(spend: SpendAdd) -> str:
+                started = time.perf_counter()
+                created = await spend_api.add_spending(
+                    spend, categories[spend.category.name], self.username
+                )
+                report.latencies.append(time.perf_counter() - started)
+                return created.id
+
+            started = time.perf_counter()
+            results = await gather(
+                (_add(s) for s in spends),
+                limit=self.concurrency,
+                return_exceptions=True,
+            )
+            report.elapsed = time.perf_counter() - started
+
+        for result in results:
+            if isinstance(result, BaseException):
+                report.errors.append(result)
+            else:
+                report.ids.append(result)
+        return report
+
+    def seed(self, spends: Iterable[SpendAdd]) -> SeedReport:
+        """Создаёт траты конкурентно и возвращает идентификаторы и сводку.
+
+        :param spends: Набор моделей новых трат; категории сопоставляются по имени.
+        :return: Отчёт SeedReport с идентификаторами, ошибками и метриками.
+        """
+        spends = list(spends)
+        with allure.step(f"Seed {len(spends)} spends (concurrency={self.concurrency})"):
+            report = run_async(self._seed(spends))
+            self.created_ids.extend(report.ids)
+            logging.info("Spend seeding: %s", report.summary())
+            allure.attach(
+                report.summary(),
+                name="Seed summary",
+                attachment_type=allure.attachment_type.TEXT,
+            )
+        return report
+
+    def cleanup(self, spend_api: SpendApiClient) -> None:
+        """Удаляет все созданные посевом траты пакетными вызовами `delete_spending`.
+
+        Для типичных объёмов это один запрос; идентификаторы режутся на пачки
+        по `DELETE_BATCH_SIZE`, только чтобы запрос не превысил лимит заголовков сервера.
+
+        :param spend_api: Синхронный клиент трат того же пользователя.
+        """
+        ids, self.created_ids = self.created_ids, []
+        for i in range(0, len(ids), DELETE_BATCH_SIZE):
+            spend_api.delete_spending(ids[i : i + DELETE_BATCH_SIZE])
@@ -0,0 +1,184 @@
+import base64
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+# Токен обновляется заранее, чтобы не истечь посреди теста.
+DEFAULT_REFRESH_MARGIN = 60.0
+
+
+def jwt_claims(token: str) -> dict:
+    """Декодирует payload JWT без проверки подписи.
+
+    :param token: Строка JWT.
+    :return: Словарь claims или пустой словарь, если токен не разбирается.
+    """
+    parts = token.split(".")
+    if len(parts) < 2:
+        return {}
+    try:
+        payload = base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4))
+        claims = json.loads(payload)
+    except ValueError:
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+@dataclass
+class TokenSet:
+    """Токены пользователя из ответа `/oauth2/token`.
+
+    :param access_token: JWT для заголовка Authorization.
+    :param expires_at: Момент истечения (epoch, секунды).
+    :param refresh_token: Refresh-токен, если сервер его выдал.
+    :param id_token: OIDC id_token (им авторизуется фронтенд), если сервер его выдал.
+    """
+
+    access_token: str
+    expires_at: float
+    refresh_token: str | None = None
+    id_token: str | None = None
+
+    @classmethod
+    def from_response(cls, data: dict, now: float) -> "TokenSet":
+        """Создаёт набор токенов из ответа token-эндпоинта.
+
+        Срок жизни берётся из claim `exp` самого JWT, а при его отсутствии — из `expires_in`.
+
+        :param data: Десериализованный ответ `/oauth2/token`.
+        :param now: Текущее время (epoch), от которого считается `expires_in`.
+        :return: Экземпляр TokenSet.
+        """
+        access_token = data["access_token"]
+        exp = jwt_claims(access_token).get("exp")
+        if exp is None:
+            exp = now + float(data.get("expires_in", 0))
+        return cls(
+            access_token, float(exp), data.get("refresh_token"), data.get("id_token")
+        )
+
+
+class TokenCache:
+    """Кэш access-токенов по имени пользователя.
+
+    Полный OAuth-поток (authorize → login → token) выполняется только при первом
+    обращении или когда до истечения токена осталось меньше `refresh_margin`.
+    Если сервер выдал refresh-токен, вместо повторного логина используется он.
+    Конкурентные запросы одного пользователя выполняют логин один раз.
+    """
+
+    def __init__(
+        self,
+        login: Callable[[str, str], dict],
+        refresh: Callable[[str], dict] | None = None,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """:param login: Функция (username, password) -> ответ `/oauth2/token`.
+        :param refresh: Функция (refresh_token) -> ответ `/oauth2/token`; None — без refresh.
+        :param refresh_margin: За сколько секунд до истечения токен считается устаревшим.
+        :param clock: Источник текущего времени (epoch, секунды).
+        """
+        self._login = login
+        self._refresh = refresh
+        self.refresh_margin = refresh_margin
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._user_locks: dict[str, threading.Lock] = {}
+        self._tokens: dict[str, TokenSet] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _fresh(self, tokens: TokenSet | None) -> bool:
+        return (
+            tokens is not None
+            and tokens.expires_at - self.refresh_margin > self._clock()
+        )
+
+    def _renew(self, username: str, password: str, stale: TokenSet | None) -> TokenSet:
+        if stale is not None and stale.refresh_token and self._refresh is not None:
+            try:
+                data = self._refresh(stale.refresh_token)
+                with self._lock:
+                    self.refreshes += 1
+                tokens = TokenSet.from_response(data, self._clock())
+                # Сервер может не выдавать новый refresh-токен, если старый переиспользуется.
+                tokens.refresh_token = tokens.refresh_token or stale.refresh_token
+                tokens.id_token = tokens.id_token or stale.id_token
+                return tokens
+            except Exception as e:
+                logging.warning(
+                    "Token refresh for %s failed, logging in: %r", username, e
+                )
+        with self._lock:
+            self.misses += 1
+        return TokenSet.from_response(self._login(username, password), self._clock())
+
+    def get_token(self, username: str, password: str) -> str:
+        """Возвращает действующий access-токен пользователя.
+
+        :param username: Имя пользователя.
+        :param password: Пароль (нужен только при логине).
+        :return: Строка access-токена.
+        """
+        with self._lock:
+            tokens = self._tokens.get(username)
+            if self._fresh(tokens):
+                self.hits += 1
+                return tokens.access_token
+            user_lock = self._user_locks.setdefault(username, threading.Lock())
+        with user_lock:
+            with self._lock:
+                tokens = self._tokens.get(username)
+                if self._fresh(tokens):
+                    self.hits += 1
+                    return tokens.access_token
+            tokens = self._renew(username, password, tokens)
+            with self._lock:
+                self._tokens[username] = tokens
+            return tokens.access_token
+
+    def peek(self, username: str) -> TokenSet | None:
+        """Возвращает сохранённые токены пользователя без логина и без учёта в статистике.
+
+        :param username: Имя пользователя.
+        :return: TokenSet или None, если токенов нет.
+        """
+        with self._lock:
+            return self._tokens.get(username)
+
+    def seed(self, username: str, tokens: TokenSet) -> None:
+        """Кладёт в кэш токены, полученные в другом месте (например, другим xdist-воркером).
+
+        Устаревшие токены будут обновлены при первом `get_token()` как обычно.
+
+        :param username: Имя пользователя.
+        :param tokens: Набор токенов.
+        """
+        with self._lock:
+            self._tokens[username] = tokens
+
+    def invalidate(self, username: str) -> None:
+        """Удаляет токены пользователя (например, после удаления пользователя).
+
+        :param username: Имя пользователя.
+        """
+        with self._lock:
+            self._tokens.pop(username, None)
+            self._user_locks.pop(username, None)
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счётчики кэша.
+
+        :return: Словарь `{"hits", "misses", "refreshes"}`.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+            }
@@ -0,0 +1,147 @@
+import logging
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Credentials:
+    """Логин и пароль пользователя из пула.
+
+    :param username: Имя пользователя.
+    :param password: Пароль.
+    """
+
+    username: str
+    password: str
+
+
+class UserPool:
+    """Пул заранее зарегистрированных пользователей, выдаваемых тестам в аренду.
+
+    Регистрация через `/register` — самая медленная часть подготовки API-теста,
+    поэтому пользователи регистрируются один раз и переиспользуются: заранее
+    созданных пользователей пул получает через `adopt()`.
+    Пользователь выдаётся одному тесту эксклюзивно, при возврате его состояние
+    сбрасывается функцией `reset`. Если свободных пользователей нет, пул
+    регистрирует нового. Пользователь, чьё состояние сбросить не удалось,
+    в пул не возвращается.
+    """
+
+    def __init__(
+        self,
+        register: Callable[[str, str], None],
+        make_credentials: Callable[[], tuple[str, str]],
+        reset: Callable[[Credentials], None] | None = None,
+        remove: Callable[[Credentials], None] | None = None,
+    ) -> None:
+        """:param register: Функция (username, password), регистрирующая пользователя.
+        :param make_credentials: Генератор новой пары (username, password).
+        :param reset: Сброс состояния пользователя при возврате; None — без сброса.
+        :param remove: Удаление пользователя при закрытии пула; None — не удалять.
+        """
+        self._register = register
+        self._make_credentials = make_credentials
+        self._reset = reset
+        self._remove = remove
+        self._lock = threading.Lock()
+        self._idle: list[Credentials] = []
+        self._leased: set[Credentials] = set()
+        self._all: list[Credentials] = []
+        self.grown = 0
+        self.retired = 0
+
+    def _create(self) -> Credentials:
+        username, password = self._make_credentials()
+        self._register(username, password)
+        return Credentials(username, password)
+
+    def adopt(self, users: Iterable[Credentials]) -> None:
+        """Добавляет в пул уже зарегистрированных пользователей.
+
+        Пул отвечает за них так же, как за собственных: сбрасывает при возврате
+        и удаляет при `close()`.
+
+        :param users: Учётные данные пользователей.
+        """
+        users = list(users)
+        with self._lock:
+            self._all.extend(users)
+            self._idle.extend(users)
+
+    def lease(self) -> Credentials:
+        """Выдаёт свободного пользователя; при исчерпании пула регистрирует нового.
+
+        :return: Учётные данные пользователя, эксклюзивно закреплённого за вызывающим.
+        """
+        with self._lock:
+            creds = self._idle.pop() if self._idle else None
+            if creds is None:
+                self.grown += 1
+        if creds is None:
+            creds = self._create()
+            with self._lock:
+                self._all.append(creds)
+        with self._lock:
+            self._leased.add(creds)
+        return creds
+
+    def release(self, creds: Credentials) -> None:
+        """Сбрасывает состояние пользователя и возвращает его в пул.
+
+        :param creds: Учётные данные, полученные из `lease()`.
+        """
+        try:
+            if self._reset is not None:
+                self._reset(creds)
+        except Exception as e:
+            logging.warning(
+                "Reset of pooled user %s failed, retiring: %r", creds.username, e
+            )
+            with self._lock:
+                self._leased.discard(creds)
+                self.retired += 1
+            return
+        with self._lock:
+            self._leased.discard(creds)
+            self._idle.append(creds)
+
+    @contextmanager
+    def leased(self) -> Iterator[Credentials]:
+        """Контекстный менеджер: `lease()` на входе и `release()` на выходе."""
+        creds = self.lease()
+        try:
+            yield creds
+        finally:
+            self.release(creds)
+
+    def close(self) -> None:
+        """Удаляет всех когда-либо зарегистрированных пулом пользователей."""
+        with self._lock:
+            users, self._all = self._all, []
+            self._idle.clear()
+            self._leased.clear()
+        if self._remove is None:
+            return
+        for creds in users:
+            try:
+                self._remove(creds)
+            except Exception as e:
+                logging.warning(
+                    "Removal of pooled user %s failed: %r", creds.username, e
+                )
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счётчики пула.
+
+        :return: Словарь `{"total", "idle", "leased", "grown", "retired"}`.
+        """
+        with self._lock:
+            return {
+                "total": len(self._all),
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "grown": self.grown,
+                "retired": self.retired,
+            }